@@ -0,0 +1,200 @@
+# Standard imports
+import itertools
+import random
+import threading
+import time
+
+# Third-party imports
+import botocore.exceptions
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+
+class FakeBatchClient:
+    """
+    A class that stands in for the AWS Batch client in benchmarks.
+
+    Every call sleeps for a configurable latency. Calls are throttled with a
+    TooManyRequestsException when they exceed the API rate (a server-side
+    token bucket) and, at random, for a fraction of calls. Submitted jobs are
+    kept so describe_jobs, cancel_job and terminate_job behave like the API.
+
+    Attributes
+    ----------
+    api_rate: float
+        number of calls per second accepted before throttling (None accepts
+        every call)
+    calls: dict
+        dictionary of operation name keys and call count values
+    counter: iterator
+        iterator of job numbers
+    fail_on: str
+        job name whose submission fails with a non-retryable error (None
+        never fails)
+    jobs: dict
+        dictionary of job identifier keys and status values
+    latency: float
+        number of seconds each call takes
+    lock: Lock
+        lock that guards calls, jobs and the random generator
+    random: Random
+        random number generator used to throttle calls
+    throttle_rate: float
+        fraction of calls that are throttled at random
+    tokens: float
+        number of calls the server-side token bucket accepts right away
+    updated: float
+        time of the last token bucket refill
+
+    Methods
+    -------
+    submit_job(**kwargs)
+        returns a new job identifier
+    describe_jobs(jobs)
+        returns the status of up to 100 jobs
+    cancel_job(jobId, reason)
+        cancels a job
+    terminate_job(jobId, reason)
+        terminates a job
+    """
+
+    DESCRIBE_LIMIT = 100
+
+    def __init__(self, latency=0.0, api_rate=None, throttle_rate=0.0,
+        fail_on=None, seed=0):
+        """
+        Parameters
+        ----------
+        latency: float, optional
+            number of seconds each call takes (default is 0)
+        api_rate: float, optional
+            calls per second accepted before throttling (default is None
+            which never throttles for rate)
+        throttle_rate: float, optional
+            fraction of calls that are throttled at random (default is 0)
+        fail_on: str, optional
+            job name whose submission fails (default is None)
+        seed: int, optional
+            seed of the random number generator (default is 0)
+        """
+
+        self.api_rate = api_rate
+        self.calls = {}
+        self.counter = itertools.count()
+        self.fail_on = fail_on
+        self.jobs = {}
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.throttle_rate = throttle_rate
+        self.tokens = api_rate if api_rate else 0.0
+        self.updated = time.monotonic()
+
+    def call(self, operation):
+        """Count a call, wait for its latency and throttle it if needed.
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if the call is throttled
+        """
+
+        with self.lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            throttled = self.random.random() < self.throttle_rate
+            if self.api_rate:
+                now = time.monotonic()
+                self.tokens = min(self.api_rate,
+                    self.tokens + (now - self.updated) * self.api_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                else:
+                    throttled = True
+        if self.latency: time.sleep(self.latency)
+        if throttled:
+            raise botocore.exceptions.ClientError({
+                "Error": { "Code": "TooManyRequestsException",
+                           "Message": "Too Many Requests" },
+                "ResponseMetadata": { "HTTPStatusCode": 429 }
+            }, operation)
+
+    def submit_job(self, **kwargs):
+        """Return a new job identifier for a job submission."""
+
+        self.call("SubmitJob")
+        if kwargs["jobName"] == self.fail_on:
+            raise botocore.exceptions.ClientError({
+                "Error": { "Code": "ClientException",
+                           "Message": "Injected failure" },
+                "ResponseMetadata": { "HTTPStatusCode": 400 }
+            }, "SubmitJob")
+        if len(kwargs.get("dependsOn", [])) > 20:
+            raise botocore.exceptions.ClientError({
+                "Error": { "Code": "ClientException",
+                           "Message": "Too many dependencies" },
+                "ResponseMetadata": { "HTTPStatusCode": 400 }
+            }, "SubmitJob")
+        with self.lock:
+            job_id = f"job-{next(self.counter)}"
+            self.jobs[job_id] = "SUBMITTED"
+        return { "jobName": kwargs["jobName"], "jobId": job_id }
+
+    def describe_jobs(self, jobs):
+        """Return the status of up to 100 jobs."""
+
+        self.call("DescribeJobs")
+        if len(jobs) > self.DESCRIBE_LIMIT:
+            raise botocore.exceptions.ClientError({
+                "Error": { "Code": "ClientException",
+                           "Message": "Too many jobs" },
+                "ResponseMetadata": { "HTTPStatusCode": 400 }
+            }, "DescribeJobs")
+        with self.lock:
+            return { "jobs": [ { "jobId": job_id, "status": self.jobs[job_id] }
+                               for job_id in jobs if job_id in self.jobs ] }
+
+    def cancel_job(self, jobId, reason):
+        """Cancel a job."""
+
+        self.call("CancelJob")
+        with self.lock:
+            self.jobs[jobId] = "FAILED"
+        return {}
+
+    def terminate_job(self, jobId, reason):
+        """Terminate a job."""
+
+        self.call("TerminateJob")
+        with self.lock:
+            self.jobs[jobId] = "FAILED"
+        return {}
+
+class FakeProvider(ClientProvider):
+    """
+    A ClientProvider whose AWS Batch client is a FakeBatchClient.
+
+    Calls go through the shared RateLimiter so throttling and retries behave
+    as they do against AWS.
+    """
+
+    def __init__(self, batch, max_pool_connections=10, limiter=None):
+        """
+        Parameters
+        ----------
+        batch: FakeBatchClient
+            fake AWS Batch client
+        max_pool_connections: int, optional
+            number of concurrent calls used for termination
+        limiter: RateLimiter, optional
+            rate limiter for API calls (default creates one)
+        """
+
+        super().__init__(max_pool_connections=max_pool_connections,
+            limiter=limiter)
+        self.clients["batch"] = batch
+
+    def client(self, service):
+        """Return the fake client for AWS Batch."""
+
+        return self.clients[service]
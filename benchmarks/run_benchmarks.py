@@ -0,0 +1,239 @@
+"""Run Benchmarks
+
+This script measures how fast Confluence submits jobs against a fake AWS
+Batch API with configurable per-call latency and throttling. Nothing is sent
+to AWS.
+
+Synthetic configurations of each size (an input job, a wide stage of
+algorithms and an output job that depends on all of them) are run through
+Confluence.create_stages and Confluence.execute_stages with each engine.
+Every submitted job is then terminated with Confluence.terminate_jobs to
+time the abort path.
+
+Arguements:
+  --sizes: Number of jobs of each synthetic configuration
+  --modes: Submission modes to compare (serial, threads, asyncio)
+  --latency: Seconds each fake API call takes
+  --api-rate: Calls per second the fake API accepts before throttling
+  --throttle: Fraction of fake API calls that are throttled at random
+  --rate: Calls per second allowed by the client-side rate limiter
+  --workers: max_workers of the threads mode and max_concurrency of asyncio
+  --algorithms: Number of algorithms in the wide stage
+  --output: Path to a file the report is also written to
+  --json: Path to a file the results are written to as JSON
+
+Example execution: python3 -m benchmarks.run_benchmarks --sizes 10 100 1000
+"""
+
+# Standard imports
+import argparse
+import json
+import logging
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Third-party imports
+import yaml
+
+# Local imports
+from benchmarks.fake_batch import FakeBatchClient, FakeProvider
+from confluence.Confluence import Confluence
+from confluence.RateLimiter import RateLimiter
+
+MODES = {
+    "serial": { "engine": "threads", "max_workers": 1 },
+    "threads": { "engine": "threads" },
+    "asyncio": { "engine": "asyncio" }
+}
+
+def create_args():
+    """Create and return argparser with arguments."""
+
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark Confluence job submission")
+    arg_parser.add_argument("--sizes",
+                            type=int,
+                            nargs="+",
+                            default=[10, 100, 1000, 10000],
+                            help="Number of jobs of each configuration")
+    arg_parser.add_argument("--modes",
+                            nargs="+",
+                            choices=list(MODES),
+                            default=list(MODES),
+                            help="Submission modes to compare")
+    arg_parser.add_argument("--latency",
+                            type=float,
+                            default=0.002,
+                            help="Seconds each fake API call takes")
+    arg_parser.add_argument("--api-rate",
+                            type=float,
+                            help="Calls per second the fake API accepts")
+    arg_parser.add_argument("--throttle",
+                            type=float,
+                            default=0.0,
+                            help="Fraction of fake API calls throttled")
+    arg_parser.add_argument("--rate",
+                            type=float,
+                            default=1000.0,
+                            help="Calls per second allowed by the rate limiter")
+    arg_parser.add_argument("--workers",
+                            type=int,
+                            default=10,
+                            help="Concurrency of the threads and asyncio modes")
+    arg_parser.add_argument("--algorithms",
+                            type=int,
+                            default=10,
+                            help="Number of algorithms in the wide stage")
+    arg_parser.add_argument("--output",
+                            type=str,
+                            help="Path to a file the report is written to")
+    arg_parser.add_argument("--json",
+                            type=str,
+                            help="Path to a file the results are written to")
+    return arg_parser
+
+def create_config(num_jobs, algorithms, mode, workers):
+    """Return a synthetic configuration with num_jobs jobs.
+
+    Parameters
+    ----------
+    num_jobs: int
+        total number of jobs (at least 3)
+    algorithms: int
+        number of algorithms in the wide stage
+    mode: str
+        submission mode
+    workers: int
+        max_workers and max_concurrency of concurrent modes
+    """
+
+    wide = max(num_jobs - 2, 1)
+    algorithms = min(algorithms, wide)
+    stage = {}
+    for i in range(algorithms):
+        stage[f"alg{i}"] = {
+            "num_jobs": wide // algorithms + (1 if i < wide % algorithms else 0),
+            "array_size": 0,
+            "arguments": []
+        }
+    config = {
+        "log_file": "",
+        "submission_file": "",
+        "max_workers": workers,
+        "max_concurrency": workers,
+        "stages": {
+            "input": { "input": { "num_jobs": 1, "array_size": 10,
+                                  "arguments": [] } },
+            "wide": stage,
+            "output": { "output": { "num_jobs": 1, "array_size": 0,
+                                    "arguments": [] } }
+        }
+    }
+    config.update(MODES[mode])
+    return config
+
+def run_once(config_file, args, memory=False):
+    """Submit and terminate a configuration against a fake client.
+
+    Parameters
+    ----------
+    config_file: Path
+        path to the synthetic configuration
+    args: Namespace
+        command line arguments
+    memory: bool, optional
+        whether to trace peak memory (slows the run down)
+    """
+
+    logger = logging.getLogger("benchmark_logger")
+    batch = FakeBatchClient(latency=args.latency, api_rate=args.api_rate,
+        throttle_rate=args.throttle)
+    limiter = RateLimiter(rate=args.rate, max_rate=args.rate,
+        increase=args.rate / 100, base_delay=0.01, max_delay=1.0)
+    provider = FakeProvider(batch, max_pool_connections=args.workers,
+        limiter=limiter)
+    if memory: tracemalloc.start()
+    start = time.perf_counter()
+    confluence = Confluence(config_file, client_provider=provider)
+    confluence.create_stages()
+    confluence.execute_stages(logger)
+    submitted = time.perf_counter()
+    peak = 0
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    confluence.terminate_jobs(logger)
+    terminated = time.perf_counter()
+
+    jobs = len(batch.jobs)
+    calls = sum(count for operation, count in batch.calls.items() \
+                if operation == "SubmitJob")
+    return {
+        "jobs": jobs,
+        "submit_seconds": submitted - start,
+        "jobs_per_second": jobs / (submitted - start),
+        "submit_calls_per_job": calls / jobs if jobs else 0.0,
+        "calls": dict(batch.calls),
+        "retries": provider.limiter.retries,
+        "throttles": provider.limiter.throttles,
+        "terminate_seconds": terminated - submitted,
+        "terminated": len(confluence.terminated),
+        "peak_memory_mb": peak / 2**20
+    }
+
+def run_benchmarks(args):
+    """Run every size and mode and return a list of results."""
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes:
+            for mode in args.modes:
+                config_file = Path(temp_dir) / f"bench_{size}_{mode}.yaml"
+                with open(config_file, "w") as yaml_file:
+                    yaml.safe_dump(create_config(size, args.algorithms, mode,
+                        args.workers), yaml_file, sort_keys=False)
+                result = run_once(config_file, args)
+                result["peak_memory_mb"] = run_once(config_file, args,
+                    memory=True)["peak_memory_mb"]
+                result.update({ "size": size, "mode": mode })
+                results.append(result)
+    return results
+
+def format_report(results, args):
+    """Return the results as a text table."""
+
+    lines = [
+        f"latency={args.latency}s api_rate={args.api_rate} "
+        f"throttle={args.throttle} rate={args.rate} "
+        f"workers={args.workers} algorithms={args.algorithms}",
+        f"{'size':>7} {'mode':>8} {'jobs':>7} {'submit s':>9} {'jobs/s':>9} "
+        f"{'calls/job':>9} {'retries':>7} {'peak MB':>8} {'term s':>7}"
+    ]
+    for result in results:
+        lines.append(f"{result['size']:>7} {result['mode']:>8} "
+            f"{result['jobs']:>7} {result['submit_seconds']:>9.3f} "
+            f"{result['jobs_per_second']:>9.1f} "
+            f"{result['submit_calls_per_job']:>9.2f} "
+            f"{result['retries']:>7} {result['peak_memory_mb']:>8.2f} "
+            f"{result['terminate_seconds']:>7.3f}")
+    return "\n".join(lines) + "\n"
+
+def main():
+    """Run the benchmark suite."""
+
+    args = create_args().parse_args()
+    logging.getLogger("benchmark_logger").addHandler(logging.NullHandler())
+    results = run_benchmarks(args)
+    report = format_report(results, args)
+    sys.stdout.write(report)
+    if args.output: Path(args.output).write_text(report)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 # Third-party imports
-import botocore
+import botocore.exceptions
 
 # Local imports
+from confluence.ClientProvider import ClientProvider
 from confluence.Job import Job
+from confluence.JobTable import JobTable
 
 class Algorithm:
     """
@@ -11,76 +13,342 @@ class Algorithm:
     An Algorithm usually needs to be submitted to AWS Batch as a set of jobs. An
     Algorithm creates Job objects to handle the submission operation.
 
+    AWS Batch arrays hold at most 10,000 children so each job whose array
+    size is larger is split into evenly sized shards. Every shard is its own
+    array job and learns the global index of its first child from the
+    CONFLUENCE_ARRAY_OFFSET environment variable.
+
     Attributes
     ----------
     array_size: int
-        size of the AWS Batch job array for each job
+        logical size of the AWS Batch job array for each job
     arguments: list
         list of arguments that are submitted to a job
+    client_provider: ClientProvider
+        provider of the shared AWS clients passed to each Job
+    depends_on: list
+        list of stage or algorithm names the algorithm depends on (None
+        depends on the previous stage)
+    fan_in: FanIn
+        inserts join jobs when dependencies exceed the AWS Batch limit
+    job_def: str
+        name (optionally 'name:revision') of the job definition
     job_ids: list
         list of job identifiers for jobs submitted to AWS Batch
-    jobs: list
-        list of Job objects that handle submission to AWS Batch
+    jobs: JobTable
+        sequence of Job objects that handle submission to AWS Batch, created
+        when they are accessed
+    ledger: Ledger
+        ledger that records each job as soon as it is submitted
+    memory: int
+        memory in MiB of each container (None keeps the job definition's)
+    n_to_n: bool
+        whether jobs depend index-wise on upstream arrays of the same size
     name: str
         name of the algorithm
     num_jobs: int
-        number of jobs to be created
+        number of jobs to be created (each may be split into shards)
+    queue: str
+        name of the job queue (None uses the stage name)
+    retry_strategy: dict
+        AWS Batch retry strategy of every job (attempts and evaluateOnExit
+        rules)
+    runtime: float
+        expected runtime in seconds of each job (None is unknown)
+    scheduling_priority: int
+        fair-share scheduling priority of every job (None is not sent)
+    share_identifier: str
+        fair-share identifier of every job (None is not sent)
+    reused_ids: list
+        list of job identifiers from a previous run that are reused
+    shards: dict
+        dictionary of job identifier keys and (array offset, array size)
+        tuple values for array jobs
+    stage: str
+        name of the stage the algorithm is a part of
+    timeout: int
+        seconds after which an attempt is terminated (None keeps the job
+        definition's)
+    vcpus: float
+        number of vCPUs of each container (None keeps the job definition's)
     
     Methods
     -------
-    create_jobs(stage, dependencies)
+    create_jobs(stage, reused)
         creates jobs that can be submitted to AWS Batch
+    create_retry_strategy(retry)
+        returns an AWS Batch retry strategy from a retry configuration
+    define_scheduling(priority, share_identifier)
+        defines the fair-share scheduling of every job
+    get_shards()
+        returns the array offset and size of each shard of a job
+    submit_job(job, dependencies)
+        submits one job to AWS Batch
     submit_jobs()
         submits jobs to AWS Batch
     """
 
-    def __init__(self, name, num_jobs, array_size, arguments):
+    ARRAY_LIMIT = 10000
+    OFFSET_VARIABLE = "CONFLUENCE_ARRAY_OFFSET"
+    RETRY_ACTIONS = ("retry", "exit")
+    RETRY_CONDITIONS = { "on_status_reason": "onStatusReason",
+                         "on_reason": "onReason",
+                         "on_exit_code": "onExitCode" }
+    RETRY_LIMIT = 10
+    RETRY_RULE_LIMIT = 5
+    TIMEOUT_MINIMUM = 60
+
+    def __init__(self, name, num_jobs, array_size, arguments,
+        client_provider=None, n_to_n=False, depends_on=None, ledger=None,
+        fan_in=None, retry=None, job_def=None, queue=None, vcpus=None,
+        memory=None, timeout=None, runtime=None, share_identifier=None):
         """
         Parameters
         ----------
         name: str
             name of algorithm
         num_jobs: int
-            the number of jobs to be created
+            the number of jobs to be created (None creates one)
         array_size: int
-            the size of the AWS Batch job array for each job
+            the logical size of the AWS Batch job array for each job
         arguments: list
             list of arguments that are submitted for each job
+        client_provider: ClientProvider, optional
+            provider of the shared AWS clients (default creates one)
+        n_to_n: bool, optional
+            whether each array child only depends on the upstream array child
+            with the same index (default is False)
+        depends_on: list, optional
+            list of stage or algorithm names the algorithm depends on 
+            (default is None which depends on the previous stage)
+        ledger: Ledger, optional
+            ledger that records submitted jobs (default is None)
+        fan_in: FanIn, optional
+            inserts join jobs for wide dependencies (default is None)
+        retry: int or dict, optional
+            number of attempts or dictionary with attempts and
+            evaluate_on_exit keys (default is None which makes one attempt)
+        job_def: str, optional
+            job definition name or 'name:revision' (default is the algorithm
+            name)
+        queue: str, optional
+            job queue (default is None which uses the stage name)
+        vcpus: float, optional
+            vCPUs of each container (default is the job definition's)
+        memory: int, optional
+            memory in MiB of each container (default is the job definition's)
+        timeout: int, optional
+            seconds after which an attempt is terminated (default is the job
+            definition's)
+        runtime: float or dict, optional
+            expected runtime in seconds, or a dictionary with a mean key
+            (default is None which is unknown)
+        share_identifier: str, optional
+            fair-share identifier used when scheduling is defined (default
+            is None)
+
+        Raises
+        ------
+        ValueError
+            if the retry configuration is invalid, vcpus or memory are not
+            positive or timeout is shorter than 60 seconds
         """
 
+        if vcpus is not None and vcpus <= 0:
+            raise ValueError(f"vcpus of {name} must be positive, got {vcpus}.")
+        if memory is not None and memory <= 0:
+            raise ValueError(f"memory of {name} must be positive, got "
+                f"{memory}.")
+        if timeout is not None and timeout < self.TIMEOUT_MINIMUM:
+            raise ValueError(f"timeout of {name} must be at least "
+                f"{self.TIMEOUT_MINIMUM} seconds, got {timeout}.")
+
         self.array_size = array_size
         self.arguments = arguments
+        self.client_provider = client_provider if client_provider \
+            else ClientProvider()
+        self.depends_on = depends_on
+        self.fan_in = fan_in
+        self.job_def = job_def if job_def else name
         self.job_ids = []
         self.jobs = []
+        self.ledger = ledger
+        self.memory = memory
+        self.n_to_n = n_to_n
         self.name = name
-        self.num_jobs = num_jobs
+        self.num_jobs = num_jobs if num_jobs is not None else 1
+        self.queue = queue
+        self.retry_strategy = self.create_retry_strategy(retry)
+        self.reused_ids = []
+        self.runtime = runtime.get("mean") if isinstance(runtime, dict) \
+            else runtime
+        self.scheduling_priority = None
+        self.share_identifier = share_identifier
+        self.shards = {}
+        self.stage = ""
+        self.timeout = timeout
+        self.vcpus = vcpus
 
-    def create_jobs(self, stage):
+    def create_jobs(self, stage, reused=None):
         """Create Job objects that are responsible for running the algorithm
         in AWS Batch.
 
+        Jobs whose array size is larger than ARRAY_LIMIT are split into
+        shards named with a shard number suffix. Jobs whose name is in reused
+        are not created; the job identifier from the previous run is used
+        instead. Jobs are stored in a JobTable with one spec per shard and
+        only become Job objects when they are accessed.
+
         Parameters
         ----------
             stage: str
                 name of the stage that the algorithm is a part of
+            reused: dict, optional
+                dictionary of job name keys and job identifier values for
+                jobs of a previous run that are reused (default is None)
+        """
+
+        self.stage = stage
+        reused = reused if reused else {}
+        shards = self.get_shards()
+        template = Job(name=self.name, job_def=self.job_def, 
+            queue=self.queue if self.queue else stage,
+            client_provider=self.client_provider)
+        if self.arguments: template.define_arguments(self.arguments)
+        template.define_resources(self.vcpus, self.memory)
+        if self.timeout: template.define_timeout(self.timeout)
+        self.jobs = JobTable(f"{stage}_{self.name}", template.job_def, 
+            template.queue, shards, template.overrides, self.client_provider,
+            self.num_jobs, reused, self.OFFSET_VARIABLE, self.retry_strategy,
+            template.timeout)
+        self.jobs.scheduling_priority = self.scheduling_priority
+        self.jobs.share_identifier = self.share_identifier
+        if not reused: return
+        for row in range(self.num_jobs * len(shards)):
+            name = self.jobs.job_name(row)
+            if name in reused:
+                offset, size = shards[row % len(shards)]
+                self.job_ids.append(reused[name])
+                self.reused_ids.append(reused[name])
+                if size > 0: self.shards[reused[name]] = (offset, size)
+
+    @classmethod
+    def create_retry_strategy(cls, retry):
+        """Return an AWS Batch retry strategy from a retry configuration.
+
+        retry is either a number of attempts or a dictionary with an
+        attempts key and an evaluate_on_exit list of rules. Each rule has an
+        action ('retry' or 'exit') and glob patterns for on_status_reason,
+        on_reason and on_exit_code. AWS Batch applies the first matching
+        rule, so host terminations can be retried while application errors
+        exit right away:
+
+            retry:
+              attempts: 3
+              evaluate_on_exit:
+                - { on_status_reason: "Host EC2*", action: retry }
+                - { on_reason: "*", action: exit }
+
+        Parameters
+        ----------
+        retry: int or dict
+            number of attempts or retry dictionary (None makes one attempt)
+
+        Raises
+        ------
+        ValueError
+            if attempts is not between 1 and 10, there are more than five
+            rules or a rule has an unknown action or key
+        """
+
+        if retry is None: return { "attempts": 1 }
+        if not isinstance(retry, dict): retry = { "attempts": retry }
+        attempts = retry.get("attempts", 1)
+        if not isinstance(attempts, int) or \
+            not 1 <= attempts <= cls.RETRY_LIMIT:
+            raise ValueError(f"Retry attempts must be between 1 and "
+                f"{cls.RETRY_LIMIT}, got {attempts}.")
+        rules = retry.get("evaluate_on_exit", [])
+        if len(rules) > cls.RETRY_RULE_LIMIT:
+            raise ValueError(f"At most {cls.RETRY_RULE_LIMIT} evaluate_on_exit "
+                f"rules are allowed, got {len(rules)}.")
+        strategy = { "attempts": attempts }
+        evaluate_on_exit = []
+        for rule in rules:
+            action = str(rule.get("action", "")).lower()
+            if action not in cls.RETRY_ACTIONS:
+                raise ValueError(f"Unknown evaluate_on_exit action "
+                    f"'{rule.get('action')}', expected one of "
+                    f"{', '.join(cls.RETRY_ACTIONS)}.")
+            unknown = set(rule) - set(cls.RETRY_CONDITIONS) - { "action" }
+            if unknown:
+                raise ValueError(f"Unknown evaluate_on_exit keys: "
+                    f"{', '.join(sorted(unknown))}.")
+            condition = { cls.RETRY_CONDITIONS[key]: str(value) \
+                          for key, value in rule.items() if key != "action" }
+            evaluate_on_exit.append({ **condition, "action": action.upper() })
+        if evaluate_on_exit: strategy["evaluateOnExit"] = evaluate_on_exit
+        return strategy
+
+    def define_scheduling(self, priority, share_identifier=None):
+        """Define the fair-share scheduling priority and share identifier
+        of every job that has not been submitted.
+
+        Parameters
+        ----------
+        priority: int
+            scheduling priority from 0 to 9999, higher runs first
+        share_identifier: str, optional
+            fair-share identifier (default keeps the algorithm's)
+        """
+
+        self.scheduling_priority = priority
+        if share_identifier and not self.share_identifier:
+            self.share_identifier = share_identifier
+        if isinstance(self.jobs, JobTable):
+            self.jobs.scheduling_priority = self.scheduling_priority
+            self.jobs.share_identifier = self.share_identifier
+
+    def get_shards(self):
+        """Return a list of (array offset, array size) tuples, one for each
+        shard of a job.
+
+        The logical array size is split into the fewest shards of at most
+        ARRAY_LIMIT children with sizes that differ by at most one, so no
+        shard is left with a single child.
         """
 
-        for i in range(self.num_jobs):
-            job = Job(name=f"{stage}_{self.name}_{i}", job_def=self.name,
-                queue=stage)
-            if (len(self.arguments) > 0): job.define_arguments(self.arguments)
-            if (self.array_size > 0): job.define_array(self.array_size)
-            job.define_tags(tag_dict={ "job": f"{stage}_{self.name}_{i}" },
-                will_propagate=True)
-            self.jobs.append(job)
+        if self.array_size <= self.ARRAY_LIMIT:
+            return [(0, self.array_size)]
+        count = -(-self.array_size // self.ARRAY_LIMIT)
+        size, extra = divmod(self.array_size, count)
+        shards = []
+        offset = 0
+        for k in range(count):
+            shards.append((offset, size + 1 if k < extra else size))
+            offset += shards[-1][1]
+        return shards
 
-    def submit_jobs(self, dependencies):
+    def submit_jobs(self, dependencies, array_dependencies=None,
+        array_offsets=None):
         """Submits jobs to AWS Batch job queue.
 
+        If the Algorithm is an n_to_n array job, dependencies that are array
+        jobs (or shards) of the same size and offset are linked index-wise
+        (N_TO_N) and all others are linked to the whole upstream job.
+        Dependencies beyond the AWS Batch limit are replaced by join jobs
+        when a FanIn is set.
+
         Parameters
         ----------
         dependencies: list
             list of job identifiers that the Algorithm's jobs depend on
+        array_dependencies: dict, optional
+            dictionary of job identifier keys and array size values for
+            dependencies that are array jobs
+        array_offsets: dict, optional
+            dictionary of job identifier keys and array offset values for
+            dependencies that are array shards (default offsets are 0)
         
         Raises
         ------
@@ -90,8 +358,77 @@ class Algorithm:
 
         for job in self.jobs:
             try:
-                job.define_dependencies(dependencies)
-                job_id = job.submit()
+                job_id = self.submit_job(job, dependencies, array_dependencies,
+                    array_offsets)
                 self.job_ids.append(job_id)
             except botocore.exceptions.ClientError as error:
-                raise error
\ No newline at end of file
+                raise error
+
+    def submit_job(self, job, dependencies, array_dependencies=None,
+        array_offsets=None):
+        """Define the dependencies of one of the Algorithm's jobs, submit it
+        and record it in the ledger.
+
+        The job identifier is not added to job_ids so jobs can be submitted
+        concurrently and added in order afterwards.
+
+        Parameters
+        ----------
+        job: Job
+            Job object of the Algorithm
+        dependencies: list
+            list of job identifiers that the Algorithm's jobs depend on
+        array_dependencies: dict, optional
+            dictionary of job identifier keys and array size values
+        array_offsets: dict, optional
+            dictionary of job identifier keys and array offset values
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response upon job submission
+
+        Returns
+        -------
+        str
+            unique job identifier for the submitted job
+        """
+
+        size = job.array_props.get("size", 0)
+        n_to_n_ids = self.get_n_to_n_ids(dependencies, array_dependencies,
+            array_offsets, (job.array_offset, size))
+        if self.fan_in:
+            dependencies, n_to_n_ids = self.fan_in.compact(self.stage,
+                dependencies, n_to_n_ids, size)
+        job.define_dependencies(dependencies, n_to_n_ids)
+        job_id = job.submit()
+        if isinstance(self.jobs, JobTable): self.jobs.record(job)
+        if size > 0: self.shards[job_id] = (job.array_offset, size)
+        if self.ledger: self.ledger.record(self.stage, self.name, job)
+        return job_id
+
+    def get_n_to_n_ids(self, dependencies, array_dependencies,
+        array_offsets=None, shard=None):
+        """Return dependencies that can be linked index-wise to one of this 
+        Algorithm's array jobs.
+
+        Parameters
+        ----------
+        dependencies: list
+            list of job identifiers that the Algorithm's jobs depend on
+        array_dependencies: dict
+            dictionary of job identifier keys and array size values
+        array_offsets: dict, optional
+            dictionary of job identifier keys and array offset values
+        shard: tuple, optional
+            (array offset, array size) of the job (default is an unsharded
+            job of array_size)
+        """
+
+        offset, size = shard if shard else (0, self.array_size)
+        if not self.n_to_n or size == 0 or not array_dependencies:
+            return []
+        array_offsets = array_offsets if array_offsets else {}
+        return [ job_id for job_id in dependencies \
+                    if array_dependencies.get(job_id) == size \
+                        and array_offsets.get(job_id, 0) == offset ]
@@ -0,0 +1,211 @@
+# Standard imports
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from confluence.batch_api import chunk, DESCRIBE_LIMIT
+
+class AsyncEngine:
+    """
+    A class that submits, describes and cancels the jobs of a Graph with
+    asyncio.
+
+    Every Algorithm is a task that awaits only the tasks of its upstream
+    Algorithms and then submits all of its jobs concurrently, so a workflow
+    is submitted in roughly one round trip per dependency level instead of
+    one per job. boto3 calls are blocking and run in a thread pool while a
+    semaphore caps the number of calls in flight across the whole workflow.
+
+    On the first error every task that has not started a call is cancelled,
+    calls already in flight are allowed to finish and the identifiers of all
+    accepted jobs are kept on their Algorithm so they can be terminated.
+    Jobs are then described and cancelled or terminated with the same
+    concurrency limit, every call still going through the rate limiter of
+    the shared client.
+
+    Attributes
+    ----------
+    graph: Graph
+        graph of Algorithm dependencies to submit
+    max_concurrency: int
+        maximum number of AWS Batch calls in flight
+    on_started: function
+        called with each Algorithm before its jobs are submitted
+    on_submitted: function
+        called with each Algorithm after its jobs have been submitted
+
+    Methods
+    -------
+    call_all(function, items)
+        calls a blocking function with every item and blocks until done
+    describe_jobs(client_provider, job_ids)
+        describes jobs in concurrent batches of DESCRIBE_LIMIT
+    execute()
+        submits every Algorithm and blocks until done
+    run()
+        coroutine that submits every Algorithm
+    run_calls(function, items)
+        coroutine that calls a blocking function with every item
+    """
+
+    def __init__(self, graph, max_concurrency=10, on_submitted=None,
+        on_started=None):
+        """
+        Parameters
+        ----------
+        graph: Graph
+            graph of Algorithm dependencies to submit
+        max_concurrency: int, optional
+            maximum number of AWS Batch calls in flight (default is 10)
+        on_submitted: function, optional
+            called with each Algorithm after its jobs have been submitted
+        on_started: function, optional
+            called with each Algorithm before its jobs are submitted
+        """
+
+        self.graph = graph
+        self.max_concurrency = max(max_concurrency, 1)
+        self.on_started = on_started
+        self.on_submitted = on_submitted
+
+    def execute(self):
+        """Submit every Algorithm of the graph and block until done.
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response upon job submission
+        """
+
+        asyncio.run(self.run())
+
+    async def run(self):
+        """Submit every Algorithm of the graph.
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response upon job submission
+        """
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+            thread_name_prefix="async")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = {}
+
+        async def submit_job(alg, job, dependencies):
+            async with semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, alg.submit_job,
+                    job, *dependencies)
+
+        async def submit_algorithm(alg):
+            await asyncio.gather(*[ tasks[upstream] \
+                for upstream in self.graph.upstream[alg] ])
+            if self.on_started: self.on_started(alg)
+            dependencies = self.graph.define_dependencies(alg)
+            job_ids = await asyncio.gather(*[ submit_job(alg, job,
+                dependencies) for job in alg.jobs ])
+            alg.job_ids.extend(job_ids)
+            self.graph.stages[alg].submitted.append(alg)
+            if self.on_submitted: self.on_submitted(alg)
+
+        for alg in self.graph.order:
+            tasks[alg] = asyncio.create_task(submit_algorithm(alg))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values(): task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            # Calls in flight cannot be cancelled; keep the jobs they submit
+            executor.shutdown(wait=True, cancel_futures=True)
+            for alg, task in tasks.items():
+                if task.cancelled() or task.exception():
+                    alg.job_ids.extend([ job.job_id for job in alg.jobs \
+                                         if job.job_id ])
+            raise
+        executor.shutdown(wait=True)
+
+    def call_all(self, function, items):
+        """Call a blocking function with every item concurrently and block
+        until done.
+
+        Parameters
+        ----------
+        function: function
+            blocking function called with one item (e.g. an AWS Batch call)
+        items: list
+            list of items
+
+        Returns
+        -------
+        list
+            list of results in item order; a call that raised has its
+            exception in place of a result
+        """
+
+        return asyncio.run(self.run_calls(function, items))
+
+    async def run_calls(self, function, items):
+        """Call a blocking function with every item with at most
+        max_concurrency calls in flight.
+
+        Parameters
+        ----------
+        function: function
+            blocking function called with one item
+        items: list
+            list of items
+
+        Returns
+        -------
+        list
+            list of results or exceptions in item order
+        """
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+            thread_name_prefix="async")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def call(item):
+            async with semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, function, item)
+
+        try:
+            return await asyncio.gather(*[ call(item) for item in items ],
+                return_exceptions=True)
+        finally:
+            executor.shutdown(wait=True)
+
+    def describe_jobs(self, client_provider, job_ids):
+        """Describe jobs in concurrent batches of DESCRIBE_LIMIT identifiers.
+
+        Parameters
+        ----------
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client and rate limiter
+        job_ids: list
+            list of job identifiers
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+
+        Returns
+        -------
+        dict
+            dictionary of job identifier keys and job description values;
+            jobs unknown to AWS Batch are not included
+        """
+
+        responses = self.call_all(lambda job_chunk: client_provider.call(
+            "batch", "describe_jobs", jobs=job_chunk),
+            list(chunk(list(dict.fromkeys(job_ids)), DESCRIBE_LIMIT)))
+        descriptions = {}
+        for response in responses:
+            if isinstance(response, BaseException): raise response
+            for job in response["jobs"]:
+                descriptions[job["jobId"]] = job
+        return descriptions
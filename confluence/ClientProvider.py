@@ -0,0 +1,147 @@
+# Standard imports
+import threading
+
+# Local imports
+from confluence.lazy import lazy_import
+from confluence.Metrics import Metrics
+from confluence.RateLimiter import RateLimiter
+
+# Third-party imports (deferred until the first client is created)
+boto3 = lazy_import("boto3")
+botocore_config = lazy_import("botocore.config")
+
+class ClientProvider:
+    """
+    A class that creates and shares AWS service clients across Confluence.
+
+    A single boto3 session is created on first use and each service client is
+    created once and then reused by every Stage, Algorithm and Job. boto3
+    clients are thread-safe so the same client can be used by concurrent
+    submissions.
+
+    API calls made through call() share one RateLimiter that adapts to
+    throttling and retries retryable errors, so botocore's own retries are
+    disabled by default. Every client is instrumented by a shared Metrics
+    object.
+
+    Attributes
+    ----------
+    clients: dict
+        dictionary of service name keys and boto3 client values
+    limiter: RateLimiter
+        rate limiter shared by every API call made through call()
+    lock: Lock
+        lock that guards session and client creation
+    max_pool_connections: int
+        maximum number of connections kept in each client's connection pool
+    metrics: Metrics
+        metrics that time and count every call of every client
+    region: str
+        name of the AWS region clients are created in (None uses the default)
+    retries: dict
+        botocore retry configuration used by each client
+    session: Session
+        boto3 session that clients are created from
+
+    Methods
+    -------
+    call(service, operation, **kwargs)
+        calls an API operation under the shared rate limiter
+    client(service)
+        returns the shared client for an AWS service
+    from_config(aws_dict)
+        creates a ClientProvider from the 'aws' section of the config YAML
+    """
+
+    DEFAULT_POOL = 10
+    DEFAULT_RETRIES = { "mode": "standard", "max_attempts": 1 }
+
+    def __init__(self, region=None, max_pool_connections=DEFAULT_POOL,
+        retries=None, limiter=None, metrics=None):
+        """
+        Parameters
+        ----------
+        region: str, optional
+            name of the AWS region (default is the profile's region)
+        max_pool_connections: int, optional
+            maximum number of connections in each client's connection pool
+        retries: dict, optional
+            botocore retry configuration (default is a single attempt as
+            retries are made by the limiter)
+        limiter: RateLimiter, optional
+            rate limiter for API calls (default creates one)
+        metrics: Metrics, optional
+            metrics registered on each client (default creates one)
+        """
+
+        self.clients = {}
+        self.limiter = limiter if limiter else RateLimiter()
+        self.lock = threading.Lock()
+        self.max_pool_connections = max_pool_connections
+        self.metrics = metrics if metrics else Metrics()
+        self.region = region
+        self.retries = retries if retries else dict(self.DEFAULT_RETRIES)
+        self.session = None
+
+    @classmethod
+    def from_config(cls, aws_dict):
+        """Create a ClientProvider from configuration data.
+
+        Parameters
+        ----------
+        aws_dict: dict
+            dictionary that may contain region, max_pool_connections,
+            retries and rate_limit keys
+        """
+
+        aws_dict = aws_dict if aws_dict else {}
+        return cls(region=aws_dict.get("region"),
+            max_pool_connections=aws_dict.get("max_pool_connections",
+                cls.DEFAULT_POOL),
+            retries=aws_dict.get("retries"),
+            limiter=RateLimiter.from_config(aws_dict.get("rate_limit")))
+
+    def client(self, service):
+        """Return the shared client for an AWS service, creating it on first
+        use.
+
+        Parameters
+        ----------
+        service: str
+            name of the AWS service (e.g. 'batch')
+        """
+
+        with self.lock:
+            if service not in self.clients:
+                if self.session is None:
+                    self.session = boto3.session.Session(
+                        region_name=self.region)
+                config = botocore_config.Config(
+                    max_pool_connections=self.max_pool_connections,
+                    retries=self.retries)
+                self.clients[service] = self.session.client(service,
+                    config=config)
+                self.metrics.register(self.clients[service])
+            return self.clients[service]
+
+    def call(self, service, operation, **kwargs):
+        """Call an API operation of a service client under the shared rate
+        limiter.
+
+        Parameters
+        ----------
+        service: str
+            name of the AWS service (e.g. 'batch')
+        operation: str
+            name of the client method (e.g. 'submit_job')
+        kwargs: dict
+            keyword arguments passed to the operation
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if the error is not retryable or retries are exhausted
+        """
+
+        return self.limiter.call(getattr(self.client(service), operation),
+            **kwargs)
@@ -0,0 +1,346 @@
+# Standard imports
+import hashlib
+import json
+from pathlib import Path
+
+# Third-party imports
+import yaml
+
+# Local imports
+from confluence.Algorithm import Algorithm
+
+class Config:
+    """
+    A class that holds the configuration data of a Confluence run, parsed and
+    validated once.
+
+    The configuration is checked against a schema before any AWS client is
+    created so a misspelled key or a value of the wrong type is reported up
+    front, all at once, instead of failing mid-submission after earlier
+    stages are already running.
+
+    A Config can also be written to and loaded from a compact JSON file (a
+    compiled plan) that holds the validated data and, once Confluence has
+    created its stages, the compiled dependency graph (upstream algorithms,
+    topological order and critical-path weights). Loading a compiled plan
+    skips YAML parsing, validation, dependency resolution, cycle detection
+    and run history lookups.
+
+    Attributes
+    ----------
+    data: dict
+        validated configuration data
+    digest: str
+        SHA-256 digest of the YAML file the data was parsed from (None if
+        not parsed from a file)
+    graph: dict
+        compiled dependency graph with upstream, order and weights keys
+        (None until compiled)
+    source: Path
+        path to the YAML file the data was parsed from (None if not parsed
+        from a file)
+
+    Methods
+    -------
+    from_file(config_file)
+        creates a Config from a YAML file
+    is_stale()
+        returns whether the YAML source changed since it was parsed
+    load(plan_file)
+        creates a Config from a compiled plan
+    validate()
+        checks the data against the configuration schema
+    write(plan_file)
+        writes the data and compiled graph as a compiled plan
+    """
+
+    VERSION = 1
+    ENGINES = ("threads", "asyncio")
+    S3_CREDS_MODES = ("compat", "structured", "both")
+    KEYS = {
+        "log_file": str,
+        "submission_file": str,
+        "ledger_file": str,
+        "history_file": str,
+        "engine": str,
+        "max_workers": int,
+        "max_concurrency": int,
+        "aws": dict,
+        "fan_in": dict,
+        "priority": dict,
+        "plan": dict,
+        "s3_creds": dict,
+        "stages": dict
+    }
+    REQUIRED = ("log_file", "submission_file", "stages")
+    SECTIONS = {
+        "aws": { "region": str, "max_pool_connections": int,
+                 "retries": dict, "rate_limit": dict },
+        "fan_in": { "limit": int, "job_definition": str, "queue": str,
+                    "runtime": (int, float) },
+        "priority": { "max_priority": int, "default_runtime": (int, float),
+                      "share_identifier": str },
+        "plan": { "max_vcpus": (int, float), "seed": int },
+        "s3_creds": { "min_lifetime": (int, float), "mode": str }
+    }
+    ALGORITHM_KEYS = {
+        "num_jobs": int,
+        "array_size": int,
+        "arguments": list,
+        "n_to_n": bool,
+        "depends_on": list,
+        "retry": (int, dict),
+        "job_definition": str,
+        "queue": str,
+        "vcpus": (int, float),
+        "memory": int,
+        "timeout": int,
+        "runtime": (int, float, dict),
+        "share_identifier": str
+    }
+    ALGORITHM_REQUIRED = ("array_size", "arguments")
+
+    def __init__(self, data, source=None, digest=None, graph=None,
+        validate=True):
+        """
+        Parameters
+        ----------
+        data: dict
+            configuration data
+        source: Path, optional
+            path to the YAML file the data was parsed from (default is None)
+        digest: str, optional
+            SHA-256 digest of the YAML file (default is None)
+        graph: dict, optional
+            compiled dependency graph (default is None)
+        validate: bool, optional
+            whether to validate the data (default is True)
+
+        Raises
+        ------
+        ValueError
+            if the data does not match the configuration schema
+        """
+
+        self.data = data
+        self.digest = digest
+        self.graph = graph
+        self.source = Path(source) if source else None
+        if validate: self.validate()
+
+    @classmethod
+    def from_file(cls, config_file):
+        """Create a Config from a YAML configuration file.
+
+        Parameters
+        ----------
+        config_file: Path
+            path to YAML file that contains configuration data
+
+        Raises
+        ------
+        ValueError
+            if the data does not match the configuration schema
+        """
+
+        text = Path(config_file).read_bytes()
+        return cls(yaml.safe_load(text), source=config_file,
+            digest=hashlib.sha256(text).hexdigest())
+
+    @classmethod
+    def load(cls, plan_file):
+        """Create a Config from a compiled plan without validating it again.
+
+        Parameters
+        ----------
+        plan_file: Path
+            path to a compiled plan written by write
+
+        Raises
+        ------
+        ValueError
+            if the compiled plan was written by another version
+        """
+
+        with open(plan_file) as json_file:
+            plan = json.load(json_file)
+        if plan.get("version") != cls.VERSION:
+            raise ValueError(f"Compiled plan {plan_file} has version "
+                f"{plan.get('version')}, expected {cls.VERSION}; compile it "
+                f"again.")
+        return cls(plan["config"], source=plan.get("source"),
+            digest=plan.get("digest"), graph=plan.get("graph"),
+            validate=False)
+
+    def write(self, plan_file):
+        """Write the data and compiled graph as a compact JSON compiled plan.
+
+        Parameters
+        ----------
+        plan_file: Path
+            path to the compiled plan
+        """
+
+        plan = {
+            "version": self.VERSION,
+            "source": str(self.source) if self.source else None,
+            "digest": self.digest,
+            "config": self.data,
+            "graph": self.graph
+        }
+        with open(plan_file, "w") as json_file:
+            json.dump(plan, json_file, separators=(",", ":"))
+
+    def is_stale(self):
+        """Return whether the YAML source exists and changed since the data
+        was parsed from it."""
+
+        if not self.source or not self.digest or not self.source.exists():
+            return False
+        return hashlib.sha256(self.source.read_bytes()).hexdigest() \
+            != self.digest
+
+    def validate(self):
+        """Check the data against the configuration schema.
+
+        Unknown keys, missing required keys and values of the wrong type or
+        range are collected for the whole configuration and reported
+        together.
+
+        Raises
+        ------
+        ValueError
+            if the data does not match the configuration schema
+        """
+
+        if not isinstance(self.data, dict):
+            raise ValueError("Invalid configuration: expected a mapping of "
+                "configuration keys.")
+        errors = self.check_keys("configuration", self.data, self.KEYS,
+            self.REQUIRED)
+        for section, keys in self.SECTIONS.items():
+            if isinstance(self.data.get(section), dict):
+                errors.extend(self.check_keys(section, self.data[section],
+                    keys))
+
+        for key in ("max_workers", "max_concurrency"):
+            if self.is_type(self.data.get(key), int) and self.data[key] < 1:
+                errors.append(f"{key} must be at least 1, got "
+                    f"{self.data[key]}.")
+        if self.data.get("engine") is not None and \
+            self.data["engine"] not in self.ENGINES:
+            errors.append(f"engine must be one of {', '.join(self.ENGINES)}, "
+                f"got '{self.data['engine']}'.")
+        s3_creds = self.data.get("s3_creds")
+        if isinstance(s3_creds, dict) and s3_creds.get("mode") is not None \
+            and s3_creds["mode"] not in self.S3_CREDS_MODES:
+            errors.append(f"s3_creds.mode must be one of "
+                f"{', '.join(self.S3_CREDS_MODES)}, got '{s3_creds['mode']}'.")
+        fan_in = self.data.get("fan_in")
+        if isinstance(fan_in, dict) and self.is_type(fan_in.get("limit"), int) \
+            and fan_in["limit"] < 2:
+            errors.append(f"fan_in.limit must be at least 2, got "
+                f"{fan_in['limit']}.")
+
+        stages = self.data.get("stages")
+        if isinstance(stages, dict):
+            if not stages: errors.append("stages must contain a stage.")
+            for stage_name, stage_dict in stages.items():
+                if not isinstance(stage_dict, dict) or not stage_dict:
+                    errors.append(f"stage {stage_name} must be a mapping of "
+                        f"algorithms.")
+                    continue
+                for alg_name, alg_dict in stage_dict.items():
+                    errors.extend(self.check_algorithm(
+                        f"{stage_name}.{alg_name}", alg_dict))
+
+        if errors:
+            raise ValueError("Invalid configuration:\n" + "\n".join(errors))
+
+    def check_algorithm(self, name, alg_dict):
+        """Return a list of error messages for the configuration of an
+        algorithm.
+
+        Parameters
+        ----------
+        name: str
+            'stage.algorithm' name of the algorithm
+        alg_dict: dict
+            configuration data of the algorithm
+        """
+
+        if not isinstance(alg_dict, dict):
+            return [f"{name} must be a mapping of algorithm settings."]
+        errors = self.check_keys(name, alg_dict, self.ALGORITHM_KEYS,
+            self.ALGORITHM_REQUIRED)
+        if self.is_type(alg_dict.get("num_jobs"), int) \
+            and alg_dict["num_jobs"] < 1:
+            errors.append(f"{name}.num_jobs must be at least 1, got "
+                f"{alg_dict['num_jobs']}.")
+        if self.is_type(alg_dict.get("array_size"), int) \
+            and alg_dict["array_size"] < 0:
+            errors.append(f"{name}.array_size must not be negative, got "
+                f"{alg_dict['array_size']}.")
+        for key in ("vcpus", "memory"):
+            if self.is_type(alg_dict.get(key), self.ALGORITHM_KEYS[key]) \
+                and alg_dict[key] <= 0:
+                errors.append(f"{name}.{key} must be positive, got "
+                    f"{alg_dict[key]}.")
+        if self.is_type(alg_dict.get("timeout"), int) \
+            and alg_dict["timeout"] < Algorithm.TIMEOUT_MINIMUM:
+            errors.append(f"{name}.timeout must be at least "
+                f"{Algorithm.TIMEOUT_MINIMUM} seconds, got "
+                f"{alg_dict['timeout']}.")
+        if isinstance(alg_dict.get("depends_on"), list) and not all(
+            isinstance(dep, str) for dep in alg_dict["depends_on"]):
+            errors.append(f"{name}.depends_on must be a list of names.")
+        if isinstance(alg_dict.get("runtime"), dict) and not self.is_type(
+            alg_dict["runtime"].get("mean"), (int, float)):
+            errors.append(f"{name}.runtime must have a numeric mean.")
+        if self.is_type(alg_dict.get("retry"), (int, dict)):
+            try:
+                Algorithm.create_retry_strategy(alg_dict["retry"])
+            except ValueError as error:
+                errors.append(f"{name}.retry: {error}")
+        return errors
+
+    def check_keys(self, name, section, keys, required=()):
+        """Return a list of error messages for unknown keys, missing keys and
+        values of the wrong type in a section of the configuration.
+
+        Parameters
+        ----------
+        name: str
+            name of the section used in error messages
+        section: dict
+            configuration data of the section
+        keys: dict
+            dictionary of known key names and their type (or tuple of types)
+        required: tuple, optional
+            names of keys that must be present (default is none)
+        """
+
+        errors = []
+        for key, value in section.items():
+            if key not in keys:
+                errors.append(f"{name} has unknown key '{key}'; expected one "
+                    f"of {', '.join(keys)}.")
+            elif value is not None and not self.is_type(value, keys[key]):
+                expected = keys[key] if isinstance(keys[key], tuple) \
+                    else (keys[key],)
+                errors.append(f"{name}.{key} must be "
+                    f"{' or '.join(t.__name__ for t in expected)}, got "
+                    f"{type(value).__name__} {value!r}.")
+        for key in required:
+            if key not in section:
+                errors.append(f"{name} is missing required key '{key}'.")
+        return errors
+
+    @staticmethod
+    def is_type(value, types):
+        """Return whether a value is of a type, not counting booleans as
+        numbers."""
+
+        if isinstance(value, bool):
+            return types is bool or (isinstance(types, tuple) and bool in types)
+        return isinstance(value, types)
@@ -1,14 +1,18 @@
 # Standard imports
-import csv
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 
 # Third-party imports
-import botocore
-import boto3
-import yaml
+import botocore.exceptions
 
 # Local imports
+from confluence.batch_api import describe_jobs
+from confluence.ClientProvider import ClientProvider
+from confluence.Config import Config
+from confluence.FanIn import FanIn
+from confluence.Graph import Graph
+from confluence.Ledger import Ledger
 from confluence.Stage import Stage
 
 class Confluence:
@@ -20,14 +24,44 @@ class Confluence:
 
     Attributes
     ----------
+    client_provider: ClientProvider
+        provider of the AWS clients shared by every Stage, Algorithm and Job
+    config: Config
+        validated configuration (and compiled graph once compiled)
     config_data: dict
         dictionary of data required to run Confluence and create Stage objects
+    engine: str
+        submission engine, 'threads' (default) or 'asyncio'
+    fan_in: FanIn
+        inserts join jobs when a job depends on more jobs than AWS Batch
+        allows
+    graph: Graph
+        graph of Algorithm dependencies when any algorithm declares
+        'depends_on' or priority is set (None runs stages linearly)
+    history_file: Path
+        path to the SQLite run history (None disables it)
+    ledger: Ledger
+        append-only record of every job submitted by this run (the ledger
+        of a previous run is rotated unless it is being resumed)
+    max_concurrency: int
+        maximum number of AWS Batch calls in flight with the asyncio engine
+    max_workers: int
+        maximum number of Algorithms in a stage that are submitted at once
+    metrics: Metrics
+        metrics of API calls and stage submission shared with the
+        ClientProvider
     not_terminaged: list
         list of job identifiers that could not be terminated
+    priority: dict
+        'priority' section of the configuration that enables critical-path
+        scheduling priorities (None disables them)
+    reused: dict
+        dictionary of job name keys and job identifier values for jobs of a
+        previous run that are reused when resuming
     stages: list
         list of Stage objects
     submission_file: Path
-        Path to file where submission results are written
+        Path to CSV file where a compact view of the ledger is written
     submitted: list
         list of Stage objects that have been submitted to AWS Batch
     terminated: list
@@ -35,42 +69,273 @@ class Confluence:
 
     Methods
     -------
+    compile(plan_file)
+        writes the configuration and compiled graph as a compiled plan
     create_stages()
         creates Stage objects
+    define_priorities()
+        defines scheduling priorities of every Algorithm from graph weights
     execute_stages()
         runs the Algorithms stored in Stage objects
+    execute_graph()
+        runs the Algorithms stored in Stage objects in dependency order
+    history_runtimes()
+        returns mean runtimes per algorithm from the run history
+    prioritize(runtimes)
+        defines critical-path scheduling priorities of every Algorithm
+    describe_jobs(job_ids)
+        returns the descriptions of jobs looked up in batches of 100
+    resume(ledger_file, logger)
+        determines which jobs of a previous run can be reused
     terminate_jobs()
         terminates any running job in AWS Batch
+    write_submitted()
+        writes the compact CSV view of the ledger
     """
 
-    def __init__(self, config_file):
+    CANCEL_STATUS = ("SUBMITTED", "PENDING", "RUNNABLE")
+    TERMINATE_STATUS = ("STARTING", "RUNNING")
+    REUSE_STATUS = CANCEL_STATUS + TERMINATE_STATUS + ("SUCCEEDED",)
+    ENGINES = ("threads", "asyncio")
+    MAX_PRIORITY = 9999
+
+    def __init__(self, config, client_provider=None):
         """
         Parameters
         ----------
-        config_file : Path
-            path to YAML file that contains configuration data
+        config : Config or Path
+            validated configuration or path to YAML file that contains
+            configuration data
+        client_provider: ClientProvider, optional
+            provider of shared AWS clients (default is created from the 'aws'
+            section of the configuration data)
+
+        Raises
+        ------
+        ValueError
+            if the configuration is invalid or the configured engine is
+            unknown
         """
 
-        with open(config_file) as yaml_file:
-            self.config_data = yaml.safe_load(yaml_file)
+        self.config = config if isinstance(config, Config) \
+            else Config.from_file(config)
+        self.config_data = self.config.data
+        self.client_provider = client_provider if client_provider \
+            else ClientProvider.from_config(self.config_data.get("aws"))
+        self.engine = self.config_data.get("engine", "threads")
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{self.engine}', expected one "
+                f"of {', '.join(self.ENGINES)}.")
+        self.graph = None
+        self.history_file = Path(self.config_data["history_file"]) \
+            if self.config_data.get("history_file") else None
+        self.max_concurrency = self.config_data.get("max_concurrency",
+            self.client_provider.max_pool_connections)
+        self.max_workers = self.config_data.get("max_workers", 1)
+        self.metrics = self.client_provider.metrics
+        self.priority = self.config_data.get("priority")
+        self.reused = {}
         self.stages = []
         self.submission_file = Path(self.config_data["submission_file"]) \
             if len(self.config_data["submission_file"]) != 0 else None
+        self.ledger = Ledger(self.get_ledger_file(), rotate=True)
+        self.fan_in = FanIn.from_config(self.config_data.get("fan_in"),
+            self.client_provider, self.ledger)
         self.submitted = []
         self.terminated = []
         self.not_terminated = []
 
     def create_stages(self):
-        """Create Stage objects based on configuration file data."""
+        """Create Stage objects based on configuration file data.
+
+        If any algorithm declares 'depends_on', the asyncio engine is used
+        or priority is set a Graph is created, which validates that all
+        dependencies exist and contain no cycle. With priority set every
+        Algorithm is then given its critical-path scheduling priority.
+
+        A compiled configuration restores its compiled Graph and priorities
+        instead, without resolving dependencies or reading the run history.
+
+        Raises
+        ------
+        ValueError
+            if algorithm dependencies cannot be resolved or contain a cycle
+        """
 
         for key in self.config_data["stages"].keys():
-            stage = Stage(key)
+            stage = Stage(key, client_provider=self.client_provider,
+                ledger=self.ledger, fan_in=self.fan_in)
             self.stages.append(stage)
-            stage.create_algorithms(self.config_data["stages"][key])
+            stage.create_algorithms(self.config_data["stages"][key], 
+                self.reused)
+
+        if self.config.graph:
+            self.graph = Graph(self.stages, compiled=self.config.graph)
+            if self.priority is not None: self.define_priorities()
+            return
+
+        if self.engine == "asyncio" or self.priority is not None or \
+            any(alg.depends_on is not None \
+                for stage in self.stages for alg in stage.algorithms):
+            self.graph = Graph(self.stages)
+        if self.priority is not None: self.prioritize(self.history_runtimes())
+
+    def compile(self, plan_file):
+        """Write the configuration and the Graph created by create_stages
+        as a compact JSON compiled plan that Config.load reads back.
+
+        Parameters
+        ----------
+        plan_file: Path
+            path to the compiled plan
+        """
+
+        self.config.graph = self.graph.to_dict() if self.graph else None
+        self.config.write(plan_file)
+
+    def history_runtimes(self):
+        """Return a dictionary of 'stage.algorithm' keys and mean runtime
+        values in seconds from the run history (empty without a history)."""
+
+        if not self.history_file or not self.history_file.exists(): return {}
+        # sqlite3 is only imported by runs that keep a history
+        from confluence.History import History
+        history = History(self.history_file)
+        try:
+            return { name: stats["mean"] \
+                     for name, stats in history.runtimes().items() }
+        finally:
+            history.close()
+
+    def prioritize(self, runtimes=None):
+        """Define critical-path scheduling priorities and share identifiers
+        of every Algorithm and order the graph by critical-path weight.
+
+        The runtime of an Algorithm is its configured runtime, else its
+        runtime in runtimes (e.g. from the run history), else the priority
+        default_runtime. The Algorithm with the largest critical-path weight
+        gets max_priority (at most 9999) and the others a proportional
+        priority, so the longest chains start first in fair-share queues.
+        Join jobs get max_priority as they gate downstream jobs.
+
+        Parameters
+        ----------
+        runtimes: dict, optional
+            dictionary of 'stage.algorithm' name keys and runtime values in
+            seconds (default is None)
+        """
+
+        # The Simulator is only imported for its default runtime here
+        from confluence.Simulator import Simulator
+        priority = self.priority if self.priority else {}
+        runtimes = runtimes if runtimes else {}
+        default_runtime = priority.get("default_runtime", 
+            Simulator.DEFAULT_RUNTIME)
+        self.graph.prioritize({ alg: alg.runtime if alg.runtime is not None \
+            else runtimes.get(self.graph.node_name(alg), default_runtime) \
+            for alg in self.graph.nodes })
+        self.define_priorities()
+
+    def define_priorities(self):
+        """Define the scheduling priority and share identifier of every
+        Algorithm and join job from the critical-path weights of the graph."""
+
+        priority = self.priority if self.priority else {}
+        max_priority = min(priority.get("max_priority", self.MAX_PRIORITY),
+            self.MAX_PRIORITY)
+        share_identifier = priority.get("share_identifier")
+        heaviest = max(self.graph.weights.values(), default=0)
+        for alg, weight in self.graph.weights.items():
+            alg.define_scheduling(round(max_priority * weight / heaviest) \
+                if heaviest > 0 else 0, share_identifier)
+        self.fan_in.scheduling_priority = max_priority
+        self.fan_in.share_identifier = share_identifier
+
+    def describe_jobs(self, job_ids):
+        """Return the descriptions of jobs looked up in batches of 100, which
+        are sent concurrently through the AsyncEngine with the asyncio
+        engine.
+
+        Parameters
+        ----------
+        job_ids: list
+            list of job identifiers
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+        """
+
+        if self.engine == "asyncio":
+            from confluence.AsyncEngine import AsyncEngine
+            return AsyncEngine(self.graph, self.max_concurrency) \
+                .describe_jobs(self.client_provider, job_ids)
+        return describe_jobs(self.client_provider, job_ids)
+
+    def resume(self, ledger_file, logger):
+        """Determine which jobs recorded in the ledger of a previous run can
+        be reused. Must be called before create_stages.
+
+        The status of every recorded job is looked up in bulk. A job is
+        reused if it SUCCEEDED or is still active and every job it depends
+        on is reused too, so only missing or failed jobs (and the jobs that
+        depend on them) are created and submitted again.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger of the previous run
+        logger: Logger
+            logger object to write status with
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+        """
+
+        run_id, run_records = Ledger.read_run(ledger_file)
+        records = {}
+        for record in run_records:
+            records[record["job_name"]] = record
+        job_ids = [ job_id for record in records.values() \
+                    for job_id in [record["job_id"]] + record["depends_on"] ]
+        descriptions = self.describe_jobs(job_ids)
+
+        depends_on = { record["job_id"]: record["depends_on"] \
+                        for record in records.values() }
+        reusable = {}
+        def is_reusable(job_id):
+            if job_id not in reusable:
+                reusable[job_id] = False
+                status = descriptions.get(job_id, {}).get("status")
+                reusable[job_id] = status in self.REUSE_STATUS and \
+                    all(is_reusable(dep) for dep in depends_on.get(job_id, []))
+            return reusable[job_id]
+
+        for name, record in records.items():
+            if is_reusable(record["job_id"]):
+                self.reused[name] = record["job_id"]
+
+        same_ledger = self.ledger.ledger_file and \
+            Path(ledger_file).resolve() == self.ledger.ledger_file.resolve()
+        if same_ledger:
+            self.ledger.rotate = False
+            self.ledger.run_id = run_id
+        else:
+            for name in self.reused:
+                self.ledger.append(dict(records[name], resumed=True))
+        logger.info(f"Resuming from {ledger_file}: {len(self.reused)} of "
+            f"{len(records)} jobs are reused.")
 
     def execute_stages(self, logger):
         """Invoke Algorithm objects to submit jobs to AWS Batch for all stages.
 
+        Each stage depends on every job of the previous stage unless a Graph
+        of algorithm dependencies was created, in which case the graph is
+        executed instead.
+
         If a job submission fails, the exception is propagated from the Job and
         handled here; all submitted jobs are terminated and the program exits.
 
@@ -79,35 +344,104 @@ class Confluence:
         logger: Logger
             logger object to write status with        
         """
+
+        if self.graph:
+            self.execute_graph(logger)
+            return
+
         for stage in self.stages:
             try:
                 index = self.stages.index(stage)
                 if index > 0:
                     stage.define_dependencies(self.stages[index-1].algorithms)
-                stage.run_algorithms()
+                self.metrics.start_stage(stage.name)
+                stage.run_algorithms(self.max_workers)
+                self.metrics.finish_stage(stage.name, 
+                    sum(len(alg.jobs) for alg in stage.algorithms))
                 self.submitted.append(stage)
-                if self.submission_file: self.write_submitted()
                 logger.info(f"All algorithm jobs for {stage.name} stage have been submitted.")
             
             except botocore.exceptions.ClientError as error:
-                logger.critical(f"Job submission FAILED and all jobs will be TERMINATED.")
-                logger.critical(f"Job failed with the following error: {error}")
+                self.abort_submission(error, logger)
+                return
+        if self.submission_file: self.write_submitted()
+
+    def execute_graph(self, logger):
+        """Invoke Algorithm objects to submit jobs to AWS Batch in dependency
+        order.
+
+        Every Algorithm whose upstream Algorithms have been submitted is 
+        submitted concurrently (bounded by max_workers) so independent 
+        branches run side by side in AWS Batch. The asyncio engine also
+        submits the jobs of each Algorithm concurrently, bounded by
+        max_concurrency calls in flight.
+
+        Parameters
+        ----------
+        logger: Logger
+            logger object to write status with        
+        """
+
+        def on_started(alg):
+            self.metrics.start_stage(self.graph.stages[alg].name)
+
+        def on_submitted(alg):
+            stage = self.graph.stages[alg]
+            self.metrics.finish_stage(stage.name, len(alg.jobs))
+            logger.info(f"All jobs for {self.graph.node_name(alg)} have been submitted.")
+            if len(stage.submitted) == len(stage.algorithms):
+                self.submitted.append(stage)
+                logger.info(f"All algorithm jobs for {stage.name} stage have been submitted.")
 
-                self.terminate_jobs(logger)
-                logger.info(f"{len(self.terminated)} jobs terminated.")
-                logger.info(f"Jobs that could not be terminated and require manual termination: {', '.join(self.not_terminated)}.")
-                logger.info(f"Program exiting.")
-                sys.exit("Job submission failure")
+        try:
+            if self.engine == "asyncio":
+                # asyncio is only imported by runs that use it
+                from confluence.AsyncEngine import AsyncEngine
+                AsyncEngine(self.graph, self.max_concurrency, 
+                    on_submitted, on_started).execute()
+            else:
+                self.graph.execute(self.max_workers, on_submitted, on_started)
+        except botocore.exceptions.ClientError as error:
+            self.abort_submission(error, logger)
+            return
+        if self.submission_file: self.write_submitted()
+
+    def abort_submission(self, error, logger):
+        """Terminate all submitted jobs after a failed submission and exit.
+
+        Parameters
+        ----------
+        error: botocore.exceptions.ClientError
+            error returned by the AWS Batch API
+        logger: Logger
+            logger object to write status with
+        """
+
+        logger.critical(f"Job submission FAILED and all jobs will be TERMINATED.")
+        logger.critical(f"Job failed with the following error: {error}")
+        if self.submission_file: self.write_submitted()
+
+        self.terminate_jobs(logger)
+        logger.info(f"{len(self.terminated)} jobs terminated.")
+        logger.info(f"Jobs that could not be terminated and require manual termination: {', '.join(self.not_terminated)}.")
+        logger.info(f"Program exiting.")
+        sys.exit("Job submission failure")
 
     def terminate_jobs(self, logger):
         """Terminate jobs that have been submitted to AWS Batch.
 
-        Uses self.submitted list to determine submitted jobs. Jobs in SUBMITTED,
+        Uses the job identifiers of every Algorithm and join job to determine
+        submitted jobs, which includes jobs accepted by AWS Batch in a stage
+        that did not finish submitting. Jobs reused from a previous run are
+        left alone. Job status is looked up in batches of 100 and jobs are
+        cancelled or terminated concurrently, through the AsyncEngine and its
+        max_concurrency limit with the asyncio engine. Jobs in SUBMITTED,
         PENDING, or RUNNABLE state are cancelled while jobs in STARTING or 
         RUNNING state are terminated. This transitions the job's state to FAILED.
 
         If an exception is thrown when a job is being cancelled or terminated
-        the exception is reported and the program exits.
+        the exception is reported and the program exits once every other job
+        has been handled.
 
         Parameters
         ----------
@@ -115,58 +449,101 @@ class Confluence:
             logger object to write status with
         """
 
-        batch = boto3.client("batch")
-        job_ids = [ job_id for stage in self.submitted \
+        job_ids = [ job_id for stage in self.stages \
                         for alg in stage.algorithms \
-                            for job_id in alg.job_ids ]
-        for job_id in job_ids:
-            try:
-                status = batch.describe_jobs(jobs=[job_id])["jobs"][0]["status"]
-                if status == "SUBMITTED" or status == "PENDING" \
-                    or status == "RUNNABLE":
-                    
-                    batch.cancel_job(jobId=job_id, 
-                        reason="Job submission failed")
-                    self.terminated.append(job_id)
-                
-                elif status == "STARTING" or status == "RUNNING":
-                    batch.terminate_job(jobId=job_id, 
-                        reason="Job submission failed")
-                    self.terminated.append(job_id)
-                
-                else:
-                    self.not_terminated.append(job_id)
-            
-            except botocore.exceptions.ClientError as error:
+                            for job_id in alg.job_ids \
+                                if job_id not in alg.reused_ids ]
+        job_ids.extend(self.fan_in.job_ids)
+        engine = None
+        if self.engine == "asyncio":
+            from confluence.AsyncEngine import AsyncEngine
+            engine = AsyncEngine(self.graph, self.max_concurrency)
+        try:
+            descriptions = self.describe_jobs(job_ids)
+        except botocore.exceptions.ClientError as error:
+            logger.critical("Job status lookup FAILURE.")
+            logger.critical("You will need to manually terminate any remaining jobs.")
+            logger.critical(f"Job failed with the following error: {error}")
+            logger.critical("Program exiting.")
+            sys.exit("Job termination failure")
+
+        def stop_job(job_id):
+            status = descriptions[job_id]["status"]
+            if status in self.CANCEL_STATUS:
+                self.client_provider.call("batch", "cancel_job", jobId=job_id,
+                    reason="Job submission failed")
+                return True
+            if status in self.TERMINATE_STATUS:
+                self.client_provider.call("batch", "terminate_job", 
+                    jobId=job_id, reason="Job submission failed")
+                return True
+            return False
+
+        self.not_terminated.extend([ job_id for job_id in job_ids \
+                                        if job_id not in descriptions ])
+        stop_ids = [ job_id for job_id in job_ids if job_id in descriptions ]
+        if engine:
+            results = engine.call_all(stop_job, stop_ids)
+        else:
+            results = []
+            with ThreadPoolExecutor(max_workers=self.client_provider.max_pool_connections,
+                thread_name_prefix="terminate") as executor:
+                futures = [ executor.submit(stop_job, job_id) \
+                            for job_id in stop_ids ]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except botocore.exceptions.ClientError as error:
+                        results.append(error)
+
+        failed = False
+        for job_id, result in zip(stop_ids, results):
+            if isinstance(result, botocore.exceptions.ClientError):
                 logger.critical(f"Job termination FAILURE for {job_id}.")
-                logger.critical("You will need to manually terminate any remaining jobs.")
-                logger.critical(f"Job failed with the following error: {error}")
-                logger.critical("Program exiting.")
-                sys.exit("Job termination failure")
+                logger.critical(f"Job failed with the following error: {result}")
+                self.not_terminated.append(job_id)
+                failed = True
+            elif isinstance(result, BaseException):
+                raise result
+            elif result:
+                self.terminated.append(job_id)
+            else:
+                self.not_terminated.append(job_id)
+
+        if failed:
+            logger.critical("You will need to manually terminate any remaining jobs.")
+            logger.critical("Program exiting.")
+            sys.exit("Job termination failure")
+
+    def get_ledger_file(self):
+        """Return the ledger file path from config yaml.
+
+        Defaults to the submission file with a '.jsonl' suffix when no
+        'ledger_file' is configured; None disables the ledger.
+        """
+
+        ledger_file = self.config_data.get("ledger_file", "")
+        if ledger_file: return Path(ledger_file)
+        if self.submission_file: return self.submission_file.with_suffix(".jsonl")
+        return None
 
     def write_submitted(self):
         """ Write information on each job that has been submitted to AWS Batch.
 
-        The following information is written to a CSV file taken from config
-        yaml: stage name, algorithm name, job name, and job identifier
+        The CSV file taken from config yaml is a compact view of the ledger
+        with the following information: stage name, algorithm name, job name,
+        and job identifier. Submission metrics are written next to it as a
+        JSON summary ('.metrics.json') and a Prometheus textfile ('.prom').
         """
 
-        with open(self.submission_file, mode='w') as csv_file:
-            fieldnames = ["stage", "algorithm", "job_name", "job_id"]
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-            for stage in self.stages:
-                for alg in stage.algorithms:
-                    for job in alg.jobs:
-                        writer.writerow({
-                            "stage" : stage.name,
-                            "algorithm" : alg.name,
-                            "job_name": job.name,
-                            "job_id": job.job_id
-                        })
+        self.ledger.close()
+        if self.ledger.ledger_file and self.ledger.ledger_file.exists():
+            Ledger.write_csv(self.ledger.ledger_file, self.submission_file)
+        self.metrics.write(self.submission_file, self.client_provider.limiter)
     
     def set_log_file(self, log_file):
         self.log_file = Path(log_file)
     
     def set_submission_file(self, submission_file):
         self.submission_file = Path(submission_file)
+        self.ledger.ledger_file = self.get_ledger_file()
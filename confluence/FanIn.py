@@ -0,0 +1,226 @@
+# Standard imports
+import threading
+
+# Local imports
+from confluence.Job import Job
+
+class FanIn:
+    """
+    A class that keeps the number of dependencies of a job within the AWS
+    Batch limit by inserting join jobs.
+
+    AWS Batch rejects a job that depends on more than 20 jobs. When a job
+    would exceed the limit its upstream jobs are split into groups of at most
+    limit jobs, a lightweight join job is submitted for each group and the
+    job depends on the join jobs instead, repeating level by level (a tree of
+    joins) until the job fits. N_TO_N dependencies keep their own slots and
+    are joined by array join jobs of the same size linked N_TO_N, so array
+    children are still released index by index.
+
+    Join jobs are shared by every Algorithm that depends on the same set of
+    jobs.
+
+    Attributes
+    ----------
+    cache: dict
+        dictionary of (array size, slots, dependencies) tuple keys and
+        joined job identifier list values
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client used to submit join jobs
+    job_def: str
+        name of the job definition join jobs are created from
+    jobs: list
+        list of Job objects for join jobs that have been submitted
+    ledger: Ledger
+        ledger that records each join job as soon as it is submitted
+    limit: int
+        maximum number of dependencies of a job
+    lock: Lock
+        lock that serializes join job creation across concurrent submissions
+    queue: str
+        name of the queue join jobs are submitted to (None uses the queue of
+        the stage that needs the join)
+    scheduling_priority: int
+        scheduling priority of join jobs (None is not sent)
+    share_identifier: str
+        fair-share identifier of join jobs (None is not sent)
+    stages: dict
+        dictionary of join job name keys and the name of the stage that
+        needed the join
+
+    Methods
+    -------
+    compact(stage, dependencies, n_to_n_ids, array_size)
+        returns dependencies and N_TO_N dependencies that fit in the limit
+    from_config(fan_in_dict, client_provider, ledger)
+        creates a FanIn from the 'fan_in' section of the configuration
+    """
+
+    LIMIT = 20
+    JOB_DEFINITION = "join"
+
+    def __init__(self, client_provider, limit=LIMIT, job_def=JOB_DEFINITION,
+        queue=None, ledger=None):
+        """
+        Parameters
+        ----------
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        limit: int, optional
+            maximum number of dependencies of a job (default is 20)
+        job_def: str, optional
+            name of the job definition of join jobs (default is 'join')
+        queue: str, optional
+            name of the queue of join jobs (default is the stage queue)
+        ledger: Ledger, optional
+            ledger that records join jobs (default is None)
+
+        Raises
+        ------
+        ValueError
+            if limit is smaller than 2
+        """
+
+        if limit < 2:
+            raise ValueError(f"Fan-in limit must be at least 2, got {limit}.")
+        self.cache = {}
+        self.client_provider = client_provider
+        self.job_def = job_def
+        self.jobs = []
+        self.ledger = ledger
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.queue = queue
+        self.scheduling_priority = None
+        self.share_identifier = None
+        self.stages = {}
+
+    @classmethod
+    def from_config(cls, fan_in_dict, client_provider, ledger=None):
+        """Create a FanIn from configuration data.
+
+        Parameters
+        ----------
+        fan_in_dict: dict
+            dictionary that may contain limit, job_definition and queue keys
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        ledger: Ledger, optional
+            ledger that records join jobs (default is None)
+        """
+
+        fan_in_dict = fan_in_dict if fan_in_dict else {}
+        return cls(client_provider, limit=fan_in_dict.get("limit", cls.LIMIT),
+            job_def=fan_in_dict.get("job_definition", cls.JOB_DEFINITION),
+            queue=fan_in_dict.get("queue"), ledger=ledger)
+
+    @property
+    def job_ids(self):
+        """Return the identifiers of submitted join jobs."""
+
+        return [ job.job_id for job in self.jobs ]
+
+    def compact(self, stage, dependencies, n_to_n_ids=None, array_size=0):
+        """Return dependencies that fit in the limit, submitting join jobs
+        when needed.
+
+        N_TO_N dependencies are given as many slots as possible while leaving
+        at least one slot for the other dependencies.
+
+        Parameters
+        ----------
+        stage: str
+            name of the stage of the job that depends on dependencies
+        dependencies: list
+            list of job identifiers the job depends on
+        n_to_n_ids: list, optional
+            identifiers in dependencies that are linked index-wise
+        array_size: int, optional
+            array size of the job and its N_TO_N dependencies
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response upon join submission
+
+        Returns
+        -------
+        tuple
+            list of job identifiers and list of N_TO_N job identifiers
+        """
+
+        n_to_n_ids = n_to_n_ids if n_to_n_ids else []
+        if len(dependencies) <= self.limit:
+            return list(dependencies), list(n_to_n_ids)
+
+        n_to_n_set = set(n_to_n_ids)
+        n_to_n = [ job_id for job_id in dependencies if job_id in n_to_n_set ]
+        whole = [ job_id for job_id in dependencies if job_id not in n_to_n_set ]
+        n_to_n_slots = min(len(n_to_n), self.limit - 1 if whole else self.limit)
+        n_to_n = self.join(stage, n_to_n, n_to_n_slots, array_size)
+        whole = self.join(stage, whole, self.limit - len(n_to_n), 0)
+        return whole + n_to_n, n_to_n
+
+    def join(self, stage, job_ids, slots, array_size):
+        """Return job identifiers that stand for job_ids in at most slots
+        identifiers, submitting levels of join jobs until they fit.
+
+        Parameters
+        ----------
+        stage: str
+            name of the stage that needs the join
+        job_ids: list
+            list of job identifiers to join
+        slots: int
+            maximum number of identifiers returned
+        array_size: int
+            array size of N_TO_N join jobs (0 joins whole jobs)
+        """
+
+        key = (array_size, slots, tuple(job_ids))
+        with self.lock:
+            if key not in self.cache:
+                joined = list(job_ids)
+                while len(joined) > slots:
+                    # Join only as many groups as needed to fit in slots
+                    groups = []
+                    covered = 0
+                    while covered < len(joined) \
+                        and len(joined) - covered + len(groups) > slots:
+                        groups.append(joined[covered:covered + self.limit])
+                        covered += len(groups[-1])
+                    joined = [ self.submit(stage, group, array_size) \
+                               for group in groups ] + joined[covered:]
+                self.cache[key] = joined
+            return list(self.cache[key])
+
+    def submit(self, stage, job_ids, array_size):
+        """Submit a join job that depends on job_ids and return its
+        identifier.
+
+        Parameters
+        ----------
+        stage: str
+            name of the stage that needs the join
+        job_ids: list
+            list of at most limit job identifiers
+        array_size: int
+            array size of an N_TO_N join job (0 joins whole jobs)
+        """
+
+        name = f"{stage}_join_{len(self.jobs)}"
+        job = Job(name=name, job_def=self.job_def,
+            queue=self.queue if self.queue else stage,
+            client_provider=self.client_provider)
+        if array_size > 0:
+            job.define_array(array_size)
+            job.define_dependencies(job_ids, job_ids)
+        else:
+            job.define_dependencies(job_ids)
+        job.define_tags(tag_dict={ "job": name }, will_propagate=True)
+        job.define_scheduling(self.scheduling_priority, self.share_identifier)
+        job.submit()
+        self.jobs.append(job)
+        self.stages[name] = stage
+        if self.ledger: self.ledger.record(stage, "join", job)
+        return job.job_id
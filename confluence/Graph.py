@@ -0,0 +1,295 @@
+# Standard imports
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class Graph:
+    """
+    A class that represents the Confluence workflow as a directed acyclic
+    graph of Algorithm objects.
+
+    Each Algorithm may declare the algorithms or stages it depends on with
+    'depends_on' in the configuration YAML. Entries are stage names (every
+    algorithm in the stage), algorithm names or 'stage.algorithm' names. An
+    Algorithm that does not declare 'depends_on' depends on every algorithm in
+    the previous stage, which is the linear behavior of Confluence.
+
+    Attributes
+    ----------
+    nodes: list
+        list of Algorithm objects in configuration order
+    order: list
+        list of Algorithm objects in topological order
+    stages: dict
+        dictionary of Algorithm keys and the Stage object they belong to
+    upstream: dict
+        dictionary of Algorithm keys and lists of Algorithm objects they
+        depend on
+    weights: dict
+        dictionary of Algorithm keys and critical-path weight values (the
+        longest chain of runtimes from the Algorithm to the end of the
+        workflow); empty until prioritize is called
+
+    Methods
+    -------
+    define_dependencies(alg)
+        returns the job identifiers, array sizes and array offsets an
+        Algorithm depends on
+    downstream()
+        returns a dictionary of Algorithm keys and dependent Algorithm lists
+    execute(max_workers, on_submitted, on_started)
+        submits every Algorithm as soon as all of its upstream Algorithms
+        have been submitted
+    node_name(alg)
+        returns the 'stage.algorithm' name of an Algorithm
+    prioritize(runtimes)
+        computes critical-path weights and orders the graph by them
+    sort()
+        topologically orders the graph and validates it has no cycles
+    to_dict()
+        returns the compiled graph with node names in place of Algorithm
+        objects
+    """
+
+    def __init__(self, stages, compiled=None):
+        """
+        Parameters
+        ----------
+        stages: list
+            list of Stage objects in configuration order
+        compiled: dict, optional
+            compiled graph returned by to_dict for the same stages, which
+            is restored without resolving dependencies or sorting again
+            (default is None)
+
+        Raises
+        ------
+        ValueError
+            if a dependency cannot be resolved, the graph contains a cycle
+            or the compiled graph has other algorithms
+        """
+
+        self.nodes = []
+        self.order = []
+        self.stages = {}
+        self.upstream = {}
+        self.weights = {}
+
+        for stage in stages:
+            for alg in stage.algorithms:
+                self.nodes.append(alg)
+                self.stages[alg] = stage
+
+        if compiled:
+            nodes = { self.node_name(alg): alg for alg in self.nodes }
+            if set(nodes) != set(compiled["order"]):
+                raise ValueError("Compiled graph does not match the "
+                    "algorithms of the configuration; compile it again.")
+            self.upstream = { nodes[name]: [ nodes[dep] for dep in deps ] \
+                              for name, deps in compiled["upstream"].items() }
+            self.order = [ nodes[name] for name in compiled["order"] ]
+            self.weights = { nodes[name]: weight \
+                             for name, weight in compiled["weights"].items() }
+            return
+
+        for index, stage in enumerate(stages):
+            for alg in stage.algorithms:
+                if alg.depends_on is None:
+                    self.upstream[alg] = list(stages[index-1].algorithms) \
+                        if index > 0 else []
+                else:
+                    self.upstream[alg] = self.resolve(stages, alg)
+        self.sort()
+
+    def resolve(self, stages, alg):
+        """Resolve the 'depends_on' names of an Algorithm to Algorithm
+        objects.
+
+        Parameters
+        ----------
+        stages: list
+            list of Stage objects
+        alg: Algorithm
+            Algorithm whose dependencies are resolved
+
+        Raises
+        ------
+        ValueError
+            if a name does not match a stage or exactly one algorithm
+        """
+
+        stage_dict = { stage.name: stage for stage in stages }
+        upstream = []
+        for name in alg.depends_on:
+            if name in stage_dict:
+                matches = stage_dict[name].algorithms
+            elif "." in name and name.split(".", 1)[0] in stage_dict:
+                stage_name, alg_name = name.split(".", 1)
+                matches = [ node for node in stage_dict[stage_name].algorithms
+                            if node.name == alg_name ]
+            else:
+                matches = [ node for node in self.nodes if node.name == name ]
+
+            if len(matches) == 0:
+                raise ValueError(f"{self.node_name(alg)} depends on unknown "
+                    f"stage or algorithm '{name}'.")
+            if len(matches) > 1 and name not in stage_dict:
+                raise ValueError(f"{self.node_name(alg)} depends on ambiguous "
+                    f"algorithm '{name}'; use 'stage.algorithm'.")
+            upstream.extend([ node for node in matches if node not in upstream ])
+        return upstream
+
+    def node_name(self, alg):
+        """Return the 'stage.algorithm' name of an Algorithm.
+
+        Parameters
+        ----------
+        alg: Algorithm
+            Algorithm in the graph
+        """
+
+        return f"{self.stages[alg].name}.{alg.name}"
+
+    def to_dict(self):
+        """Return a dictionary with upstream, order and weights keys that
+        describes the graph with 'stage.algorithm' names."""
+
+        return {
+            "upstream": { self.node_name(alg): [ self.node_name(dep) \
+                for dep in deps ] for alg, deps in self.upstream.items() },
+            "order": [ self.node_name(alg) for alg in self.order ],
+            "weights": { self.node_name(alg): weight \
+                for alg, weight in self.weights.items() }
+        }
+
+    def downstream(self):
+        """Return a dictionary of Algorithm keys and the list of Algorithm
+        objects that depend on them."""
+
+        downstream = { alg: [] for alg in self.nodes }
+        for alg in self.nodes:
+            for upstream in self.upstream[alg]:
+                downstream[upstream].append(alg)
+        return downstream
+
+    def prioritize(self, runtimes):
+        """Compute the critical-path weight of every Algorithm and order
+        the graph so the heaviest ready Algorithm is submitted first.
+
+        The weight of an Algorithm is its runtime plus the largest weight of
+        the Algorithms that depend on it, so the Algorithms that start the
+        longest chains have the largest weights.
+
+        Parameters
+        ----------
+        runtimes: dict
+            dictionary of Algorithm keys and expected runtime values in
+            seconds
+        """
+
+        downstream = self.downstream()
+        self.weights = {}
+        for alg in reversed(self.order):
+            self.weights[alg] = runtimes.get(alg, 0) + max([ self.weights[child]
+                for child in downstream[alg] ], default=0)
+        self.sort()
+
+    def sort(self):
+        """Topologically order Algorithm objects (Kahn's algorithm) keeping
+        configuration order between independent algorithms of the same
+        critical-path weight.
+
+        Raises
+        ------
+        ValueError
+            if the graph contains a cycle
+        """
+
+        downstream = self.downstream()
+        indegree = { alg: len(self.upstream[alg]) for alg in self.nodes }
+        ready = [ alg for alg in self.nodes if indegree[alg] == 0 ]
+        self.order = []
+        while ready:
+            alg = max(ready, key=lambda alg: self.weights.get(alg, 0))
+            ready.remove(alg)
+            self.order.append(alg)
+            for child in downstream[alg]:
+                indegree[child] -= 1
+                if indegree[child] == 0: ready.append(child)
+
+        if len(self.order) != len(self.nodes):
+            cycle = [ self.node_name(alg) for alg in self.nodes
+                      if indegree[alg] > 0 ]
+            raise ValueError(f"Algorithm dependencies contain a cycle: "
+                f"{', '.join(cycle)}.")
+
+    def define_dependencies(self, alg):
+        """Return the job identifiers an Algorithm depends on and
+        dictionaries of job identifier keys and array size and array offset
+        values for array jobs.
+
+        Parameters
+        ----------
+        alg: Algorithm
+            Algorithm whose upstream Algorithm objects have been submitted
+        """
+
+        dependencies = []
+        array_dependencies = {}
+        array_offsets = {}
+        for upstream in self.upstream[alg]:
+            dependencies.extend(upstream.job_ids)
+            if upstream.array_size > 0:
+                for job_id in upstream.job_ids:
+                    offset, size = upstream.shards.get(job_id, 
+                        (0, upstream.array_size))
+                    array_dependencies[job_id] = size
+                    array_offsets[job_id] = offset
+        return dependencies, array_dependencies, array_offsets
+
+    def execute(self, max_workers=1, on_submitted=None, on_started=None):
+        """Submit every Algorithm once all of its upstream Algorithms have
+        been submitted; ready Algorithms are submitted concurrently with the
+        heaviest critical-path weight first.
+
+        Parameters
+        ----------
+        max_workers: int, optional
+            maximum number of Algorithms submitted at once (default is 1)
+        on_submitted: function, optional
+            called with each Algorithm after its jobs have been submitted
+        on_started: function, optional
+            called with each Algorithm before its jobs are submitted
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response upon job submission
+        """
+
+        downstream = self.downstream()
+        indegree = { alg: len(self.upstream[alg]) for alg in self.nodes }
+        ready = [ alg for alg in self.order if indegree[alg] == 0 ]
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=max(max_workers, 1),
+            thread_name_prefix="graph")
+        try:
+            while ready or running:
+                ready.sort(key=lambda alg: self.weights.get(alg, 0), 
+                    reverse=True)
+                for alg in ready:
+                    if on_started: on_started(alg)
+                    future = executor.submit(alg.submit_jobs,
+                        *self.define_dependencies(alg))
+                    running[future] = alg
+                ready = []
+
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    alg = running.pop(future)
+                    if future.exception(): raise future.exception()
+                    self.stages[alg].submitted.append(alg)
+                    if on_submitted: on_submitted(alg)
+                    for child in downstream[alg]:
+                        indegree[child] -= 1
+                        if indegree[child] == 0: ready.append(child)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
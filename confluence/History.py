@@ -0,0 +1,346 @@
+# Standard imports
+from datetime import datetime, timezone
+from pathlib import Path
+import sqlite3
+
+# Local imports
+from confluence.batch_api import describe_jobs, list_array_children
+from confluence.Ledger import Ledger
+from confluence.Metrics import Metrics
+
+class History:
+    """
+    A class that stores the timings of jobs from every run in a local SQLite
+    database.
+
+    Jobs recorded in a run's ledger are described in bulk. Children of array
+    jobs are listed with paginated list_jobs calls (only for statuses present
+    in the parent's statusSummary) or, to also get their attempts, described
+    in bulk. A job is stored once per job identifier so a run can be recorded
+    again while it is running and later to update its jobs. The history is
+    the data source for runtime estimates, timeouts and capacity planning.
+
+    Attributes
+    ----------
+    connection: sqlite3.Connection
+        connection to the history database
+    history_file: Path
+        path to the SQLite database file
+
+    Methods
+    -------
+    close()
+        closes the database connection
+    create_row(run_id, record, description, parent)
+        returns a row dictionary for a job or array child
+    jobs(run_id, stage, algorithm, status, children)
+        returns recorded jobs that match the filters
+    record(client_provider, records, run_id, ledger_file, describe_children)
+        describes the jobs of ledger records and stores them
+    record_ledger(ledger_file, client_provider, describe_children)
+        records the latest ledger record of each job of a run
+    runs()
+        returns every recorded run
+    runtimes(stage, algorithm)
+        returns runtime statistics per algorithm
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            ledger_file TEXT,
+            recorded_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            run_id TEXT,
+            stage TEXT,
+            algorithm TEXT,
+            job_name TEXT,
+            parent_id TEXT,
+            array_index INTEGER,
+            array_size INTEGER,
+            status TEXT,
+            status_reason TEXT,
+            exit_code INTEGER,
+            attempts INTEGER,
+            created_at INTEGER,
+            started_at INTEGER,
+            stopped_at INTEGER,
+            vcpus REAL,
+            memory INTEGER,
+            job_queue TEXT,
+            job_definition TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id);
+        CREATE INDEX IF NOT EXISTS jobs_algorithm ON jobs (stage, algorithm);
+    """
+    COLUMNS = ("job_id", "run_id", "stage", "algorithm", "job_name",
+        "parent_id", "array_index", "array_size", "status", "status_reason",
+        "exit_code", "attempts", "created_at", "started_at", "stopped_at",
+        "vcpus", "memory", "job_queue", "job_definition")
+    STATUS = ("SUBMITTED", "PENDING", "RUNNABLE", "STARTING", "RUNNING",
+        "SUCCEEDED", "FAILED")
+
+    def __init__(self, history_file):
+        """
+        Parameters
+        ----------
+        history_file: Path
+            path to the SQLite database file (created if missing)
+        """
+
+        self.history_file = Path(history_file)
+        self.connection = sqlite3.connect(self.history_file)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+
+        self.connection.close()
+
+    def record_ledger(self, ledger_file, client_provider,
+        describe_children=False):
+        """Record the jobs of the latest record of each job of the latest run
+        in a ledger.
+
+        The run is identified by the run identifier stamped on its ledger
+        records, so earlier runs in the same ledger are not recorded again.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger file
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        describe_children: bool, optional
+            whether to describe array children to record their attempts
+            (default is False)
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+
+        Returns
+        -------
+        int
+            number of jobs and array children recorded
+        """
+
+        run_id, records = Ledger.read_run(ledger_file)
+        if not records: return 0
+        latest = {}
+        for record in records:
+            latest[record["job_name"]] = record
+        return self.record(client_provider, list(latest.values()),
+            run_id=run_id, ledger_file=ledger_file,
+            describe_children=describe_children)
+
+    def record(self, client_provider, records, run_id, ledger_file=None,
+        describe_children=False):
+        """Describe the jobs of ledger records and store them.
+
+        Parameters
+        ----------
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        records: list
+            list of ledger record dictionaries
+        run_id: str
+            identifier of the run
+        ledger_file: Path, optional
+            path to the ledger the records come from (default is None)
+        describe_children: bool, optional
+            whether to describe array children to record their attempts
+            (default is False which lists them)
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+
+        Returns
+        -------
+        int
+            number of jobs and array children recorded
+        """
+
+        descriptions = describe_jobs(client_provider,
+            [ record["job_id"] for record in records ])
+        rows = []
+        for record in records:
+            description = descriptions.get(record["job_id"])
+            if description is None: continue
+            parent = self.create_row(run_id, record, description)
+            rows.append(parent)
+            if record.get("array_size", 0) == 0: continue
+
+            if describe_children:
+                children = describe_jobs(client_provider,
+                    [ f"{record['job_id']}:{index}" \
+                      for index in range(record["array_size"]) ]).values()
+            else:
+                summary = description.get("arrayProperties", {}) \
+                    .get("statusSummary", {})
+                children = list_array_children(client_provider,
+                    record["job_id"], [ status for status in self.STATUS \
+                                        if summary.get(status, 0) > 0 ])
+            for child in children:
+                row = self.create_row(run_id, record, child, parent)
+                rows.append(row)
+
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO runs VALUES "
+                "(?, ?, ?)", (run_id, str(ledger_file) if ledger_file else None,
+                datetime.now(timezone.utc).isoformat()))
+            self.connection.executemany(f"INSERT OR REPLACE INTO jobs "
+                f"({', '.join(self.COLUMNS)}) VALUES "
+                f"({', '.join('?' for _ in self.COLUMNS)})",
+                [ tuple(row[column] for column in self.COLUMNS) \
+                  for row in rows ])
+        return len(rows)
+
+    def create_row(self, run_id, record, description, parent=None):
+        """Return a row dictionary for a job or array child description.
+
+        Children take their resource settings from their parent and their
+        array index is offset by the shard offset of the parent, or looked up
+        in the index map of a repair job.
+
+        Parameters
+        ----------
+        run_id: str
+            identifier of the run
+        record: dict
+            ledger record of the job or of the parent array job
+        description: dict
+            job description or job summary returned by AWS Batch
+        parent: dict, optional
+            row dictionary of the parent array job (default is None)
+        """
+
+        container = description.get("container", {})
+        attempts = description.get("attempts")
+        row = {
+            "job_id": description["jobId"],
+            "run_id": run_id,
+            "stage": record["stage"],
+            "algorithm": record["algorithm"],
+            "job_name": record["job_name"],
+            "parent_id": None,
+            "array_index": None,
+            "array_size": record.get("array_size", 0),
+            "status": description.get("status"),
+            "status_reason": description.get("statusReason"),
+            "exit_code": container.get("exitCode"),
+            "attempts": len(attempts) if attempts is not None else None,
+            "created_at": description.get("createdAt"),
+            "started_at": description.get("startedAt"),
+            "stopped_at": description.get("stoppedAt"),
+            "vcpus": container.get("vcpus"),
+            "memory": container.get("memory"),
+            "job_queue": description.get("jobQueue"),
+            "job_definition": description.get("jobDefinition")
+        }
+        for requirement in container.get("resourceRequirements", []):
+            if requirement["type"] == "VCPU":
+                row["vcpus"] = float(requirement["value"])
+            elif requirement["type"] == "MEMORY":
+                row["memory"] = int(requirement["value"])
+        if parent:
+            index = description.get("arrayProperties", {}).get("index")
+            if index is None: index = int(description["jobId"].rsplit(":")[-1])
+            row.update({
+                "parent_id": parent["job_id"],
+                "array_index": record["index_map"][index] \
+                    if "index_map" in record \
+                    else record.get("array_offset", 0) + index,
+                "array_size": 0,
+                "vcpus": parent["vcpus"],
+                "memory": parent["memory"],
+                "job_queue": parent["job_queue"],
+                "job_definition": parent["job_definition"]
+            })
+        return row
+
+    def runs(self):
+        """Return a list of dictionaries for every recorded run with the
+        number of jobs per status."""
+
+        rows = self.connection.execute("""
+            SELECT runs.run_id, runs.ledger_file, runs.recorded_at,
+                COUNT(jobs.job_id) AS jobs,
+                SUM(jobs.status = 'SUCCEEDED') AS succeeded,
+                SUM(jobs.status = 'FAILED') AS failed
+            FROM runs LEFT JOIN jobs ON jobs.run_id = runs.run_id
+                AND (jobs.parent_id IS NOT NULL OR jobs.array_size = 0)
+            GROUP BY runs.run_id ORDER BY runs.run_id""")
+        return [ dict(row) for row in rows ]
+
+    def jobs(self, run_id=None, stage=None, algorithm=None, status=None,
+        children=True):
+        """Return a list of dictionaries for recorded jobs that match the
+        filters.
+
+        Parameters
+        ----------
+        run_id: str, optional
+            identifier of the run (default is every run)
+        stage: str, optional
+            name of the stage (default is every stage)
+        algorithm: str, optional
+            name of the algorithm (default is every algorithm)
+        status: str, optional
+            job status (default is every status)
+        children: bool, optional
+            whether to include array children (default is True)
+        """
+
+        filters = { "run_id": run_id, "stage": stage, "algorithm": algorithm,
+                    "status": status }
+        clauses = [ f"{column} = ?" for column, value in filters.items() \
+                    if value is not None ]
+        if not children: clauses.append("parent_id IS NULL")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.connection.execute(f"SELECT * FROM jobs {where} "
+            f"ORDER BY run_id, job_name, array_index",
+            [ value for value in filters.values() if value is not None ])
+        return [ dict(row) for row in rows ]
+
+    def runtimes(self, stage=None, algorithm=None):
+        """Return runtime statistics in seconds of succeeded jobs and array
+        children per algorithm.
+
+        Parameters
+        ----------
+        stage: str, optional
+            name of the stage (default is every stage)
+        algorithm: str, optional
+            name of the algorithm (default is every algorithm)
+
+        Returns
+        -------
+        dict
+            dictionary of 'stage.algorithm' keys and dictionary values with
+            count, mean, p50, p95 and max keys
+        """
+
+        runtimes = {}
+        rows = self.connection.execute("""
+            SELECT stage, algorithm, (stopped_at - started_at) / 1000.0
+            FROM jobs WHERE status = 'SUCCEEDED' AND started_at IS NOT NULL
+                AND stopped_at IS NOT NULL
+                AND (parent_id IS NOT NULL OR array_size = 0)
+                AND (? IS NULL OR stage = ?) AND (? IS NULL OR algorithm = ?)
+            ORDER BY 3""", (stage, stage, algorithm, algorithm))
+        for row in rows:
+            runtimes.setdefault(f"{row[0]}.{row[1]}", []).append(row[2])
+        return { name: {
+                    "count": len(values),
+                    "mean": sum(values) / len(values),
+                    "p50": Metrics.percentile(values, 0.5),
+                    "p95": Metrics.percentile(values, 0.95),
+                    "max": values[-1]
+                 } for name, values in runtimes.items() }
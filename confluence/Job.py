@@ -1,15 +1,29 @@
 # Third-party imports
-import botocore
-import boto3
+import botocore.exceptions
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
 
 class Job:
     """
     A class that represents a job in AWS Batch.
 
+    Jobs use slots and never mutate their dictionaries in place (define
+    methods replace them), so the overrides, array properties and retry
+    strategy of identical jobs can be shared. The submit_job request is only
+    built when the job is submitted.
+
     Attributes
     ----------
+    array_offset: int
+        global index of the first child when the job is a shard of a larger
+        array
     array_props: dict
         dictionary of array properties including array size (max 10,000)
+    base_tags: dict
+        dictionary of tags that may be shared between jobs
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client used to submit the job
     overrides: dict
         dictionary of container overrides including command arguments
     depends_on: list
@@ -20,22 +34,42 @@ class Job:
         unique identifier of job when submitted to AWS Batch
     name: str
         the name of the job
+    name_tag: bool
+        whether the job name is added to the tags under the 'job' key
     propagate_tags: bool
         whether to propagate tags to ECS task associated with job (default False)
     queue: str
         the name of the queue the job will be submitted to
     retry_strategy: dict
         dictionary of retry strategy properties including rety attempts
+    scheduling_priority: int
+        scheduling priority in a fair-share queue (None is not sent)
+    share_identifier: str
+        fair-share identifier of the job (None is not sent)
     tags: dict
         dictionary of key, value pairs that will be used to tag each job
+        (read-only, base_tags plus the name tag)
+    timeout: dict
+        dictionary with the attemptDurationSeconds after which AWS Batch
+        terminates an attempt (empty uses the job definition timeout)
 
     Methods
     -------
+    request()
+        Returns the keyword arguments of the submit_job request.
     submit()
         Submits job to AWS Batch job queue for execution.
     """
 
-    def __init__(self, name, job_def, queue, retry_attempts=1):
+    __slots__ = ("array_offset", "array_props", "base_tags", "client_provider",
+        "overrides", "depends_on", "job_def", "job_id", "name", "name_tag",
+        "propagate_tags", "queue", "retry_strategy", "scheduling_priority",
+        "share_identifier", "timeout")
+
+    NAME_TAG = "job"
+
+    def __init__(self, name, job_def, queue, retry_attempts=1,
+        client_provider=None):
         """
         Parameters
         ----------
@@ -47,18 +81,34 @@ class Job:
             the name of the queue the job will be submitted to
         retry_attempts: int, optional
             the number of times to retry a failed job (Default is 1)
+        client_provider: ClientProvider, optional
+            provider of the shared AWS Batch client (default creates one)
         """
 
+        self.array_offset = 0
         self.array_props = {}
+        self.client_provider = client_provider if client_provider \
+            else ClientProvider()
         self.overrides = {}
         self.depends_on = []
         self.job_def = job_def
         self.job_id = ""
         self.name = name
+        self.name_tag = False
         self.propagate_tags = False
         self.queue = queue
         self.retry_strategy = { "attempts": retry_attempts }
-        self.tags = {}
+        self.base_tags = {}
+        self.scheduling_priority = None
+        self.share_identifier = None
+        self.timeout = {}
+
+    @property
+    def tags(self):
+        """Return the tags of the job including the name tag."""
+
+        if self.name_tag: return { **self.base_tags, self.NAME_TAG: self.name }
+        return self.base_tags
 
     def define_arguments(self, args_list):
         """Define additional arguments that are passed to the container 
@@ -70,35 +120,107 @@ class Job:
             list of arguments
         """
 
-        self.overrides["command"] = args_list
+        self.overrides = { **self.overrides, "command": args_list }
 
-    def define_array(self, array_size):
+    def define_array(self, array_size, array_offset=0):
         """Defines an array job with a property of size.
 
         Parameters
         ----------
         array_size: int
             The size of the job array (max is 10,000)
+        array_offset: int, optional
+            global index of the first child of a shard (default is 0)
         """
 
-        self.array_props["size"] = array_size 
+        self.array_props = { **self.array_props, "size": array_size }
+        self.array_offset = array_offset
 
-    def define_dependencies(self, id_list):
+    def define_dependencies(self, id_list, n_to_n_ids=None):
         """Defines a list of job identifiers that the job depends on.
 
         The job will not run until the jobs referenced in the id_list have 
-        completed.
+        completed. Identifiers in n_to_n_ids are array jobs of the same size
+        as this job; each child of this job only waits for the child with the
+        same index (AWS Batch N_TO_N dependency).
 
         Parameters
         ----------
         id_list: list
             list of job identifiers the job depends on
+        n_to_n_ids: list, optional
+            identifiers in id_list that are linked index-wise (default None)
+        """
+
+        n_to_n_ids = set(n_to_n_ids) if n_to_n_ids else set()
+        self.depends_on = self.depends_on + [ 
+            { "jobId": identifier, "type": "N_TO_N" } \
+                if identifier in n_to_n_ids else { "jobId": identifier }
+            for identifier in id_list ]
+
+    def define_environment(self, env_dict):
+        """Define environment variables that are set in the container
+        during the job submission process.
+
+        Parameters
+        ----------
+        env_dict: dict
+            dictionary of environment variable names and values
+        """
+
+        self.overrides = { **self.overrides, "environment": [ 
+            { "name": name, "value": str(value) } 
+            for name, value in env_dict.items() ] }
+
+    def define_resources(self, vcpus=None, memory=None):
+        """Define the number of vCPUs and memory of the container that
+        override the job definition.
+
+        Parameters
+        ----------
+        vcpus: float, optional
+            number of vCPUs (default is None which keeps the job definition's)
+        memory: int, optional
+            memory in MiB (default is None which keeps the job definition's)
+        """
+
+        requirements = []
+        if vcpus: requirements.append({ "type": "VCPU", "value": f"{vcpus:g}" })
+        if memory: 
+            requirements.append({ "type": "MEMORY", "value": str(int(memory)) })
+        if requirements:
+            self.overrides = { **self.overrides, 
+                "resourceRequirements": requirements }
+
+    def define_timeout(self, seconds):
+        """Define the number of seconds after which an attempt of the job
+        is terminated.
+
+        Parameters
+        ----------
+        seconds: int
+            attempt duration in seconds (AWS Batch minimum is 60)
         """
 
-        for identifier in id_list:
-            self.depends_on.append({ "jobId": identifier })       
+        self.timeout = { "attemptDurationSeconds": int(seconds) }
 
-    def define_tags(self, tag_dict, will_propagate=False):
+    def define_scheduling(self, priority=None, share_identifier=None):
+        """Define the scheduling priority and share identifier of the job
+        for queues with a fair-share scheduling policy.
+
+        Parameters
+        ----------
+        priority: int, optional
+            scheduling priority from 0 to 9999, higher runs first (default is
+            None which is not sent)
+        share_identifier: str, optional
+            fair-share identifier (default is None which is not sent)
+        """
+
+        self.scheduling_priority = priority
+        self.share_identifier = share_identifier
+
+    def define_tags(self, tag_dict, will_propagate=False, name_tag=False):
         """Defines the tags used for the job and whether they will propagate
         to the ECS task associated with the job.
 
@@ -108,11 +230,36 @@ class Job:
             dictionary of key, value pairs that are associated with the job
         will_propagate: bool, optional
             whether the job will propagate to the ECS task (default is False)
+        name_tag: bool, optional
+            whether the job name is added under the 'job' key when the job is
+            submitted so tag_dict can be shared (default is False)
         """
 
-        self.tags = tag_dict
+        self.base_tags = tag_dict
+        self.name_tag = name_tag
         self.propagate_tags = will_propagate
 
+    def request(self):
+        """Return the keyword arguments of the submit_job request."""
+
+        request = {
+            "jobName": self.name,
+            "jobDefinition": self.job_def,
+            "jobQueue": self.queue,
+            "arrayProperties": self.array_props,
+            "containerOverrides": self.overrides,
+            "retryStrategy": self.retry_strategy,
+            "dependsOn": self.depends_on,
+            "tags": self.tags,
+            "propagateTags": self.propagate_tags
+        }
+        if self.timeout: request["timeout"] = self.timeout
+        if self.scheduling_priority is not None:
+            request["schedulingPriorityOverride"] = self.scheduling_priority
+        if self.share_identifier:
+            request["shareIdentifier"] = self.share_identifier
+        return request
+
     def submit(self):
         """Submits job to AWS Batch job queue.
 
@@ -128,18 +275,8 @@ class Job:
         """
 
         try:
-            batch = boto3.client("batch")
-            response = batch.submit_job(
-                jobName=self.name,
-                jobDefinition=self.job_def,
-                jobQueue=self.queue,
-                arrayProperties=self.array_props,
-                containerOverrides=self.overrides,
-                retryStrategy=self.retry_strategy,
-                dependsOn=self.depends_on,
-                tags=self.tags,
-                propagateTags=self.propagate_tags
-            )
+            response = self.client_provider.call("batch", "submit_job",
+                **self.request())
             self.job_id = response["jobId"]
             return response["jobId"]
         except botocore.exceptions.ClientError as error:
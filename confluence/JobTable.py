@@ -0,0 +1,182 @@
+# Standard imports
+from collections.abc import Sequence
+
+# Local imports
+from confluence.Job import Job
+
+class JobTable(Sequence):
+    """
+    A class that stores the jobs of an Algorithm compactly.
+
+    Every job of an Algorithm is identical apart from its name, its shard and
+    (once submitted) its identifier, so the table keeps one spec per shard
+    and materializes Job objects only when they are accessed. Jobs share the
+    overrides, array properties, retry strategy and tags of their spec, and
+    submitted jobs of a shard share one list of dependencies. Memory and
+    planning time grow with the number of shards rather than the number of
+    jobs.
+
+    Rows are numbered job by job and shard by shard. Rows of jobs reused
+    from a previous run are left out.
+
+    Attributes
+    ----------
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client passed to each Job
+    depends_on: dict
+        dictionary of array offset keys and dependency list values shared by
+        the submitted jobs of a shard
+    job_def: str
+        the name of the job definition that jobs are created from
+    job_ids: dict
+        dictionary of job name keys and job identifier values for submitted
+        jobs
+    name: str
+        name prefix of the jobs ('{stage}_{algorithm}')
+    queue: str
+        the name of the queue jobs are submitted to
+    retry_strategy: dict
+        retry strategy shared by every job
+    rows: range or list
+        row numbers of the jobs in the table
+    scheduling_priority: int
+        scheduling priority shared by every job (None is not sent)
+    share_identifier: str
+        fair-share identifier shared by every job (None is not sent)
+    specs: list
+        list of (array offset, array size, overrides, array properties)
+        tuples, one for each shard
+    tags: dict
+        tags shared by every job (the job name is added on submission)
+    timeout: dict
+        attempt timeout shared by every job
+
+    Methods
+    -------
+    job_name(row)
+        returns the name of the job in a row
+    record(job)
+        stores the identifier and dependencies of a submitted job
+    """
+
+    def __init__(self, name, job_def, queue, shards, overrides,
+        client_provider, num_jobs=1, reused=None, offset_variable=None,
+        retry_strategy=None, timeout=None):
+        """
+        Parameters
+        ----------
+        name: str
+            name prefix of the jobs
+        job_def: str
+            the name of the job definition that jobs are created from
+        queue: str
+            the name of the queue jobs are submitted to
+        shards: list
+            list of (array offset, array size) tuples for each job
+        overrides: dict
+            container overrides shared by every job
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        num_jobs: int, optional
+            number of jobs (default is 1)
+        reused: dict, optional
+            dictionary of job name keys for jobs that are left out
+        offset_variable: str, optional
+            environment variable set to the array offset of each shard when
+            there is more than one shard (default is None)
+        retry_strategy: dict, optional
+            retry strategy shared by every job (default makes one attempt)
+        timeout: dict, optional
+            attempt timeout shared by every job (default is None)
+        """
+
+        self.client_provider = client_provider
+        self.depends_on = {}
+        self.job_def = job_def
+        self.job_ids = {}
+        self.name = name
+        self.queue = queue
+        self.retry_strategy = retry_strategy if retry_strategy \
+            else { "attempts": 1 }
+        self.scheduling_priority = None
+        self.share_identifier = None
+        self.specs = []
+        self.tags = {}
+        self.timeout = timeout if timeout else {}
+        for offset, size in shards:
+            spec_overrides = overrides
+            if len(shards) > 1 and offset_variable:
+                spec_overrides = { **overrides, "environment": [
+                    { "name": offset_variable, "value": str(offset) } ] }
+            self.specs.append((offset, size, spec_overrides,
+                { "size": size } if size > 0 else {}))
+        self.rows = range(num_jobs * len(self.specs))
+        if reused:
+            self.rows = [ row for row in self.rows \
+                          if self.job_name(row) not in reused ]
+
+    def __len__(self):
+        """Return the number of jobs in the table."""
+
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        """Return the Job (or list of Jobs for a slice) at an index."""
+
+        if isinstance(index, slice):
+            return [ self.materialize(row) for row in self.rows[index] ]
+        return self.materialize(self.rows[index])
+
+    def __iter__(self):
+        """Yield a Job for each row."""
+
+        for row in self.rows:
+            yield self.materialize(row)
+
+    def job_name(self, row):
+        """Return the name of the job in a row.
+
+        Parameters
+        ----------
+        row: int
+            row number of the job
+        """
+
+        i, k = divmod(row, len(self.specs))
+        return f"{self.name}_{i}" if len(self.specs) == 1 \
+            else f"{self.name}_{i}_{k}"
+
+    def materialize(self, row):
+        """Return a Job for a row that shares the spec of its shard.
+
+        Parameters
+        ----------
+        row: int
+            row number of the job
+        """
+
+        offset, size, overrides, array_props = self.specs[row % len(self.specs)]
+        job = Job(name=self.job_name(row), job_def=self.job_def,
+            queue=self.queue, client_provider=self.client_provider)
+        job.overrides = overrides
+        job.array_props = array_props
+        job.array_offset = offset
+        job.retry_strategy = self.retry_strategy
+        job.timeout = self.timeout
+        job.define_scheduling(self.scheduling_priority, self.share_identifier)
+        job.define_tags(self.tags, will_propagate=True, name_tag=True)
+        job.job_id = self.job_ids.get(job.name, "")
+        if job.job_id: job.depends_on = self.depends_on.get(offset, [])
+        return job
+
+    def record(self, job):
+        """Store the identifier and dependencies of a submitted job.
+
+        Parameters
+        ----------
+        job: Job
+            Job object of the table that has been submitted
+        """
+
+        self.job_ids[job.name] = job.job_id
+        self.depends_on[job.array_offset] = job.depends_on
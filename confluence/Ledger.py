@@ -0,0 +1,232 @@
+# Standard imports
+import csv
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import threading
+
+class Ledger:
+    """
+    A class that records job submissions in an append-only JSON Lines file.
+
+    One record is appended and flushed to disk as soon as each job is
+    submitted so the record survives a crash mid-run. The CSV submission file
+    is a compact view of the ledger that can be reproduced at any time.
+
+    A ledger that rotates starts a new file for its run: a ledger file left
+    by a previous run is renamed with the timestamp of its first record
+    before the first record of this run is written, so records of different
+    runs are never mixed.
+
+    Every record is stamped with the identifier of the run that wrote it so a
+    ledger that is resumed or repaired in place still tells its runs apart.
+
+    Attributes
+    ----------
+    file: file object
+        ledger file opened in append mode (None until the first record)
+    ledger_file: Path
+        path to the ledger file (None disables the ledger)
+    lock: Lock
+        lock that serializes writes from concurrent submissions
+    rotate: bool
+        whether a previous run's ledger file is rotated before the first
+        record is written
+    run_id: str
+        identifier of the run stamped on every record (the time of the first
+        record unless it continues a previous run)
+
+    Methods
+    -------
+    append(record)
+        appends a record dictionary to the ledger file
+    close()
+        closes the ledger file
+    rotate_file()
+        renames a previous run's ledger file out of the way
+    read(ledger_file)
+        returns the list of records in a ledger file
+    read_run(ledger_file)
+        returns the identifier and records of the latest run in a ledger file
+    record(stage, algorithm, job, fields)
+        appends a record for a submitted job
+    write_csv(ledger_file, csv_file)
+        writes the compact CSV view of a ledger file
+    """
+
+    FIELDNAMES = ["stage", "algorithm", "job_name", "job_id"]
+
+    def __init__(self, ledger_file=None, rotate=False):
+        """
+        Parameters
+        ----------
+        ledger_file: Path, optional
+            path to the ledger file (default is None which disables the
+            ledger)
+        rotate: bool, optional
+            whether a previous run's ledger file is rotated before the first
+            record is written (default is False which appends to it)
+        """
+
+        self.file = None
+        self.ledger_file = Path(ledger_file) if ledger_file else None
+        self.lock = threading.Lock()
+        self.rotate = rotate
+        self.run_id = None
+
+    def record(self, stage, algorithm, job, **fields):
+        """Append a record for a submitted job and flush it to disk.
+
+        Parameters
+        ----------
+        stage: str
+            name of the stage the job belongs to
+        algorithm: str
+            name of the algorithm the job belongs to
+        job: Job
+            Job object that has been submitted
+        fields: dict, optional
+            additional fields of the record (e.g. repair_of)
+        """
+
+        if not self.ledger_file: return
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "stage": stage,
+            "algorithm": algorithm,
+            "job_name": job.name,
+            "job_id": job.job_id,
+            "array_size": job.array_props.get("size", 0),
+            "array_offset": job.array_offset,
+            "depends_on": [ dep["jobId"] for dep in job.depends_on ],
+            **fields
+        }
+        self.append(record)
+
+    def append(self, record):
+        """Append a record dictionary stamped with the run identifier to the
+        ledger file and flush it to disk.
+
+        Parameters
+        ----------
+        record: dict
+            dictionary of JSON serializable values
+        """
+
+        if not self.ledger_file: return
+        with self.lock:
+            if self.file is None:
+                if self.rotate: self.rotate_file()
+                if self.run_id is None:
+                    self.run_id = datetime.now(timezone.utc).isoformat()
+                self.file = open(self.ledger_file, mode='a')
+            line = json.dumps({ **record, "run_id": self.run_id }) + "\n"
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def rotate_file(self):
+        """Rename a non-empty ledger file of a previous run to
+        '{stem}.{timestamp}{suffix}' using the timestamp of its first record
+        (or its modification time) and stop rotating.
+
+        Returns
+        -------
+        Path
+            path of the rotated file (None if nothing was rotated)
+        """
+
+        self.rotate = False
+        if not self.ledger_file.exists() or \
+            self.ledger_file.stat().st_size == 0: return None
+        records = self.read(self.ledger_file)
+        timestamp = records[0]["timestamp"] if records else \
+            datetime.fromtimestamp(self.ledger_file.stat().st_mtime,
+                timezone.utc).isoformat()
+        stamp = timestamp.replace(":", "-")
+        rotated = self.ledger_file.with_name(
+            f"{self.ledger_file.stem}.{stamp}{self.ledger_file.suffix}")
+        os.replace(self.ledger_file, rotated)
+        return rotated
+
+    def close(self):
+        """Close the ledger file."""
+
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    @staticmethod
+    def read(ledger_file):
+        """Return the list of records in a ledger file.
+
+        A partially written last line (e.g. from a crash) is ignored.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger file
+        """
+
+        records = []
+        with open(ledger_file) as jsonl_file:
+            for line in jsonl_file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    @staticmethod
+    def read_run(ledger_file):
+        """Return the identifier and the list of records of the latest run in
+        a ledger file.
+
+        The latest run is the run of the last record. Records written before
+        runs were stamped belong to a run identified by the timestamp of the
+        first record.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger file
+
+        Returns
+        -------
+        tuple
+            run identifier (None if the ledger is empty) and list of records
+        """
+
+        records = Ledger.read(ledger_file)
+        if not records: return None, []
+        legacy_id = records[0].get("timestamp")
+        run_id = records[-1].get("run_id", legacy_id)
+        return run_id, [ record for record in records \
+                         if record.get("run_id", legacy_id) == run_id ]
+
+    @staticmethod
+    def write_csv(ledger_file, csv_file):
+        """Write the compact CSV view of a ledger file.
+
+        The following information is written for the latest record of each
+        job name: stage name, algorithm name, job name, and job identifier.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger file
+        csv_file: Path
+            path to the CSV file that is written
+        """
+
+        latest = {}
+        for record in Ledger.read(ledger_file):
+            latest[record["job_name"]] = record
+        with open(csv_file, mode='w') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=Ledger.FIELDNAMES,
+                extrasaction="ignore")
+            writer.writeheader()
+            for record in latest.values():
+                writer.writerow(record)
@@ -0,0 +1,321 @@
+# Standard imports
+import json
+import os
+from pathlib import Path
+import threading
+import time
+
+# Third-party imports
+from botocore import xform_name
+
+# Local imports
+from confluence.RateLimiter import RateLimiter
+
+class Metrics:
+    """
+    A class that instruments AWS API calls and job submission.
+
+    Each AWS client created by ClientProvider is registered with botocore
+    event hooks that time every API call and count errors, throttling
+    responses and botocore retries per operation. Stages report their
+    submission wall time and number of submitted jobs. The summary is
+    written as JSON and as a Prometheus textfile (for the node exporter
+    textfile collector) so runs can be compared.
+
+    Attributes
+    ----------
+    buckets: tuple
+        upper bounds in seconds of the latency histogram buckets
+    calls: dict
+        dictionary of operation name keys and dictionary values with count,
+        errors, throttles, retries and latencies keys
+    clock: function
+        function that returns the current time in seconds
+    lock: Lock
+        lock that guards counters updated from concurrent calls
+    stages: dict
+        dictionary of stage name keys and dictionary values with start, end
+        and jobs keys
+    start: float
+        clock value when the Metrics object was created
+
+    Methods
+    -------
+    register(client)
+        registers event hooks on a boto3 client
+    start_stage(stage)
+        records the start of a stage submission
+    finish_stage(stage, jobs)
+        records submitted jobs and the end of a stage submission
+    summary(limiter)
+        returns the metrics as a dictionary
+    write(path, limiter)
+        writes the JSON summary and Prometheus textfile
+    """
+
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=BUCKETS, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        buckets: tuple, optional
+            upper bounds in seconds of the latency histogram buckets
+        clock: function, optional
+            function that returns the current time in seconds
+        """
+
+        self.buckets = buckets
+        self.calls = {}
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.start = clock()
+
+    def register(self, client):
+        """Register event hooks that time and count calls of a client.
+
+        Parameters
+        ----------
+        client: botocore.client.BaseClient
+            boto3 client to instrument
+        """
+
+        events = client.meta.events
+        events.register("before-parameter-build", self.before_call)
+        events.register("after-call", self.after_call)
+        events.register("after-call-error", self.after_call_error)
+
+    def before_call(self, model, context, **kwargs):
+        """Store the operation name and start time in the request context."""
+
+        context["metrics_operation"] = xform_name(model.name)
+        context["metrics_start"] = self.clock()
+
+    def after_call(self, http_response, parsed, model, context, **kwargs):
+        """Record the latency and outcome of a call that got a response."""
+
+        error = parsed.get("Error", {}).get("Code") \
+            if isinstance(parsed, dict) else None
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0) \
+            if isinstance(parsed, dict) else 0
+        status = getattr(http_response, "status_code", 200)
+        if not isinstance(status, int): status = 200
+        throttled = error in RateLimiter.THROTTLE_CODES or status == 429
+        self.observe(xform_name(model.name), context,
+            error=bool(error) or status >= 400, throttled=throttled,
+            retries=retries)
+
+    def after_call_error(self, exception, context, **kwargs):
+        """Record the latency of a call that failed without a response."""
+
+        self.observe(context.get("metrics_operation", "unknown"), context,
+            error=True)
+
+    def observe(self, operation, context, error=False, throttled=False,
+        retries=0):
+        """Record one call of an operation.
+
+        Parameters
+        ----------
+        operation: str
+            name of the client method (e.g. 'submit_job')
+        context: dict
+            request context holding the call start time
+        error: bool, optional
+            whether the call failed
+        throttled: bool, optional
+            whether the call was throttled
+        retries: int, optional
+            number of retries made by botocore
+        """
+
+        now = self.clock()
+        latency = now - context.get("metrics_start", now)
+        with self.lock:
+            call = self.calls.setdefault(operation, { "count": 0, "errors": 0,
+                "throttles": 0, "retries": 0, "latencies": [] })
+            call["count"] += 1
+            call["errors"] += int(error)
+            call["throttles"] += int(throttled)
+            call["retries"] += retries
+            call["latencies"].append(latency)
+
+    def start_stage(self, stage):
+        """Record the start of a stage submission; later calls for the same
+        stage are ignored.
+
+        Parameters
+        ----------
+        stage: str
+            name of the stage
+        """
+
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = { "start": self.clock(), "end": None,
+                    "jobs": 0 }
+
+    def finish_stage(self, stage, jobs):
+        """Record submitted jobs and the end of a stage submission; a stage
+        may be finished once per algorithm.
+
+        Parameters
+        ----------
+        stage: str
+            name of the stage
+        jobs: int
+            number of jobs submitted
+        """
+
+        self.start_stage(stage)
+        with self.lock:
+            self.stages[stage]["end"] = self.clock()
+            self.stages[stage]["jobs"] += jobs
+
+    def summary(self, limiter=None):
+        """Return the metrics as a dictionary.
+
+        Parameters
+        ----------
+        limiter: RateLimiter, optional
+            rate limiter whose retry and throttle counts are included
+        """
+
+        now = self.clock()
+        with self.lock:
+            calls = {}
+            for operation, call in self.calls.items():
+                latencies = sorted(call["latencies"])
+                calls[operation] = {
+                    "count": call["count"],
+                    "errors": call["errors"],
+                    "throttles": call["throttles"],
+                    "retries": call["retries"],
+                    "latency_sum": sum(latencies),
+                    "latency_p50": self.percentile(latencies, 0.5),
+                    "latency_p95": self.percentile(latencies, 0.95),
+                    "latency_max": latencies[-1] if latencies else 0.0,
+                    "buckets": { str(bound): sum(1 for latency in latencies \
+                                    if latency <= bound) \
+                                 for bound in self.buckets }
+                }
+            stages = {}
+            for name, stage in self.stages.items():
+                seconds = (stage["end"] if stage["end"] else now) \
+                    - stage["start"]
+                stages[name] = {
+                    "seconds": seconds,
+                    "jobs": stage["jobs"],
+                    "jobs_per_second": stage["jobs"] / seconds \
+                        if seconds > 0 else 0.0
+                }
+
+        jobs = sum(stage["jobs"] for stage in stages.values())
+        seconds = now - self.start
+        return {
+            "seconds": seconds,
+            "jobs": jobs,
+            "jobs_per_second": jobs / seconds if seconds > 0 else 0.0,
+            "limiter_retries": limiter.retries if limiter else 0,
+            "limiter_throttles": limiter.throttles if limiter else 0,
+            "calls": calls,
+            "stages": stages
+        }
+
+    @staticmethod
+    def percentile(values, fraction):
+        """Return the nearest-rank percentile of a sorted list."""
+
+        if not values: return 0.0
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def prometheus(self, summary):
+        """Return a summary in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        summary: dict
+            dictionary returned by summary()
+        """
+
+        lines = [
+            "# HELP confluence_api_call_duration_seconds AWS API call latency.",
+            "# TYPE confluence_api_call_duration_seconds histogram"
+        ]
+        for operation, call in summary["calls"].items():
+            label = f'operation="{operation}"'
+            for bound, count in call["buckets"].items():
+                lines.append(f'confluence_api_call_duration_seconds_bucket'
+                    f'{{{label},le="{bound}"}} {count}')
+            lines.append(f'confluence_api_call_duration_seconds_bucket'
+                f'{{{label},le="+Inf"}} {call["count"]}')
+            lines.append(f'confluence_api_call_duration_seconds_sum'
+                f'{{{label}}} {call["latency_sum"]}')
+            lines.append(f'confluence_api_call_duration_seconds_count'
+                f'{{{label}}} {call["count"]}')
+        for name, description in (("errors", "AWS API calls that failed."),
+            ("throttles", "AWS API calls that were throttled."),
+            ("retries", "AWS API retries made by botocore.")):
+            lines.append(f"# HELP confluence_api_{name}_total {description}")
+            lines.append(f"# TYPE confluence_api_{name}_total counter")
+            for operation, call in summary["calls"].items():
+                lines.append(f'confluence_api_{name}_total'
+                    f'{{operation="{operation}"}} {call[name]}')
+        lines.extend([
+            "# HELP confluence_limiter_retries_total Calls retried by the "
+                "rate limiter.",
+            "# TYPE confluence_limiter_retries_total counter",
+            f"confluence_limiter_retries_total {summary['limiter_retries']}",
+            "# HELP confluence_limiter_throttles_total Throttling errors seen "
+                "by the rate limiter.",
+            "# TYPE confluence_limiter_throttles_total counter",
+            f"confluence_limiter_throttles_total "
+                f"{summary['limiter_throttles']}"
+        ])
+        for name, key, description in (
+            ("stage_submission_seconds", "seconds", "Stage submission wall "
+                "time."),
+            ("stage_jobs", "jobs", "Jobs submitted by a stage."),
+            ("stage_jobs_per_second", "jobs_per_second", "Stage submission "
+                "throughput.")):
+            lines.append(f"# HELP confluence_{name} {description}")
+            lines.append(f"# TYPE confluence_{name} gauge")
+            for stage, values in summary["stages"].items():
+                lines.append(f'confluence_{name}{{stage="{stage}"}} '
+                    f'{values[key]}')
+        lines.extend([
+            "# HELP confluence_run_seconds Run wall time.",
+            "# TYPE confluence_run_seconds gauge",
+            f"confluence_run_seconds {summary['seconds']}",
+            "# HELP confluence_run_jobs_per_second Run submission throughput.",
+            "# TYPE confluence_run_jobs_per_second gauge",
+            f"confluence_run_jobs_per_second {summary['jobs_per_second']}"
+        ])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, limiter=None):
+        """Write the JSON summary and the Prometheus textfile.
+
+        The JSON summary is written to path with a '.metrics.json' suffix and
+        the textfile with a '.prom' suffix. Files are replaced atomically so a
+        collector never reads a partial file.
+
+        Parameters
+        ----------
+        path: Path
+            path the output file names are derived from
+        limiter: RateLimiter, optional
+            rate limiter whose retry and throttle counts are included
+        """
+
+        summary = self.summary(limiter)
+        path = Path(path)
+        outputs = ((path.with_suffix(".metrics.json"),
+                    json.dumps(summary, indent=2) + "\n"),
+                   (path.with_suffix(".prom"), self.prometheus(summary)))
+        for output, text in outputs:
+            temp = output.with_name(output.name + ".tmp")
+            with open(temp, "w") as metrics_file:
+                metrics_file.write(text)
+            os.replace(temp, output)
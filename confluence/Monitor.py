@@ -0,0 +1,274 @@
+# Standard imports
+import time
+
+# Local imports
+from confluence.batch_api import describe_jobs
+from confluence.Ledger import Ledger
+
+class Monitor:
+    """
+    A class that tracks the progress of jobs submitted to AWS Batch.
+
+    Jobs are polled with batched describe_jobs calls and only jobs that have
+    not reached a terminal state are described again. Array jobs are tracked
+    through the parent's arrayProperties.statusSummary so array children are
+    never described. The poll interval starts at min_interval and grows by
+    backoff up to max_interval while nothing changes.
+
+    Attributes
+    ----------
+    backoff: float
+        factor the poll interval grows by when no job changed status
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client
+    interval: float
+        number of seconds until the next poll
+    jobs: dict
+        dictionary of job identifier keys and dictionary values with stage,
+        algorithm, array_size, status and summary keys
+    max_interval: float
+        maximum number of seconds between polls
+    min_interval: float
+        minimum number of seconds between polls
+
+    Methods
+    -------
+    exit_code()
+        returns 0 if every job succeeded, otherwise 1
+    from_confluence(confluence)
+        creates a Monitor for the jobs of a Confluence object
+    from_ledger(ledger_file, client_provider)
+        creates a Monitor for the jobs recorded in a ledger
+    is_finished()
+        returns whether every job reached a terminal state
+    log_progress(logger)
+        logs per-stage and per-algorithm progress
+    poll()
+        updates the status of every job that is not finished
+    progress()
+        returns child status counts per stage and algorithm
+    wait(logger)
+        polls until every job reached a terminal state
+    """
+
+    TERMINAL_STATUS = ("SUCCEEDED", "FAILED", "UNKNOWN")
+    STATUS = ("SUBMITTED", "PENDING", "RUNNABLE", "STARTING", "RUNNING",
+        "SUCCEEDED", "FAILED", "UNKNOWN")
+
+    def __init__(self, client_provider, jobs, min_interval=30,
+        max_interval=300, backoff=1.5):
+        """
+        Parameters
+        ----------
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        jobs: list
+            list of dictionaries with job_id, stage, algorithm and array_size
+            keys
+        min_interval: float, optional
+            minimum number of seconds between polls (default is 30)
+        max_interval: float, optional
+            maximum number of seconds between polls (default is 300)
+        backoff: float, optional
+            factor the poll interval grows by (default is 1.5)
+        """
+
+        self.backoff = backoff
+        self.client_provider = client_provider
+        self.interval = min_interval
+        self.jobs = {}
+        for job in jobs:
+            self.jobs[job["job_id"]] = {
+                "stage": job["stage"],
+                "algorithm": job["algorithm"],
+                "array_size": job.get("array_size", 0),
+                "status": "SUBMITTED",
+                "summary": {}
+            }
+        self.max_interval = max_interval
+        self.min_interval = min_interval
+
+    @classmethod
+    def from_confluence(cls, confluence, **kwargs):
+        """Create a Monitor for every job of a Confluence object.
+
+        Parameters
+        ----------
+        confluence: Confluence
+            Confluence object whose stages have been executed
+        """
+
+        jobs = [ { "job_id": job_id, "stage": stage.name,
+                   "algorithm": alg.name,
+                   "array_size": alg.shards.get(job_id, 
+                       (0, alg.array_size))[1] }
+                 for stage in confluence.stages for alg in stage.algorithms
+                 for job_id in alg.job_ids ]
+        fan_in = confluence.fan_in
+        jobs.extend([ { "job_id": job.job_id,
+                        "stage": fan_in.stages[job.name], "algorithm": "join",
+                        "array_size": job.array_props.get("size", 0) }
+                      for job in fan_in.jobs ])
+        return cls(confluence.client_provider, jobs, **kwargs)
+
+    @classmethod
+    def from_ledger(cls, ledger_file, client_provider, **kwargs):
+        """Create a Monitor for the latest record of each job of the latest
+        run in a ledger.
+
+        Jobs whose failed children were re-run by a repair job are left out
+        as their replacements are monitored instead.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger file
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        """
+
+        latest = {}
+        _, records = Ledger.read_run(ledger_file)
+        for record in records:
+            latest[record["job_name"]] = record
+        repaired = { record["repair_of"] for record in records \
+                     if record.get("index_map") }
+        return cls(client_provider, [ record for record in latest.values() \
+            if record["job_id"] not in repaired ], **kwargs)
+
+    def poll(self):
+        """Describe every job that is not finished and update its status.
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+
+        Returns
+        -------
+        bool
+            whether any job changed status or array progress
+        """
+
+        job_ids = [ job_id for job_id, job in self.jobs.items() \
+                    if job["status"] not in self.TERMINAL_STATUS ]
+        if not job_ids: return False
+        descriptions = describe_jobs(self.client_provider, job_ids)
+
+        # Jobs AWS Batch no longer knows about cannot be confirmed
+        for job_id in job_ids:
+            if job_id not in descriptions:
+                descriptions[job_id] = { "status": "UNKNOWN" }
+
+        changed = False
+        for job_id, description in descriptions.items():
+            job = self.jobs[job_id]
+            summary = description.get("arrayProperties", {}) \
+                .get("statusSummary", {})
+            if description["status"] != job["status"] \
+                or summary != job["summary"]:
+                changed = True
+            job["status"] = description["status"]
+            job["summary"] = summary
+        return changed
+
+    def progress(self):
+        """Return child status counts per stage and per algorithm.
+
+        An array job contributes its statusSummary counts and any other job
+        contributes a count of 1 for its status.
+
+        Returns
+        -------
+        dict
+            dictionary of stage name keys and dictionary values of algorithm
+            name keys and dictionary values of status counts
+        """
+
+        progress = {}
+        for job in self.jobs.values():
+            counts = progress.setdefault(job["stage"], {}) \
+                .setdefault(job["algorithm"],
+                    { status: 0 for status in self.STATUS })
+            if job["array_size"] > 0 and job["summary"]:
+                for status, count in job["summary"].items():
+                    counts[status] = counts.get(status, 0) + count
+            elif job["array_size"] > 0:
+                counts[job["status"]] += job["array_size"]
+            else:
+                counts[job["status"]] += 1
+        return progress
+
+    def log_progress(self, logger):
+        """Log per-stage and per-algorithm progress.
+
+        Parameters
+        ----------
+        logger: Logger
+            logger object to write status with
+        """
+
+        for stage, algorithms in self.progress().items():
+            stage_total = sum(sum(counts.values()) for counts \
+                in algorithms.values())
+            stage_done = sum(counts["SUCCEEDED"] for counts \
+                in algorithms.values())
+            logger.info(f"{stage}: {stage_done}/{stage_total} succeeded.")
+            for alg, counts in algorithms.items():
+                status = ", ".join([ f"{status}={count}" for status, count \
+                    in counts.items() if count > 0 ])
+                logger.info(f"  {alg}: {status}")
+
+    def is_finished(self):
+        """Return whether every job reached a terminal state."""
+
+        return all(job["status"] in self.TERMINAL_STATUS \
+            for job in self.jobs.values())
+
+    def exit_code(self):
+        """Return 0 if every job succeeded, otherwise 1."""
+
+        return 0 if all(job["status"] == "SUCCEEDED" \
+            for job in self.jobs.values()) else 1
+
+    def wait(self, logger, sleep=time.sleep):
+        """Poll until every job reached a terminal state.
+
+        The poll interval is reset to min_interval whenever a job changes
+        status and otherwise grows by backoff up to max_interval.
+
+        Parameters
+        ----------
+        logger: Logger
+            logger object to write status with
+        sleep: function, optional
+            function used to wait between polls (default is time.sleep)
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+
+        Returns
+        -------
+        int
+            0 if every job succeeded, otherwise 1
+        """
+
+        while True:
+            if self.poll():
+                self.log_progress(logger)
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff,
+                    self.max_interval)
+            if self.is_finished(): break
+            sleep(self.interval)
+
+        failed = [ job_id for job_id, job in self.jobs.items() \
+                   if job["status"] != "SUCCEEDED" ]
+        if failed:
+            logger.error(f"Run FAILED. Failed jobs: {', '.join(failed)}.")
+        else:
+            logger.info("Run SUCCEEDED.")
+        return self.exit_code()
@@ -0,0 +1,203 @@
+# Standard imports
+import itertools
+import logging
+import threading
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Confluence import Confluence
+from confluence.Simulator import Simulator
+
+class PlanBatchClient:
+    """
+    A class that stands in for the AWS Batch client when planning a run.
+
+    Jobs are accepted and given a sequential identifier; nothing is sent to
+    AWS.
+
+    Attributes
+    ----------
+    counter: iterator
+        iterator of job numbers
+    lock: Lock
+        lock that keeps job numbers unique across threads
+
+    Methods
+    -------
+    submit_job(**kwargs)
+        returns a planned job identifier
+    """
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def submit_job(self, **kwargs):
+        """Return a planned job identifier for a job submission."""
+
+        with self.lock:
+            number = next(self.counter)
+        return { "jobName": kwargs["jobName"], "jobId": f"plan-{number}" }
+
+class PlanProvider(ClientProvider):
+    """
+    A ClientProvider that never talks to AWS.
+
+    The AWS Batch client is replaced by a PlanBatchClient and calls are not
+    rate limited.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.clients["batch"] = PlanBatchClient()
+
+    def client(self, service):
+        """Return the planning client for AWS Batch.
+
+        Raises
+        ------
+        ValueError
+            if a service other than AWS Batch is requested
+        """
+
+        if service not in self.clients:
+            raise ValueError(f"No planning client for the '{service}' service.")
+        return self.clients[service]
+
+    def call(self, service, operation, **kwargs):
+        """Call an operation of a planning client without rate limiting."""
+
+        return getattr(self.client(service), operation)(**kwargs)
+
+class Plan:
+    """
+    A class that builds the Stage, Algorithm and Job graph of a configuration
+    without touching AWS and estimates how the run will behave.
+
+    Attributes
+    ----------
+    confluence: Confluence
+        Confluence object whose stages were executed against PlanProvider
+    jobs: list
+        list of dictionaries with job_id, name, stage, algorithm, array_size,
+        depends_on, runtime and vcpus keys for every planned job, including
+        join jobs inserted for wide dependencies
+
+    Methods
+    -------
+    report(logger)
+        logs the job list, dependency graph and simulation results
+    simulate()
+        runs the discrete-event simulation of the planned jobs
+    """
+
+    JOIN_RUNTIME = 30
+
+    def __init__(self, config, logger):
+        """
+        Parameters
+        ----------
+        config: Config or Path
+            validated configuration or path to YAML file that contains
+            configuration data
+        logger: Logger
+            logger object to write status with
+        """
+
+        self.confluence = Confluence(config, client_provider=PlanProvider())
+        self.confluence.ledger.ledger_file = None
+        self.confluence.submission_file = None
+        self.confluence.create_stages()
+        # Nothing is submitted, so submission status is not logged
+        quiet = logging.getLogger(f"{logger.name}.plan")
+        quiet.setLevel(logging.WARNING)
+        self.confluence.execute_stages(quiet)
+        self.jobs = self.collect_jobs()
+
+    def collect_jobs(self):
+        """Return a dictionary for every job of the planned Confluence run."""
+
+        stages = self.confluence.config_data["stages"]
+        jobs = []
+        for stage in self.confluence.stages:
+            for alg in stage.algorithms:
+                alg_dict = stages[stage.name][alg.name]
+                for job in alg.jobs:
+                    jobs.append({
+                        "job_id": job.job_id,
+                        "name": job.name,
+                        "stage": stage.name,
+                        "algorithm": alg.name,
+                        "array_size": job.array_props.get("size", 0),
+                        "depends_on": job.depends_on,
+                        "runtime": alg_dict.get("runtime",
+                            Simulator.DEFAULT_RUNTIME),
+                        "vcpus": alg_dict.get("vcpus", 1)
+                    })
+
+        fan_in = self.confluence.fan_in
+        fan_in_dict = self.confluence.config_data.get("fan_in", {})
+        for job in fan_in.jobs:
+            jobs.append({
+                "job_id": job.job_id,
+                "name": job.name,
+                "stage": fan_in.stages[job.name],
+                "algorithm": "join",
+                "array_size": job.array_props.get("size", 0),
+                "depends_on": job.depends_on,
+                "runtime": fan_in_dict.get("runtime", self.JOIN_RUNTIME),
+                "vcpus": 1
+            })
+        return jobs
+
+    def simulate(self, join_runtime=None):
+        """Run the discrete-event simulation of the planned jobs.
+
+        Parameters
+        ----------
+        join_runtime: float, optional
+            runtime of join jobs in seconds (default is the planned runtime)
+        """
+
+        jobs = self.jobs
+        if join_runtime is not None:
+            jobs = [ dict(job, runtime=join_runtime) \
+                        if job["algorithm"] == "join" else job \
+                     for job in self.jobs ]
+        plan_dict = self.confluence.config_data.get("plan", {})
+        simulator = Simulator(jobs,
+            max_vcpus=plan_dict.get("max_vcpus", Simulator.DEFAULT_VCPUS),
+            seed=plan_dict.get("seed", 0))
+        return simulator.run()
+
+    def report(self, logger):
+        """Log the job list, dependency graph and simulation results.
+
+        Parameters
+        ----------
+        logger: Logger
+            logger object to write status with
+        """
+
+        names = { job["job_id"]: job["name"] for job in self.jobs }
+        children = sum(max(job["array_size"], 1) for job in self.jobs)
+        logger.info(f"Planned {len(self.jobs)} jobs ({children} tasks).")
+        for job in self.jobs:
+            deps = [ names[dep["jobId"]] + (" (N_TO_N)" \
+                        if dep.get("type") == "N_TO_N" else "") \
+                     for dep in job["depends_on"] ]
+            logger.info(f"  {job['name']} [array_size={job['array_size']}]"
+                f" <- {', '.join(deps) if deps else '(none)'}")
+
+        results = self.simulate()
+        logger.info(f"Estimated makespan: {results['makespan']:.0f} seconds.")
+        logger.info(f"Peak concurrency: {results['peak_tasks']} tasks, "
+            f"{results['peak_vcpus']} vCPUs.")
+        logger.info(f"Critical path: {' -> '.join(results['critical_path'])}")
+
+        joins = [ job for job in self.jobs if job["algorithm"] == "join" ]
+        if joins:
+            overhead = results["makespan"] - self.simulate(0)["makespan"]
+            tasks = sum(max(job["array_size"], 1) for job in joins)
+            logger.info(f"Join overhead: {len(joins)} jobs ({tasks} "
+                f"tasks) add {overhead:.0f} seconds to the makespan.")
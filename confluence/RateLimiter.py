@@ -0,0 +1,243 @@
+# Standard imports
+import random
+import threading
+import time
+
+# Third-party imports
+import botocore.exceptions
+
+class RateLimiter:
+    """
+    A class that limits the rate of AWS API calls shared by every thread.
+
+    Calls take a token from a token bucket that refills at rate tokens per
+    second. The rate adapts to the API: a throttling error halves it and each
+    successful call increases it a little (additive increase, multiplicative
+    decrease) so throughput stays near the account's API limit. Retryable
+    errors are retried with jittered exponential backoff and every other
+    error is raised immediately.
+
+    Attributes
+    ----------
+    base_delay: float
+        number of seconds of the first backoff
+    burst: float
+        maximum number of tokens in the bucket
+    increase: float
+        calls per second added to the rate after each successful call
+    lock: Lock
+        lock that guards the bucket and rate
+    max_attempts: int
+        maximum number of attempts of a call
+    max_delay: float
+        maximum number of seconds of a backoff
+    max_rate: float
+        maximum number of calls per second
+    min_rate: float
+        minimum number of calls per second
+    rate: float
+        current number of calls per second
+    retries: int
+        number of retried calls
+    throttles: int
+        number of throttling errors
+    tokens: float
+        number of tokens in the bucket
+    updated: float
+        clock value of the last bucket refill
+
+    Methods
+    -------
+    acquire()
+        waits until a token is available and takes it
+    call(function, **kwargs)
+        calls a function under the rate limit, retrying retryable errors
+    from_config(limit_dict)
+        creates a RateLimiter from the 'rate_limit' section of the 'aws'
+        configuration
+    is_retryable(error)
+        returns whether an error can be retried
+    is_throttle(error)
+        returns whether an error is a throttling error
+    """
+
+    THROTTLE_CODES = ("TooManyRequestsException", "ThrottlingException",
+        "Throttling", "ThrottledException", "RequestLimitExceeded",
+        "RequestThrottled", "SlowDown")
+    TRANSIENT_CODES = ("InternalError", "InternalFailure", "InternalServerError",
+        "ServiceUnavailable", "ServiceUnavailableException", "ServerException")
+
+    def __init__(self, rate=10.0, max_rate=50.0, min_rate=0.5, burst=None,
+        increase=0.1, max_attempts=8, base_delay=0.2, max_delay=20.0,
+        clock=time.monotonic, sleep=time.sleep):
+        """
+        Parameters
+        ----------
+        rate: float, optional
+            initial number of calls per second (default is 10)
+        max_rate: float, optional
+            maximum number of calls per second (default is 50)
+        min_rate: float, optional
+            minimum number of calls per second (default is 0.5)
+        burst: float, optional
+            maximum number of tokens in the bucket (default is rate)
+        increase: float, optional
+            calls per second added after each successful call (default is 0.1)
+        max_attempts: int, optional
+            maximum number of attempts of a call (default is 8)
+        base_delay: float, optional
+            number of seconds of the first backoff (default is 0.2)
+        max_delay: float, optional
+            maximum number of seconds of a backoff (default is 20)
+        clock: function, optional
+            function that returns the current time in seconds
+        sleep: function, optional
+            function used to wait
+        """
+
+        self.base_delay = base_delay
+        self.burst = burst if burst else rate
+        self.clock = clock
+        self.increase = increase
+        self.lock = threading.Lock()
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = rate
+        self.retries = 0
+        self.sleep = sleep
+        self.throttles = 0
+        self.tokens = self.burst
+        self.updated = clock()
+
+    @classmethod
+    def from_config(cls, limit_dict):
+        """Create a RateLimiter from configuration data.
+
+        Parameters
+        ----------
+        limit_dict: dict
+            dictionary that may contain rate, max_rate, min_rate, burst,
+            increase, max_attempts, base_delay and max_delay keys
+        """
+
+        keys = ("rate", "max_rate", "min_rate", "burst", "increase",
+            "max_attempts", "base_delay", "max_delay")
+        limit_dict = limit_dict if limit_dict else {}
+        return cls(**{ key: limit_dict[key] for key in keys \
+            if key in limit_dict })
+
+    @classmethod
+    def is_throttle(cls, error):
+        """Return whether an error is a throttling error.
+
+        Parameters
+        ----------
+        error: Exception
+            error raised by an AWS API call
+        """
+
+        if not isinstance(error, botocore.exceptions.ClientError): return False
+        return error.response.get("Error", {}).get("Code") \
+            in cls.THROTTLE_CODES \
+            or error.response.get("ResponseMetadata", {}) \
+                .get("HTTPStatusCode") == 429
+
+    @classmethod
+    def is_retryable(cls, error):
+        """Return whether an error can be retried.
+
+        Throttling errors, transient service errors (5xx) and connection
+        errors raised before the request was sent are retryable.
+
+        Parameters
+        ----------
+        error: Exception
+            error raised by an AWS API call
+        """
+
+        if isinstance(error, (botocore.exceptions.EndpointConnectionError,
+            botocore.exceptions.ConnectTimeoutError)):
+            return True
+        if not isinstance(error, botocore.exceptions.ClientError): return False
+        status = error.response.get("ResponseMetadata", {}) \
+            .get("HTTPStatusCode", 0)
+        return cls.is_throttle(error) \
+            or error.response.get("Error", {}).get("Code") \
+                in cls.TRANSIENT_CODES \
+            or status >= 500
+
+    def acquire(self):
+        """Take a token, waiting until the bucket has refilled if it is empty."""
+
+        # The token is reserved before waiting so a waiting thread keeps its
+        # place and never spins on a clock that advanced too little.
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst,
+                self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0: self.sleep(wait)
+
+    def on_success(self):
+        """Increase the rate after a successful call."""
+
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        """Halve the rate after a throttling error."""
+
+        with self.lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def backoff(self, attempt):
+        """Return a jittered exponential backoff in seconds ('full jitter').
+
+        Parameters
+        ----------
+        attempt: int
+            number of the failed attempt starting at 1
+        """
+
+        return random.uniform(0, min(self.max_delay,
+            self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, function, **kwargs):
+        """Call a function under the rate limit.
+
+        Parameters
+        ----------
+        function: function
+            AWS client method to call
+        kwargs: dict
+            keyword arguments passed to function
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if the error is not retryable or max_attempts is reached
+        """
+
+        attempt = 1
+        while True:
+            self.acquire()
+            try:
+                response = function(**kwargs)
+                self.on_success()
+                return response
+            except (botocore.exceptions.ClientError,
+                botocore.exceptions.BotoCoreError) as error:
+                if not self.is_retryable(error) \
+                    or attempt >= self.max_attempts:
+                    raise error
+                if self.is_throttle(error): self.on_throttle()
+                with self.lock:
+                    self.retries += 1
+                self.sleep(self.backoff(attempt))
+                attempt += 1
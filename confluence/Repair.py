@@ -0,0 +1,348 @@
+# Local imports
+from confluence.Algorithm import Algorithm
+from confluence.batch_api import describe_jobs, list_array_children
+from confluence.Job import Job
+from confluence.Ledger import Ledger
+
+class Repair:
+    """
+    A class that re-runs only the failed work of a Confluence run.
+
+    The latest ledger record of each job is described in bulk. A FAILED
+    array job is repaired by a compact replacement array over just its
+    FAILED children, found with paginated list_jobs calls. The global index
+    of each replacement child is passed to the container through the
+    CONFLUENCE_ARRAY_INDEX_MAP environment override, as ranges such as
+    '3-5,17,200'. A container reads index AWS_BATCH_JOB_ARRAY_INDEX of the
+    map (index 0 when a single child is repaired as a plain job), and
+    CONFLUENCE_ARRAY_OFFSET is set to 0. Maps longer than INDEX_MAP_LIMIT
+    characters are split over several replacement jobs.
+
+    Failed jobs downstream of a repaired job are re-wired to depend on its
+    replacements. An array that only depends on repaired jobs through
+    N_TO_N links is itself repaired over its failed children. Any other
+    failed job is resubmitted in full. Dependencies on jobs that SUCCEEDED
+    are dropped. An N_TO_N link is kept only between jobs with the same
+    index map. Replacements are submitted with the job definition, queue,
+    command, environment, resources, retry strategy, timeout, scheduling
+    and tags of the jobs they replace. Each one is appended to the ledger
+    with the identifier it replaces. A failed job that depends on a FAILED
+    job that is not repaired (e.g. one left out of the targets) is skipped
+    with a warning, as AWS Batch would fail its replacement right away.
+
+    Only the latest run of the ledger is repaired and its replacements are
+    recorded as part of that run.
+
+    Attributes
+    ----------
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client
+    descriptions: dict
+        dictionary of job identifier keys and job description values
+    ledger: Ledger
+        ledger replacement jobs are appended to
+    records: list
+        latest ledger record of each job in submission order
+    replaced: dict
+        dictionary of replaced job identifier keys and lists of
+        (replacement Job, index map) tuple values
+    targets: set
+        job names or 'stage.algorithm' names whose failures are repaired
+        (None repairs every failure)
+
+    Methods
+    -------
+    create_job(name, description, index_map)
+        returns a replacement Job for a described job
+    decode_indices(text)
+        returns the list of indices of an index map
+    define_dependencies(job, description, index_map)
+        re-wires the dependencies of a replacement Job
+    encode_indices(indices)
+        returns the compact range text of a list of indices
+    failed_indices(record)
+        returns the global indices of the failed children of an array job
+    repair(logger, dry_run)
+        submits replacement jobs for the failed jobs of the run
+    split_indices(indices)
+        splits indices into index maps that fit in an environment override
+    """
+
+    INDEX_MAP_LIMIT = 4096
+    INDEX_MAP_VARIABLE = "CONFLUENCE_ARRAY_INDEX_MAP"
+    RESERVED_PREFIX = "AWS_BATCH_"
+
+    def __init__(self, ledger_file, client_provider, targets=None):
+        """
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger of the run
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        targets: list, optional
+            job names or 'stage.algorithm' names whose failures are repaired
+            (default is None which repairs every failure)
+        """
+
+        run_id, records = Ledger.read_run(ledger_file)
+        latest = {}
+        for record in records:
+            latest[record["job_name"]] = record
+        self.client_provider = client_provider
+        self.descriptions = {}
+        self.ledger = Ledger(ledger_file)
+        self.ledger.run_id = run_id
+        self.records = list(latest.values())
+        self.replaced = {}
+        self.targets = set(targets) if targets else None
+
+    @staticmethod
+    def encode_indices(indices):
+        """Return sorted indices as compact ranges (e.g. '0-2,7').
+
+        Parameters
+        ----------
+        indices: list
+            list of array indices
+        """
+
+        ranges = []
+        for index in sorted(set(indices)):
+            if ranges and ranges[-1][1] == index - 1:
+                ranges[-1][1] = index
+            else:
+                ranges.append([index, index])
+        return ",".join(f"{start}-{end}" if end > start else f"{start}" \
+                        for start, end in ranges)
+
+    @staticmethod
+    def decode_indices(text):
+        """Return the list of indices of compact ranges (e.g. '0-2,7').
+
+        Parameters
+        ----------
+        text: str
+            index map from the CONFLUENCE_ARRAY_INDEX_MAP variable
+        """
+
+        indices = []
+        for part in text.split(","):
+            start, _, end = part.partition("-")
+            indices.extend(range(int(start), int(end if end else start) + 1))
+        return indices
+
+    def split_indices(self, indices):
+        """Split sorted indices into lists that each encode to at most
+        INDEX_MAP_LIMIT characters and hold at most ARRAY_LIMIT indices.
+
+        Parameters
+        ----------
+        indices: list
+            list of array indices
+        """
+
+        chunks, length = [[]], 0
+        for index in sorted(set(indices)):
+            chunk = chunks[-1]
+            if not chunk:
+                added = len(str(index))
+            elif chunk[-1] != index - 1:
+                added = len(str(index)) + 1
+            elif len(chunk) > 1 and chunk[-2] == index - 2:
+                # The end of the last range grows
+                added = len(str(index)) - len(str(index - 1))
+            else:
+                added = len(str(index)) + 1
+            if len(chunks[-1]) == Algorithm.ARRAY_LIMIT or \
+                length + added > self.INDEX_MAP_LIMIT:
+                chunks.append([])
+                added, length = len(str(index)), 0
+            chunks[-1].append(index)
+            length += added
+        return [ chunk for chunk in chunks if chunk ]
+
+    def failed_indices(self, record):
+        """Return the global indices of the FAILED children of an array job.
+
+        Parameters
+        ----------
+        record: dict
+            ledger record of the array job
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+        """
+
+        indices = []
+        for child in list_array_children(self.client_provider,
+            record["job_id"], ["FAILED"]):
+            index = child.get("arrayProperties", {}).get("index")
+            if index is None: index = int(child["jobId"].rsplit(":")[-1])
+            indices.append(record["index_map"][index] if "index_map" in record \
+                else record.get("array_offset", 0) + index)
+        return sorted(indices)
+
+    def create_job(self, name, description, index_map=None):
+        """Return a replacement Job with the submission settings of a
+        described job.
+
+        Parameters
+        ----------
+        name: str
+            name of the replacement job
+        description: dict
+            description of the job that is replaced
+        index_map: list, optional
+            global indices of the children to re-run (default is None which
+            re-runs the whole job)
+        """
+
+        container = description.get("container", {})
+        job = Job(name=name, job_def=description["jobDefinition"],
+            queue=description["jobQueue"],
+            client_provider=self.client_provider)
+        overrides = {}
+        if container.get("command"): overrides["command"] = container["command"]
+        environment = { variable["name"]: variable["value"] \
+                        for variable in container.get("environment", []) \
+                        if not variable["name"].startswith(self.RESERVED_PREFIX) }
+        if index_map is not None:
+            environment[Algorithm.OFFSET_VARIABLE] = "0"
+            environment[self.INDEX_MAP_VARIABLE] = \
+                self.encode_indices(index_map)
+        if environment:
+            overrides["environment"] = [ { "name": key, "value": value } \
+                for key, value in environment.items() ]
+        if container.get("resourceRequirements"):
+            overrides["resourceRequirements"] = container["resourceRequirements"]
+        job.overrides = overrides
+
+        size = len(index_map) if index_map is not None \
+            else description.get("arrayProperties", {}).get("size", 0)
+        if size > 1: job.define_array(size)
+        if description.get("retryStrategy"):
+            job.retry_strategy = description["retryStrategy"]
+        if description.get("timeout"):
+            job.define_timeout(description["timeout"]["attemptDurationSeconds"])
+        job.define_scheduling(description.get("schedulingPriority"),
+            description.get("shareIdentifier"))
+        tags = description.get("tags", {})
+        job.define_tags({ key: value for key, value in tags.items() \
+                          if key != Job.NAME_TAG and not key.startswith("aws:") },
+            will_propagate=description.get("propagateTags", False),
+            name_tag=Job.NAME_TAG in tags)
+        return job
+
+    def define_dependencies(self, job, description, index_map=None):
+        """Re-wire the dependencies of a replacement Job.
+
+        Replaced dependencies point to their replacements, dependencies that
+        SUCCEEDED are dropped and any other dependency is kept.
+
+        Parameters
+        ----------
+        job: Job
+            replacement Job
+        description: dict
+            description of the job that is replaced
+        index_map: list, optional
+            global indices the replacement re-runs (default is None which is
+            the whole job)
+        """
+
+        dependencies, n_to_n = [], []
+        for dependency in description.get("dependsOn", []):
+            job_id = dependency["jobId"]
+            is_n_to_n = dependency.get("type") == "N_TO_N"
+            if job_id in self.replaced:
+                for replacement, replacement_map in self.replaced[job_id]:
+                    dependencies.append(replacement.job_id)
+                    if is_n_to_n and replacement_map == index_map and \
+                        (index_map is None or len(index_map) > 1):
+                        n_to_n.append(replacement.job_id)
+            elif self.descriptions.get(job_id, {}).get("status") != "SUCCEEDED":
+                dependencies.append(job_id)
+                if is_n_to_n and index_map is None: n_to_n.append(job_id)
+        job.define_dependencies(dependencies, n_to_n)
+
+    def repair(self, logger, dry_run=False):
+        """Submit replacement jobs for the failed jobs of the run in
+        submission order.
+
+        Parameters
+        ----------
+        logger: Logger
+            logger object to write status with
+        dry_run: bool, optional
+            whether to only log the replacements without submitting them
+            (default is False)
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+
+        Returns
+        -------
+        list
+            list of (ledger record, replacement Job, index map) tuples
+        """
+
+        self.descriptions = describe_jobs(self.client_provider,
+            [ record["job_id"] for record in self.records ])
+        job_names = { record["job_id"]: record["job_name"] \
+                  for record in self.records }
+        replacements = []
+        for record in self.records:
+            description = self.descriptions.get(record["job_id"])
+            if not description or description["status"] != "FAILED": continue
+            depends_on = description.get("dependsOn", [])
+            downstream = any(dep["jobId"] in self.replaced for dep in depends_on)
+            if not downstream and self.targets is not None and \
+                record["job_name"] not in self.targets and \
+                f"{record['stage']}.{record['algorithm']}" not in self.targets:
+                continue
+            unrepaired = [ job_names.get(dep["jobId"], dep["jobId"]) \
+                for dep in depends_on if dep["jobId"] not in self.replaced and \
+                self.descriptions.get(dep["jobId"], {}).get("status") == "FAILED" ]
+            if unrepaired:
+                logger.warning(f"Skipped {record['job_name']}: it depends on "
+                    f"failed jobs that are not repaired "
+                    f"({', '.join(unrepaired)}).")
+                continue
+
+            sequential = any(dep["jobId"] in self.replaced and \
+                dep.get("type") != "N_TO_N" for dep in depends_on)
+            if record.get("array_size", 0) > 0 and not sequential:
+                index_maps = self.split_indices(self.failed_indices(record))
+                if not index_maps: continue
+                replacement_names = [ f"{record['job_name']}_repair" ] \
+                    if len(index_maps) == 1 else \
+                    [ f"{record['job_name']}_repair_{k}" \
+                      for k in range(len(index_maps)) ]
+            else:
+                index_maps, replacement_names = [None], [record["job_name"]]
+
+            self.replaced[record["job_id"]] = []
+            for name, index_map in zip(replacement_names, index_maps):
+                job = self.create_job(name, description, index_map)
+                self.define_dependencies(job, description, index_map)
+                if dry_run:
+                    job.job_id = f"{name}-planned"
+                else:
+                    job.submit()
+                    self.ledger.record(record["stage"], record["algorithm"],
+                        job, repair_of=record["job_id"],
+                        **({ "index_map": index_map } if index_map else {}))
+                self.replaced[record["job_id"]].append((job, index_map))
+                replacements.append((record, job, index_map))
+                what = f"{len(index_map)} failed children" if index_map \
+                    else "the whole job"
+                logger.info(f"{'Planned' if dry_run else 'Submitted'} "
+                    f"{job.name} ({job.job_id}) for {what} of "
+                    f"{record['job_name']}.")
+        self.ledger.close()
+        return replacements
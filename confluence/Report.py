@@ -0,0 +1,449 @@
+# Standard imports
+import html
+import json
+import math
+from pathlib import Path
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from confluence.batch_api import describe_jobs
+from confluence.History import History
+from confluence.Ledger import Ledger
+
+class Report:
+    """
+    A class that analyzes the timings of a finished run.
+
+    Job and array child timings are pulled in bulk through History (into an
+    in-memory database unless a history is given) and every algorithm's
+    tasks (array children, or the job itself) become NumPy arrays of
+    created, started and stopped times so stages with 10,000 children are
+    analyzed with a few vectorized operations. The report gives queue wait
+    (created to started, which includes waiting on dependencies) and
+    runtime percentiles, straggler indices, stage overlap and the realized
+    critical path, written as a JSON summary and a Gantt-style HTML/SVG
+    timeline.
+
+    Attributes
+    ----------
+    jobs: list
+        list of dictionaries with job_id, name, stage, algorithm,
+        depends_on, created, started and stopped keys (seconds since the
+        run started) for every job
+    start: float
+        time in seconds since the epoch when the first job was created
+    tasks: dict
+        dictionary of (stage, algorithm) keys and dictionary values with
+        created, started, stopped and index NumPy arrays
+
+    Methods
+    -------
+    critical_path()
+        returns the chain of jobs that determined when the run finished
+    from_job_ids(job_ids, client_provider, history)
+        creates a Report for a list of job identifiers
+    from_ledger(ledger_file, client_provider, history)
+        creates a Report for the jobs recorded in a ledger
+    from_records(records, client_provider, history, ledger_file, run_id)
+        creates a Report for ledger records
+    html(summary)
+        returns the Gantt-style timeline as an HTML page
+    job_times(record, row)
+        returns the created, started and stopped seconds of a job
+    statistics(values)
+        returns percentiles of an array that may contain NaN
+    summary()
+        returns the analytics as a dictionary
+    write(path)
+        writes the JSON summary and HTML timeline
+    """
+
+    MAX_STRAGGLERS = 20
+    STRAGGLER_FACTOR = 2.0
+    COLORS = ("#4e79a7", "#f28e2b", "#59a14f", "#b07aa1", "#76b7b2",
+        "#edc948", "#ff9da7", "#9c755f", "#bab0ac", "#e15759")
+
+    def __init__(self, records, rows):
+        """
+        Parameters
+        ----------
+        records: list
+            list of ledger record dictionaries with job_id, job_name, stage,
+            algorithm and depends_on keys
+        rows: list
+            list of History job row dictionaries of the records' jobs and
+            array children
+        """
+
+        created = [ row["created_at"] for row in rows \
+                    if row["created_at"] is not None ]
+        self.start = min(created) / 1000 if created else 0.0
+        parents = { row["job_id"]: row for row in rows \
+                    if row["parent_id"] is None }
+
+        grouped = {}
+        for row in rows:
+            if row["parent_id"] is None and row["array_size"] > 0: continue
+            task = grouped.setdefault((row["stage"], row["algorithm"]),
+                { "created": [], "started": [], "stopped": [], "index": [],
+                  "job_id": [] })
+            for key in ("created", "started", "stopped"):
+                value = row[f"{key}_at"]
+                task[key].append(value / 1000 - self.start \
+                    if value is not None else math.nan)
+            task["index"].append(row["array_index"] \
+                if row["array_index"] is not None else -1)
+            task["job_id"].append(row["parent_id"] if row["parent_id"] \
+                else row["job_id"])
+        self.tasks = {}
+        for key, task in grouped.items():
+            self.tasks[key] = { name: np.array(values, dtype=float) \
+                                for name, values in task.items() \
+                                if name != "job_id" }
+            self.tasks[key]["job_id"] = np.array(task["job_id"])
+
+        self.jobs = []
+        for record in records:
+            row = parents.get(record["job_id"])
+            if row is None: continue
+            times = self.job_times(record, row)
+            self.jobs.append({
+                "job_id": record["job_id"],
+                "name": record["job_name"],
+                "stage": record["stage"],
+                "algorithm": record["algorithm"],
+                "depends_on": record.get("depends_on", []),
+                **times
+            })
+
+    @classmethod
+    def from_ledger(cls, ledger_file, client_provider, history=None):
+        """Create a Report for the latest record of each job of the latest
+        run in a ledger, recorded under the run identifier of the ledger.
+
+        Parameters
+        ----------
+        ledger_file: Path
+            path to the ledger file
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        history: History, optional
+            history the run is recorded in (default is an in-memory history)
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+        """
+
+        run_id, records = Ledger.read_run(ledger_file)
+        latest = {}
+        for record in records:
+            latest[record["job_name"]] = record
+        return cls.from_records(list(latest.values()), client_provider,
+            history, ledger_file, run_id)
+
+    @classmethod
+    def from_job_ids(cls, job_ids, client_provider, history=None):
+        """Create a Report for a list of job identifiers.
+
+        The stage of each job is the name of its job queue and the algorithm
+        the name of its job definition, which is how Confluence names them.
+
+        Parameters
+        ----------
+        job_ids: list
+            list of job identifiers of the run
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        history: History, optional
+            history the run is recorded in (default is an in-memory history)
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            if AWS Batch API returns an error response
+        """
+
+        records = []
+        for job_id, job in describe_jobs(client_provider, job_ids).items():
+            records.append({
+                "timestamp": str(job.get("createdAt", "")),
+                "stage": job.get("jobQueue", "").split("/")[-1],
+                "algorithm": job.get("jobDefinition", "").split("/")[-1] \
+                    .split(":")[0],
+                "job_name": job.get("jobName", job_id),
+                "job_id": job_id,
+                "array_size": job.get("arrayProperties", {}).get("size", 0),
+                "depends_on": [ dep["jobId"] \
+                                for dep in job.get("dependsOn", []) ]
+            })
+        records.sort(key=lambda record: record["timestamp"])
+        return cls.from_records(records, client_provider, history)
+
+    @classmethod
+    def from_records(cls, records, client_provider, history=None,
+        ledger_file=None, run_id=None):
+        """Record the jobs of ledger records in a history and create a
+        Report from them.
+
+        Parameters
+        ----------
+        records: list
+            list of ledger record dictionaries
+        client_provider: ClientProvider
+            provider of the shared AWS Batch client
+        history: History, optional
+            history the run is recorded in (default is an in-memory history)
+        ledger_file: Path, optional
+            path to the ledger the records come from (default is None)
+        run_id: str, optional
+            identifier of the run (default is None which uses the timestamp
+            of the first record)
+        """
+
+        if not records: return cls([], [])
+        memory = history is None
+        history = History(":memory:") if memory else history
+        try:
+            run_id = run_id if run_id else records[0]["timestamp"]
+            history.record(client_provider, records, run_id, ledger_file)
+            return cls(records, history.jobs(run_id=run_id))
+        finally:
+            if memory: history.close()
+
+    def job_times(self, record, row):
+        """Return created, started and stopped seconds of a job; an array job
+        starts with its first child and stops with its last child.
+
+        Parameters
+        ----------
+        record: dict
+            ledger record of the job
+        row: dict
+            History row of the job
+        """
+
+        def seconds(value):
+            return value / 1000 - self.start if value is not None else None
+
+        times = { "created": seconds(row["created_at"]),
+                  "started": seconds(row["started_at"]),
+                  "stopped": seconds(row["stopped_at"]) }
+        task = self.tasks.get((record["stage"], record["algorithm"]))
+        if row["array_size"] > 0 and task is not None:
+            mine = task["job_id"] == record["job_id"]
+            if np.any(mine & ~np.isnan(task["started"])):
+                times["started"] = float(np.nanmin(task["started"][mine]))
+            if np.any(mine & ~np.isnan(task["stopped"])):
+                times["stopped"] = float(np.nanmax(task["stopped"][mine]))
+        return times
+
+    @staticmethod
+    def statistics(values):
+        """Return p50, p95, max and mean of the values that are not NaN."""
+
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return { "p50": None, "p95": None, "max": None, "mean": None }
+        p50, p95 = np.percentile(values, [50, 95])
+        return { "p50": float(p50), "p95": float(p95),
+                 "max": float(values.max()), "mean": float(values.mean()) }
+
+    def summary(self):
+        """Return the analytics of the run as a dictionary.
+
+        Stragglers are array children whose runtime is more than
+        STRAGGLER_FACTOR times the median runtime of their algorithm,
+        slowest first.
+        """
+
+        algorithms = {}
+        stages = {}
+        for (stage, algorithm), task in self.tasks.items():
+            wait = task["started"] - task["created"]
+            runtime = task["stopped"] - task["started"]
+            stragglers = []
+            if np.any(~np.isnan(runtime)):
+                slow = runtime > self.STRAGGLER_FACTOR * np.nanmedian(runtime)
+                for i in np.argsort(-np.where(slow, runtime, -np.inf)) \
+                    [:min(int(slow.sum()), self.MAX_STRAGGLERS)]:
+                    stragglers.append({ "index": int(task["index"][i]),
+                                        "runtime": float(runtime[i]) })
+            algorithms[f"{stage}.{algorithm}"] = {
+                "tasks": int(runtime.size),
+                "finished": int(np.count_nonzero(~np.isnan(runtime))),
+                "queue_wait": self.statistics(wait),
+                "runtime": self.statistics(runtime),
+                "compute_seconds": float(np.nansum(runtime)),
+                "wait_seconds": float(np.nansum(wait)),
+                "stragglers": stragglers
+            }
+            times = stages.setdefault(stage, { "started": [], "stopped": [],
+                "tasks": 0, "compute_seconds": 0.0, "wait_seconds": 0.0 })
+            times["started"].append(task["started"])
+            times["stopped"].append(task["stopped"])
+            times["tasks"] += int(runtime.size)
+            times["compute_seconds"] += float(np.nansum(runtime))
+            times["wait_seconds"] += float(np.nansum(wait))
+
+        for stage, times in stages.items():
+            started = np.concatenate(times.pop("started"))
+            stopped = np.concatenate(times.pop("stopped"))
+            times["start"] = float(np.nanmin(started)) \
+                if np.any(~np.isnan(started)) else None
+            times["end"] = float(np.nanmax(stopped)) \
+                if np.any(~np.isnan(stopped)) else None
+            times["wall_seconds"] = times["end"] - times["start"] \
+                if times["start"] is not None and times["end"] is not None \
+                else None
+
+        names = list(stages)
+        overlaps = []
+        for i, first in enumerate(names):
+            for second in names[i+1:]:
+                a, b = stages[first], stages[second]
+                if None in (a["start"], a["end"], b["start"], b["end"]):
+                    continue
+                seconds = min(a["end"], b["end"]) - max(a["start"], b["start"])
+                if seconds > 0:
+                    overlaps.append({ "stages": [first, second],
+                                      "seconds": seconds })
+
+        ends = [ job["stopped"] for job in self.jobs \
+                 if job["stopped"] is not None ]
+        return {
+            "start": self.start,
+            "makespan": max(ends) if ends else 0.0,
+            "jobs": len(self.jobs),
+            "tasks": sum(algorithm["tasks"] for algorithm in algorithms.values()),
+            "compute_seconds": sum(stage["compute_seconds"] \
+                                   for stage in stages.values()),
+            "wait_seconds": sum(stage["wait_seconds"] \
+                                for stage in stages.values()),
+            "stages": stages,
+            "algorithms": algorithms,
+            "overlaps": overlaps,
+            "critical_path": self.critical_path()
+        }
+
+    def critical_path(self):
+        """Return the chain of jobs that determined when the run finished.
+
+        Starting from the job that stopped last, each step goes to the
+        dependency that stopped last before the job could start.
+        """
+
+        jobs = { job["job_id"]: job for job in self.jobs }
+        finished = [ job for job in self.jobs if job["stopped"] is not None ]
+        if not finished: return []
+        job = max(finished, key=lambda job: job["stopped"])
+        path = []
+        while job:
+            upstream = [ jobs[dep] for dep in job["depends_on"] \
+                         if dep in jobs and jobs[dep]["stopped"] is not None ]
+            previous = max(upstream, key=lambda dep: dep["stopped"]) \
+                if upstream else None
+            ready = previous["stopped"] if previous else job["created"]
+            path.append({ "name": job["name"], "stage": job["stage"],
+                "algorithm": job["algorithm"], "started": job["started"],
+                "stopped": job["stopped"],
+                "wait": job["started"] - ready \
+                    if job["started"] is not None and ready is not None \
+                    else None })
+            job = previous
+        return path[::-1]
+
+    def html(self, summary):
+        """Return the Gantt-style timeline of the run as an HTML page.
+
+        Each job is a row with its queue wait in grey and its run (first to
+        last child for arrays) in the color of its stage. Jobs on the
+        critical path are outlined.
+
+        Parameters
+        ----------
+        summary: dict
+            dictionary returned by summary()
+        """
+
+        label, width, height, top = 260, 900, 16, 30
+        makespan = max(summary["makespan"], 1.0)
+        scale = width / makespan
+        colors = { stage: self.COLORS[i % len(self.COLORS)] \
+                   for i, stage in enumerate(summary["stages"]) }
+        critical = { step["name"] for step in summary["critical_path"] }
+        jobs = sorted(self.jobs, key=lambda job: (job["created"] is None,
+            job["created"] or 0))
+        svg_height = top + height * len(jobs) + 10
+
+        step = 10 ** math.floor(math.log10(makespan))
+        if makespan / step < 4: step /= 2
+        elements = []
+        tick = 0.0
+        while tick <= makespan:
+            x = label + tick * scale
+            elements.append(f'<line x1="{x:.1f}" y1="{top - 5}" '
+                f'x2="{x:.1f}" y2="{svg_height}" stroke="#eee"/>')
+            elements.append(f'<text x="{x:.1f}" y="{top - 10}" '
+                f'font-size="10" text-anchor="middle">{tick:g}s</text>')
+            tick += step
+        for row, job in enumerate(jobs):
+            y = top + row * height
+            name = html.escape(job["name"])
+            elements.append(f'<text x="{label - 6}" y="{y + height - 4}" '
+                f'font-size="11" text-anchor="end">{name}</text>')
+            created, started, stopped = (job["created"], job["started"],
+                job["stopped"])
+            if created is not None and started is not None:
+                elements.append(f'<rect x="{label + created * scale:.1f}" '
+                    f'y="{y + 3}" width="{(started - created) * scale:.1f}" '
+                    f'height="{height - 6}" fill="#ccc"><title>{name} queue '
+                    f'wait {started - created:.0f}s</title></rect>')
+            if started is not None and stopped is not None:
+                outline = ' stroke="#d62728" stroke-width="2"' \
+                    if job["name"] in critical else ""
+                elements.append(f'<rect x="{label + started * scale:.1f}" '
+                    f'y="{y + 2}" width="{max((stopped - started) * scale, 1):.1f}" '
+                    f'height="{height - 4}" fill="{colors.get(job["stage"], "#888")}"'
+                    f'{outline}><title>{name} ran {stopped - started:.0f}s'
+                    f'</title></rect>')
+
+        legend = " ".join(f'<span style="color:{color}">&#9632;</span> '
+            f'{html.escape(stage)}' for stage, color in colors.items())
+        return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+            f'<title>Confluence run timeline</title></head>\n<body '
+            f'style="font-family:sans-serif">\n<h1>Confluence run timeline</h1>'
+            f'\n<p>Makespan {summary["makespan"]:.0f}s, {summary["jobs"]} jobs, '
+            f'{summary["tasks"]} tasks, {summary["compute_seconds"]:.0f}s '
+            f'compute, {summary["wait_seconds"]:.0f}s queue wait. Critical '
+            f'path outlined in red.</p>\n<p>{legend}</p>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{label + width + 20}" '
+            f'height="{svg_height}">\n' + "\n".join(elements) +
+            '\n</svg>\n</body></html>\n')
+
+    def write(self, path):
+        """Write the JSON summary and the HTML timeline.
+
+        The summary is written to path with a '.json' suffix and the
+        timeline with a '.html' suffix.
+
+        Parameters
+        ----------
+        path: Path
+            path the output file names are derived from
+
+        Returns
+        -------
+        dict
+            dictionary returned by summary()
+        """
+
+        summary = self.summary()
+        path = Path(path)
+        with open(path.with_suffix(".json"), "w") as json_file:
+            json.dump(summary, json_file, indent=2)
+        path.with_suffix(".html").write_text(self.html(summary))
+        return summary
@@ -0,0 +1,167 @@
+# Standard imports
+from collections import deque
+import heapq
+import random
+
+class Simulator:
+    """
+    A class that runs a discrete-event simulation of a Confluence run.
+
+    Every job is expanded into tasks (one per array child). A task becomes
+    ready when the jobs it depends on have finished, or only the task with
+    the same index for N_TO_N dependencies, and starts as soon as enough
+    vCPUs of the compute environment are free. Runtimes are drawn from a
+    normal distribution per algorithm.
+
+    Attributes
+    ----------
+    jobs: list
+        list of dictionaries with job_id, name, array_size, depends_on,
+        runtime and vcpus keys
+    max_vcpus: int
+        number of vCPUs available in the compute environment
+    random: Random
+        random number generator used to draw runtimes
+
+    Methods
+    -------
+    run()
+        simulates the run and returns makespan, peak concurrency and the
+        critical path
+    """
+
+    DEFAULT_RUNTIME = 60
+    DEFAULT_VCPUS = 256
+
+    def __init__(self, jobs, max_vcpus=DEFAULT_VCPUS, seed=0):
+        """
+        Parameters
+        ----------
+        jobs: list
+            list of dictionaries with job_id, name, array_size, depends_on,
+            runtime and vcpus keys; runtime is a number of seconds or a
+            dictionary with mean and stddev keys
+        max_vcpus: int, optional
+            number of vCPUs available in the compute environment
+        seed: int, optional
+            seed of the random number generator (default is 0)
+        """
+
+        self.jobs = jobs
+        self.max_vcpus = max_vcpus
+        self.random = random.Random(seed)
+
+    def draw_runtime(self, runtime):
+        """Return a runtime in seconds drawn from a runtime configuration.
+
+        Parameters
+        ----------
+        runtime: int, float or dict
+            number of seconds or dictionary with mean and stddev keys
+        """
+
+        if isinstance(runtime, dict):
+            return max(0.0, self.random.gauss(runtime["mean"],
+                runtime.get("stddev", 0)))
+        return float(runtime)
+
+    def run(self):
+        """Simulate the run.
+
+        Returns
+        -------
+        dict
+            dictionary with makespan (seconds), peak_tasks, peak_vcpus and
+            critical_path (list of job names) keys
+        """
+
+        # Expand jobs into tasks: (job index, array index)
+        index = { job["job_id"]: i for i, job in enumerate(self.jobs) }
+        sizes = [ max(job["array_size"], 1) for job in self.jobs ]
+        remaining = {}
+        job_waiters = [ [] for _ in self.jobs ]
+        task_waiters = {}
+        for j, job in enumerate(self.jobs):
+            for child in range(sizes[j]):
+                remaining[(j, child)] = 0
+            for dep in job["depends_on"]:
+                d = index.get(dep["jobId"])
+                if d is None: continue
+                if dep.get("type") == "N_TO_N":
+                    for child in range(sizes[j]):
+                        task_waiters.setdefault((d, child), []).append((j, child))
+                        remaining[(j, child)] += 1
+                else:
+                    job_waiters[d].append(j)
+                    for child in range(sizes[j]):
+                        remaining[(j, child)] += 1
+
+        # Predecessor that released each task, used for the critical path
+        released_by = {}
+        finish = {}
+        unfinished = list(sizes)
+        min_vcpus = min([ job["vcpus"] for job in self.jobs ], default=1)
+        ready = deque([ task for task, count in remaining.items() \
+                        if count == 0 ])
+        events = []
+        time = 0.0
+        running_vcpus = 0
+        running_tasks = 0
+        peak_tasks = 0
+        peak_vcpus = 0
+
+        def release(task, by):
+            remaining[task] -= 1
+            if remaining[task] == 0:
+                released_by[task] = by
+                ready.append(task)
+
+        while ready or events:
+            # Start every ready task that fits (FIFO with backfill)
+            waiting = deque()
+            while ready and (self.max_vcpus - running_vcpus >= min_vcpus \
+                or running_tasks == 0):
+                task = ready.popleft()
+                vcpus = self.jobs[task[0]]["vcpus"]
+                if running_vcpus + vcpus <= self.max_vcpus or running_tasks == 0:
+                    runtime = self.draw_runtime(self.jobs[task[0]]["runtime"])
+                    heapq.heappush(events, (time + runtime, task))
+                    running_vcpus += vcpus
+                    running_tasks += 1
+                else:
+                    waiting.append(task)
+            waiting.extend(ready)
+            ready = waiting
+            peak_tasks = max(peak_tasks, running_tasks)
+            peak_vcpus = max(peak_vcpus, running_vcpus)
+            if not events: break
+
+            time, task = heapq.heappop(events)
+            finish[task] = time
+            running_vcpus -= self.jobs[task[0]]["vcpus"]
+            running_tasks -= 1
+            j = task[0]
+            unfinished[j] -= 1
+            for waiter in task_waiters.get(task, []):
+                release(waiter, task)
+            if unfinished[j] == 0:
+                for waiter_job in job_waiters[j]:
+                    for child in range(sizes[waiter_job]):
+                        release((waiter_job, child), task)
+
+        makespan = max(finish.values()) if finish else 0.0
+        critical_path = []
+        task = max(finish, key=finish.get) if finish else None
+        while task is not None:
+            name = self.jobs[task[0]]["name"]
+            if not critical_path or critical_path[-1] != name:
+                critical_path.append(name)
+            task = released_by.get(task)
+        critical_path.reverse()
+
+        return {
+            "makespan": makespan,
+            "peak_tasks": peak_tasks,
+            "peak_vcpus": peak_vcpus,
+            "critical_path": critical_path
+        }
@@ -1,8 +1,12 @@
+# Standard imports
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
 # Third-party imports
-import botocore
+import botocore.exceptions
 
 # Local imports
 from confluence.Algorithm import Algorithm
+from confluence.ClientProvider import ClientProvider
 
 class Stage:
     """
@@ -15,8 +19,20 @@ class Stage:
     ----------
     algorithms: list
         list of Algorithm objects that will be executed
+    array_dependencies: dict
+        dictionary of job identifier keys and array size values for
+        dependencies that are array jobs
+    array_offsets: dict
+        dictionary of job identifier keys and array offset values for
+        dependencies that are array jobs
+    client_provider: ClientProvider
+        provider of the shared AWS clients passed to each Algorithm
     dependencies: list
         list of job identifiers that the stage depends on
+    fan_in: FanIn
+        passed to each Algorithm to keep dependencies within the limit
+    ledger: Ledger
+        ledger passed to each Algorithm to record submitted jobs
     name: str
         name of the stage
     submitted: list
@@ -28,42 +44,77 @@ class Stage:
         creates a list of Algorithm objects
     define_dependencies(alg_list)
         create a list of job identifiers that the Stage depends on
-    run_algorithms()
+    run_algorithms(max_workers)
         invokes each Algorithm so that its jobs are submitted to AWS Batch
     """
 
-    def __init__(self, name):
+    def __init__(self, name, client_provider=None, ledger=None, fan_in=None):
         """
         Parameters
         ----------
         name: str
             name of the stage
+        client_provider: ClientProvider, optional
+            provider of the shared AWS clients (default creates one)
+        ledger: Ledger, optional
+            ledger that records submitted jobs (default is None)
+        fan_in: FanIn, optional
+            inserts join jobs for wide dependencies (default is None)
         """
 
         self.algorithms = []
+        self.array_dependencies = {}
+        self.array_offsets = {}
+        self.client_provider = client_provider if client_provider \
+            else ClientProvider()
         self.dependencies = []
+        self.fan_in = fan_in
+        self.ledger = ledger
         self.name = name
         self.submitted = []
 
-    def create_algorithms(self, stage_dict):
+    def create_algorithms(self, stage_dict, reused=None):
         """Create Algorithm objects.
 
         stage_dict containes the number of jobs, array size, and input file 
-        names (list) needed to complete an execution of the algorithm.
+        names (list) needed to complete an execution of the algorithm. An 
+        optional n_to_n flag links the algorithm's array children index-wise
+        to upstream array jobs of the same size, an optional depends_on
+        list names the stages or algorithms the algorithm depends on and an
+        optional retry entry sets the AWS Batch retry strategy. Optional
+        job_definition, queue, vcpus, memory and timeout entries override
+        the defaults of the algorithm's jobs, and optional runtime and
+        share_identifier entries are used for fair-share scheduling.
 
         Parameters
         ----------
         stage_dict: dict
             dictionary of data needed to create Algorithm objects
+        reused: dict, optional
+            dictionary of job name keys and job identifier values for jobs of
+            a previous run that are reused (default is None)
         """
 
         for key in stage_dict.keys():
             algorithm = Algorithm(name=key, 
-                num_jobs=stage_dict[key]["num_jobs"],
+                num_jobs=stage_dict[key].get("num_jobs"),
                 array_size=stage_dict[key]["array_size"], 
-                arguments=stage_dict[key]["arguments"])
+                arguments=stage_dict[key]["arguments"],
+                client_provider=self.client_provider,
+                n_to_n=stage_dict[key].get("n_to_n", False),
+                depends_on=stage_dict[key].get("depends_on"),
+                ledger=self.ledger,
+                fan_in=self.fan_in,
+                retry=stage_dict[key].get("retry"),
+                job_def=stage_dict[key].get("job_definition"),
+                queue=stage_dict[key].get("queue"),
+                vcpus=stage_dict[key].get("vcpus"),
+                memory=stage_dict[key].get("memory"),
+                timeout=stage_dict[key].get("timeout"),
+                runtime=stage_dict[key].get("runtime"),
+                share_identifier=stage_dict[key].get("share_identifier"))
             self.algorithms.append(algorithm)
-            algorithm.create_jobs(self.name)
+            algorithm.create_jobs(self.name, reused)
 
     def define_dependencies(self, alg_list):
         """Define dependencies by extracting job identifiers from alg_list.
@@ -76,20 +127,56 @@ class Stage:
         
         for alg in alg_list:
             self.dependencies.extend(alg.job_ids)
+            if alg.array_size > 0:
+                for job_id in alg.job_ids:
+                    offset, size = alg.shards.get(job_id, (0, alg.array_size))
+                    self.array_dependencies[job_id] = size
+                    self.array_offsets[job_id] = offset
 
-    def run_algorithms(self):
+    def run_algorithms(self, max_workers=1):
         """Invokes each Algorithm so that all associated jobs are submitted to 
         AWS Batch.
 
+        Algorithms in a stage do not depend on each other so when max_workers
+        is greater than 1 they are submitted concurrently. Algorithm.job_ids
+        are kept per Algorithm and self.submitted keeps the order of
+        self.algorithms so downstream dependencies are deterministic.
+
+        Parameters
+        ----------
+        max_workers: int, optional
+            maximum number of Algorithms submitted at once (default is 1)
+
         Raises
         ------
         botocore.exceptions.ClientError
             if AWS Batch API returns an error response upon job submission
         """
 
-        for alg in self.algorithms:
-            try:
-                alg.submit_jobs(self.dependencies)
+        if max_workers <= 1 or len(self.algorithms) <= 1:
+            for alg in self.algorithms:
+                try:
+                    alg.submit_jobs(self.dependencies, 
+                        self.array_dependencies, self.array_offsets)
+                    self.submitted.append(alg)
+                except botocore.exceptions.ClientError as error:
+                    raise error
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers,
+            thread_name_prefix=f"stage_{self.name}")
+        futures = { alg: executor.submit(alg.submit_jobs, self.dependencies,
+                        self.array_dependencies, self.array_offsets) 
+                    for alg in self.algorithms }
+        done, not_done = wait(futures.values(), return_when=FIRST_EXCEPTION)
+        # Fail fast: algorithms that have not started are never submitted
+        executor.shutdown(wait=True, cancel_futures=True)
+
+        error = None
+        for alg, future in futures.items():
+            if future.cancelled(): continue
+            if future.exception() is None:
                 self.submitted.append(alg)
-            except botocore.exceptions.ClientError as error:
-                raise error
\ No newline at end of file
+            elif error is None:
+                error = future.exception()
+        if error: raise error
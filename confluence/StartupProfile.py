@@ -0,0 +1,105 @@
+# Standard imports
+from contextlib import contextmanager
+import subprocess
+import sys
+import time
+
+class StartupProfile:
+    """
+    A class that measures what a Confluence command spends before it submits
+    anything: the import cost of each module and the time of each
+    initialization phase.
+
+    Imports are measured in a fresh interpreter with Python's -X importtime
+    so modules that are already loaded do not hide their cost. Initialization
+    phases (parsing the configuration, creating Confluence, its stages and
+    its AWS clients) are timed in-process.
+
+    Attributes
+    ----------
+    imports: list
+        list of (module, self seconds, cumulative seconds, depth) tuples in
+        import order
+    phases: list
+        list of (name, seconds) tuples in the order they ran
+
+    Methods
+    -------
+    measure_imports(module, cwd)
+        imports a module in a fresh interpreter and records import times
+    phase(name)
+        context manager that times an initialization phase
+    report(logger, top)
+        logs import and initialization costs
+    """
+
+    def __init__(self):
+        self.imports = []
+        self.phases = []
+
+    def measure_imports(self, module, cwd=None):
+        """Import a module in a fresh interpreter with -X importtime and
+        record the self and cumulative import time of every module.
+
+        Parameters
+        ----------
+        module: str
+            name of the module to import (e.g. 'run_confluence')
+        cwd: Path, optional
+            directory the module is imported from (default is the current
+            directory)
+        """
+
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+            f"import {module}"], capture_output=True, text=True, cwd=cwd)
+        self.imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line: continue
+            fields = line[len("import time:"):].split("|")
+            if not fields[0].strip().isdigit(): continue
+            name = fields[2].rstrip()
+            self.imports.append((name.strip(), int(fields[0]) / 1e6,
+                int(fields[1]) / 1e6, (len(name) - len(name.lstrip())) // 2))
+
+    @contextmanager
+    def phase(self, name):
+        """Time an initialization phase.
+
+        Parameters
+        ----------
+        name: str
+            name of the phase
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, logger, top=15):
+        """Log the total import time, the modules with the largest
+        cumulative import time and the time of each initialization phase.
+
+        Parameters
+        ----------
+        logger: Logger
+            logger object to write status with
+        top: int, optional
+            number of modules to list (default is 15)
+        """
+
+        total = sum(seconds for _, seconds, _, _ in self.imports)
+        logger.info(f"Startup imports: {len(self.imports)} modules in "
+            f"{total * 1000:.1f} ms.")
+        heaviest = sorted(self.imports, key=lambda row: row[2], reverse=True)
+        for name, own, cumulative, depth in heaviest[:top]:
+            logger.info(f"  import {name}: {cumulative * 1000:.1f} ms "
+                f"cumulative, {own * 1000:.1f} ms self (depth {depth})")
+        confluence = [ row for row in self.imports \
+                       if row[0].split(".")[0] == "confluence" ]
+        for name, own, cumulative, _ in confluence:
+            logger.info(f"  module {name}: {cumulative * 1000:.1f} ms "
+                f"cumulative, {own * 1000:.1f} ms self")
+        for name, seconds in self.phases:
+            logger.info(f"Startup phase {name}: {seconds * 1000:.1f} ms")
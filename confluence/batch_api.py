@@ -0,0 +1,90 @@
+"""Helpers for bulk AWS Batch API calls.
+
+AWS Batch limits describe_jobs to 100 job identifiers per request and
+list_jobs to 1000 results per page so these functions split lists of job
+identifiers into chunks, follow pagination tokens and combine results.
+"""
+
+DESCRIBE_LIMIT = 100
+LIST_LIMIT = 1000
+
+def chunk(items, size):
+    """Yield successive lists of at most size items.
+
+    Parameters
+    ----------
+    items: list
+        list of items to split
+    size: int
+        maximum number of items in each chunk
+    """
+
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def describe_jobs(client_provider, job_ids):
+    """Describe jobs in batches of DESCRIBE_LIMIT identifiers.
+
+    Parameters
+    ----------
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client and rate limiter
+    job_ids: list
+        list of job identifiers
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        if AWS Batch API returns an error response
+
+    Returns
+    -------
+    dict
+        dictionary of job identifier keys and job description values; jobs
+        unknown to AWS Batch are not included
+    """
+
+    descriptions = {}
+    for job_chunk in chunk(list(dict.fromkeys(job_ids)), DESCRIBE_LIMIT):
+        response = client_provider.call("batch", "describe_jobs", 
+            jobs=job_chunk)
+        for job in response["jobs"]:
+            descriptions[job["jobId"]] = job
+    return descriptions
+
+def list_array_children(client_provider, array_job_id, statuses):
+    """List the children of an array job with paginated list_jobs calls.
+
+    list_jobs only returns children of one status per request, so each
+    status is listed in turn with up to LIST_LIMIT children per page.
+
+    Parameters
+    ----------
+    client_provider: ClientProvider
+        provider of the shared AWS Batch client and rate limiter
+    array_job_id: str
+        job identifier of the array job
+    statuses: list
+        list of statuses of the children to list
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        if AWS Batch API returns an error response
+
+    Returns
+    -------
+    list
+        list of job summary dictionaries of the children
+    """
+
+    children = []
+    for status in statuses:
+        kwargs = { "arrayJobId": array_job_id, "jobStatus": status,
+                   "maxResults": LIST_LIMIT }
+        while True:
+            response = client_provider.call("batch", "list_jobs", **kwargs)
+            children.extend(response["jobSummaryList"])
+            if not response.get("nextToken"): break
+            kwargs["nextToken"] = response["nextToken"]
+    return children
@@ -0,0 +1,44 @@
+"""Deferred imports of heavy third-party modules.
+
+boto3 and botocore.config take a few hundred milliseconds to import, which
+every command paid even when it never talks to AWS (e.g. --help, --plan or
+--compile). Modules imported with lazy_import are bound at import time but
+only executed on first attribute access, so the cost moves to the first
+client that is created.
+"""
+
+# Standard imports
+import importlib.util
+import sys
+import threading
+
+LOCK = threading.Lock()
+
+def lazy_import(name):
+    """Return a module that is imported on first attribute access.
+
+    A module that is already imported is returned as is. Otherwise a lazy
+    module is registered in sys.modules so later plain imports share it.
+
+    Parameters
+    ----------
+    name: str
+        dotted name of the module (e.g. 'boto3')
+
+    Raises
+    ------
+    ModuleNotFoundError
+        if the module cannot be found
+    """
+
+    with LOCK:
+        if name in sys.modules: return sys.modules[name]
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
@@ -7,6 +7,16 @@ Arguements:
   -s: Indicates simulated data run
   -k: Unique SSM encryption key identifier
   -r: Enable renew Lambda function to store temporary S3 creds
+  --resume: Path to the ledger of a previous run to resume
+  --wait: Block until all submitted jobs finish, record them in the run
+          history (if history_file is set) and exit with their status
+  --monitor: Path to the ledger of a run to monitor without submitting jobs
+  --plan: Build and simulate the run offline without touching AWS
+  --compile: Path to write a compiled plan of the validated configuration
+             and dependency graph to, without submitting jobs
+  --compiled: Path to a compiled plan to run instead of -c
+  --profile-startup: Report import and initialization cost per module and
+                     exit without submitting jobs
 
 PyYAML must be installed in the environment prior to execution.
 
@@ -16,6 +26,8 @@ contained within the Confluence module.
 This script can also be imported as a module and contains the following 
 functions:
     * create_logger - creates a logger object used to log status
+    * store_s3_creds - stores temporary S3 credentials unless still valid
+    * record_history - records the jobs of a run in the run history
     * main - the main entrypoint of the script
     
 Example execution: python3 run_confluence.py -c /path/to/confluence.yaml
@@ -23,18 +35,26 @@ Example execution: python3 run_confluence.py -c /path/to/confluence.yaml
 
 # Standard imports
 import argparse
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
 import logging
 from pathlib import Path
 import sys
 
 # Third-party imports
-import boto3
-import botocore
-import yaml
+import botocore.exceptions
 
 # Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Config import Config
 from confluence.Confluence import Confluence
+from confluence.lazy import lazy_import
+from confluence.Monitor import Monitor
+from confluence.StartupProfile import StartupProfile
+
+# Third-party imports (deferred until the first client is created)
+boto3 = lazy_import("boto3")
 
 def create_args():
     """Create and return argparser with arguments."""
@@ -56,6 +76,27 @@ def create_args():
                         "--renew",
                         help="Indication to enable renew Lambda",
                         action="store_true")
+    arg_parser.add_argument("--resume",
+                            type=str,
+                            help="Path to the ledger of a previous run to resume")
+    arg_parser.add_argument("--wait",
+                        help="Wait until all submitted jobs finish",
+                        action="store_true")
+    arg_parser.add_argument("--monitor",
+                            type=str,
+                            help="Path to the ledger of a run to monitor")
+    arg_parser.add_argument("--plan",
+                        help="Simulate the run offline without submitting jobs",
+                        action="store_true")
+    arg_parser.add_argument("--compile",
+                            type=str,
+                            help="Path to write a compiled plan to")
+    arg_parser.add_argument("--compiled",
+                            type=str,
+                            help="Path to a compiled plan to run")
+    arg_parser.add_argument("--profile-startup",
+                        help="Report import and initialization cost per module",
+                        action="store_true")
     return arg_parser
 
 def create_logger(log_to_console=True, log_file=None, log_to_file=False):
@@ -100,13 +141,90 @@ def create_logger(log_to_console=True, log_file=None, log_to_file=False):
 
     return logger
 
-def store_s3_creds(key):
+S3_CREDS_PARAMETERS = {
+    "accessKeyId": ("s3_creds_key", "Temporary SWOT S3 bucket key"),
+    "secretAccessKey": ("s3_creds_secret", "Temporary SWOT S3 bucket secret"),
+    "sessionToken": ("s3_creds_token", "Temporary SWOT S3 bucket token"),
+    "expiration": ("s3_creds_expiration", 
+        "Temporary SWOT S3 bucket expiration")
+}
+S3_CREDS_STRUCTURED = ("s3_creds", "Temporary SWOT S3 bucket credentials")
+S3_CREDS_MODES = ("compat", "structured", "both")
+S3_CREDS_FORMAT = "%Y-%m-%d %H:%M:%S%z"
+
+def get_s3_creds_expiration(ssm_client, mode="compat"):
+    """Return the expiration of stored S3 credentials as a datetime or None
+    if no credentials are stored.
+
+    The structured parameter is read in structured mode and the expiration
+    parameter otherwise.
+    """
+
+    try:
+        if mode == "structured":
+            response = ssm_client.get_parameter(Name=S3_CREDS_STRUCTURED[0],
+                WithDecryption=True)
+            value = json.loads(response["Parameter"]["Value"])["expiration"]
+        else:
+            response = ssm_client.get_parameter(
+                Name=S3_CREDS_PARAMETERS["expiration"][0], WithDecryption=True)
+            value = response["Parameter"]["Value"]
+        return datetime.strptime(value, S3_CREDS_FORMAT)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] == "ParameterNotFound": return None
+        raise e
+    except (KeyError, ValueError):
+        return None
+
+def store_s3_creds(key, logger, min_lifetime=3600, mode="compat"):
     """Get temporary creds for S3-hosted simulated data.
     
     Note data is stored in Confluence AWS and the credentials are determined
     from what ever user account runs this script.
+
+    The stored expiration is read first and nothing is renewed while the
+    stored credentials are valid for at least min_lifetime seconds. Renewed
+    credentials are written as four parameters concurrently ('compat'
+    mode, read by existing consumers), as one JSON parameter ('structured'
+    mode) or both. Every failed parameter is logged before the first error
+    is raised.
+
+    Parameters
+    ----------
+    key: str
+        unique SSM encryption key identifier
+    logger: Logger
+        logger object to write status with
+    min_lifetime: int, optional
+        seconds the stored credentials must remain valid to be kept (default
+        is 3600)
+    mode: str, optional
+        'compat', 'structured' or 'both' (default is 'compat')
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        if a parameter cannot be read or written
+    ValueError
+        if mode is unknown
+
+    Returns
+    -------
+    bool
+        whether the credentials were renewed
     """
-    
+
+    if mode not in S3_CREDS_MODES:
+        raise ValueError(f"Unknown S3 credentials mode '{mode}', expected "
+            f"one of {', '.join(S3_CREDS_MODES)}.")
+    ssm_client = boto3.client('ssm', region_name="us-west-2")
+    expiration = get_s3_creds_expiration(ssm_client, mode)
+    if expiration:
+        lifetime = (expiration - datetime.now(timezone.utc)).total_seconds()
+        if lifetime >= min_lifetime:
+            logger.info(f"Stored S3 credentials are valid for {lifetime / 3600:.1f} more hours; not renewing.")
+            return False
+
     # Retrieve temporary credentials
     client = boto3.client('sts')
     response = client.get_session_token(DurationSeconds=43200)
@@ -117,47 +235,29 @@ def store_s3_creds(key):
         "expiration": response["Credentials"]["Expiration"].strftime("%Y-%m-%d %H:%M:%S+00:00")
     }
     
-    # Store temporary credentials in parameter store    
-    ssm_client = boto3.client('ssm', region_name="us-west-2")
-    try:
-        response = ssm_client.put_parameter(
-            Name="s3_creds_key",
-            Description="Temporary SWOT S3 bucket key",
-            Value=creds["accessKeyId"],
-            Type="SecureString",
-            KeyId=key,
-            Overwrite=True,
-            Tier="Standard"
-        )
-        response = ssm_client.put_parameter(
-            Name="s3_creds_secret",
-            Description="Temporary SWOT S3 bucket secret",
-            Value=creds["secretAccessKey"],
-            Type="SecureString",
-            KeyId=key,
-            Overwrite=True,
-            Tier="Standard"
-        )
-        response = ssm_client.put_parameter(
-            Name="s3_creds_token",
-            Description="Temporary SWOT S3 bucket token",
-            Value=creds["sessionToken"],
-            Type="SecureString",
-            KeyId=key,
-            Overwrite=True,
-            Tier="Standard"
-        )
-        response = ssm_client.put_parameter(
-            Name="s3_creds_expiration",
-            Description="Temporary SWOT S3 bucket expiration",
-            Value=creds["expiration"],
-            Type="SecureString",
-            KeyId=key,
-            Overwrite=True,
-            Tier="Standard"
-        )
-    except botocore.exceptions.ClientError as e:
-        raise e
+    # Store temporary credentials in parameter store
+    parameters = []
+    if mode in ("compat", "both"):
+        parameters.extend([ (name, description, creds[field]) \
+            for field, (name, description) in S3_CREDS_PARAMETERS.items() ])
+    if mode in ("structured", "both"):
+        parameters.append((*S3_CREDS_STRUCTURED, json.dumps(creds)))
+    with ThreadPoolExecutor(max_workers=len(parameters)) as executor:
+        futures = { name: executor.submit(ssm_client.put_parameter,
+                        Name=name,
+                        Description=description,
+                        Value=value,
+                        Type="SecureString",
+                        KeyId=key,
+                        Overwrite=True,
+                        Tier="Standard") \
+                    for name, description, value in parameters }
+    errors = { name: future.exception() for name, future in futures.items() \
+               if future.exception() }
+    for name, error in errors.items():
+        logger.error(f"Could not store S3 credentials parameter {name}: {error}")
+    if errors: raise next(iter(errors.values()))
+    return True
     
 def enable_renew():
     """Enable EventBridge schedule that invokes renew Lambda.
@@ -182,6 +282,22 @@ def enable_renew():
     except botocore.exceptions.ClientError as e:
         raise e
     
+def record_history(confluence, logger):
+    """Record the jobs of a run in the run history if history_file is set
+    in the configuration."""
+
+    ledger_file = confluence.ledger.ledger_file
+    if not confluence.history_file or not ledger_file: return
+    confluence.ledger.close()
+    # sqlite3 is only imported by runs that keep a history
+    from confluence.History import History
+    history = History(confluence.history_file)
+    try:
+        count = history.record_ledger(ledger_file, confluence.client_provider)
+    finally:
+        history.close()
+    logger.info(f"Recorded {count} jobs and array children in {confluence.history_file}.")
+
 def handle_error(error, logger):
     """Print out error message and exit."""
     
@@ -194,22 +310,92 @@ def main():
     """Execute Confluence workflow."""
 
     start = datetime.now()
+    profile = StartupProfile()
     # Get command line arguments and config data
     arg_parser = create_args()
     args = arg_parser.parse_args()
-    with open(args.configyaml) as yaml_file:
-        config_data = yaml.safe_load(yaml_file)
+    if not args.configyaml and not args.compiled:
+        arg_parser.error("Pass a configuration (-c) or a compiled plan (--compiled).")
+    try:
+        with profile.phase("parse configuration"):
+            config = Config.load(args.compiled) if args.compiled \
+                else Config.from_file(args.configyaml)
+    except ValueError as e:
+        sys.exit(str(e))
+    config_data = config.data
 
     # Get a logger to log to file
     log_file = Path(config_data["log_file"]) \
         if len(config_data["log_file"]) != 0 else None
     logger = create_logger(log_file=log_file, log_to_file=True)
-    
+    if config.is_stale():
+        logger.warning(f"{config.source} changed since {args.compiled} was compiled.")
+
+    # Report startup cost without submitting jobs
+    if args.profile_startup:
+        with profile.phase("create Confluence"):
+            confluence = Confluence(config)
+        with profile.phase("create stages"):
+            try:
+                confluence.create_stages()
+            except ValueError as e:
+                sys.exit(str(e))
+        with profile.phase("create AWS Batch client"):
+            confluence.client_provider.client("batch")
+        profile.measure_imports("run_confluence", cwd=Path(__file__).parent)
+        profile.report(logger)
+        sys.exit(0)
+
+    # Plan the run offline without touching AWS
+    if args.plan:
+        from confluence.Plan import Plan
+        try:
+            plan = Plan(config, logger)
+        except ValueError as e:
+            sys.exit(str(e))
+        plan.report(logger)
+        sys.exit(0)
+
+    # Compile the validated configuration and graph without submitting jobs
+    if args.compile:
+        confluence = Confluence(config)
+        try:
+            confluence.create_stages()
+        except ValueError as e:
+            sys.exit(str(e))
+        confluence.compile(args.compile)
+        logger.info(f"Compiled plan written to {args.compile}.")
+        sys.exit(0)
+
+    # Monitor a previous run without submitting jobs
+    if args.monitor:
+        monitor = Monitor.from_ledger(args.monitor, 
+            ClientProvider.from_config(config_data.get("aws")))
+        try:
+            sys.exit(monitor.wait(logger))
+        except botocore.exceptions.ClientError as e:
+            handle_error(e, logger)
+
+    # Create the stages and dependency graph before any AWS side effects so
+    # unknown dependencies and cycles are reported first
+    confluence = Confluence(config)
+    try:
+        if args.resume:
+            confluence.resume(args.resume, logger)
+        confluence.create_stages()
+    except botocore.exceptions.ClientError as e:
+        handle_error(e, logger)
+    except ValueError as e:
+        sys.exit(str(e))
+
     try:
         # Store temporary creds if simulated run
         if args.simulated:
             logger.info("Storing S3 credentials for run on simulated data.")
-            store_s3_creds(args.ssmkey)
+            s3_creds = config_data.get("s3_creds", {})
+            store_s3_creds(args.ssmkey, logger,
+                min_lifetime=s3_creds.get("min_lifetime", 3600),
+                mode=s3_creds.get("mode", "compat"))
             
         # Enable 'renew' Lambda function to renew S3 creds every 50 minutes
         if args.renew:
@@ -220,12 +406,20 @@ def main():
         handle_error(e, logger)
 
     # Submit AWS Batch jobs
-    confluence = Confluence(args.configyaml)
-    confluence.create_stages()
     confluence.execute_stages(logger)
 
     end = datetime.now()
     logger.info(f"Total execution time: {end - start}")
 
+    # Wait for submitted jobs to finish
+    if args.wait:
+        monitor = Monitor.from_confluence(confluence)
+        try:
+            exit_code = monitor.wait(logger)
+            record_history(confluence, logger)
+        except botocore.exceptions.ClientError as e:
+            handle_error(e, logger)
+        sys.exit(exit_code)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Run History
+
+This script records the jobs of Confluence runs in a local SQLite history
+and queries it.
+
+Arguements:
+  -c: Path to YAML configuration file
+  -d: Path to the SQLite history (default is history_file of the
+      configuration)
+  record: Record the jobs of a run from its ledger
+    --ledger: Path to the ledger of the run
+    --describe-children: Describe array children to record their attempts
+  runs: List recorded runs
+  jobs: List recorded jobs
+    --run: Identifier of the run
+    --stage: Name of the stage
+    --algorithm: Name of the algorithm
+    --status: Job status
+    --no-children: Leave out array children
+  runtimes: List runtime statistics per algorithm
+    --stage: Name of the stage
+    --algorithm: Name of the algorithm
+
+Results are written to standard output as tab-separated values.
+
+Example execution: python3 run_history.py -c /path/to/confluence.yaml runtimes
+"""
+
+# Standard imports
+import argparse
+import csv
+import sys
+
+# Third-party imports
+import botocore.exceptions
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Config import Config
+from confluence.History import History
+
+def create_args():
+    """Create and return argparser with arguments."""
+
+    arg_parser = argparse.ArgumentParser(
+        description="Record and query the Confluence run history")
+    arg_parser.add_argument("-c",
+                            "--configyaml",
+                            type=str,
+                            help="Path to YAML configuration file")
+    arg_parser.add_argument("-d",
+                            "--database",
+                            type=str,
+                            help="Path to the SQLite history")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Record the jobs of a run")
+    record.add_argument("--ledger",
+                        type=str,
+                        required=True,
+                        help="Path to the ledger of the run")
+    record.add_argument("--describe-children",
+                        help="Describe array children to record attempts",
+                        action="store_true")
+
+    commands.add_parser("runs", help="List recorded runs")
+
+    jobs = commands.add_parser("jobs", help="List recorded jobs")
+    jobs.add_argument("--run", type=str, help="Identifier of the run")
+    jobs.add_argument("--stage", type=str, help="Name of the stage")
+    jobs.add_argument("--algorithm", type=str, help="Name of the algorithm")
+    jobs.add_argument("--status", type=str, help="Job status")
+    jobs.add_argument("--no-children",
+                      help="Leave out array children",
+                      action="store_true")
+
+    runtimes = commands.add_parser("runtimes",
+        help="List runtime statistics per algorithm")
+    runtimes.add_argument("--stage", type=str, help="Name of the stage")
+    runtimes.add_argument("--algorithm", type=str,
+        help="Name of the algorithm")
+    return arg_parser
+
+def write_rows(rows, fieldnames):
+    """Write a list of row dictionaries to standard output as tab-separated
+    values."""
+
+    writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames,
+        delimiter="\t", lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+def main():
+    """Record or query the run history."""
+
+    args = create_args().parse_args()
+    config_data = {}
+    if args.configyaml:
+        try:
+            config_data = Config.from_file(args.configyaml).data
+        except ValueError as error:
+            sys.exit(str(error))
+    database = args.database if args.database \
+        else config_data.get("history_file")
+    if not database:
+        sys.exit("No history: pass -d or set history_file in the configuration.")
+
+    history = History(database)
+    try:
+        if args.command == "record":
+            client_provider = ClientProvider.from_config(config_data.get("aws"))
+            count = history.record_ledger(args.ledger, client_provider,
+                args.describe_children)
+            print(f"Recorded {count} jobs and array children.")
+        elif args.command == "runs":
+            write_rows(history.runs(), ["run_id", "ledger_file",
+                "recorded_at", "jobs", "succeeded", "failed"])
+        elif args.command == "jobs":
+            write_rows(history.jobs(args.run, args.stage, args.algorithm,
+                args.status, not args.no_children), History.COLUMNS)
+        elif args.command == "runtimes":
+            runtimes = history.runtimes(args.stage, args.algorithm)
+            write_rows([ { "algorithm": name, **stats } \
+                         for name, stats in sorted(runtimes.items()) ],
+                ["algorithm", "count", "mean", "p50", "p95", "max"])
+    except botocore.exceptions.ClientError as error:
+        sys.exit(f"Error encountered: {error}")
+    finally:
+        history.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Run Repair
+
+This script re-runs only the failed work of a Confluence run.
+
+The failed children of each FAILED array job are listed in bulk and re-run
+by a compact replacement array whose children learn their original index
+from the CONFLUENCE_ARRAY_INDEX_MAP environment variable. Failed jobs
+downstream are re-wired to depend on the replacements. Replacement jobs are
+appended to the ledger of the run so --monitor, run_history.py and
+run_report.py follow them.
+
+Arguements:
+  -c: Path to YAML configuration file
+  -l: Path to the ledger of the run
+  --jobs: Job names or 'stage.algorithm' names to repair (default is every
+          failed job)
+  --dry-run: Log the replacement jobs without submitting them
+
+Example execution: python3 run_repair.py -c /path/to/confluence.yaml -l /path/to/reports/submitted.jsonl --jobs flpe.neobam
+"""
+
+# Standard imports
+import argparse
+import logging
+import sys
+
+# Third-party imports
+import botocore.exceptions
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Config import Config
+from confluence.Repair import Repair
+
+def create_args():
+    """Create and return argparser with arguments."""
+
+    arg_parser = argparse.ArgumentParser(
+        description="Re-run the failed jobs and array children of a run")
+    arg_parser.add_argument("-c",
+                            "--configyaml",
+                            type=str,
+                            help="Path to YAML configuration file")
+    arg_parser.add_argument("-l",
+                            "--ledger",
+                            type=str,
+                            required=True,
+                            help="Path to the ledger of the run")
+    arg_parser.add_argument("--jobs",
+                            type=str,
+                            nargs="+",
+                            help="Job names or 'stage.algorithm' names to repair")
+    arg_parser.add_argument("--dry-run",
+                            help="Log replacement jobs without submitting them",
+                            action="store_true")
+    return arg_parser
+
+def main():
+    """Repair the failed jobs of a run."""
+
+    args = create_args().parse_args()
+    config_data = {}
+    if args.configyaml:
+        try:
+            config_data = Config.from_file(args.configyaml).data
+        except ValueError as error:
+            sys.exit(str(error))
+    logging.basicConfig(level=logging.INFO,
+        format="%(asctime)s : %(message)s")
+    logger = logging.getLogger("repair_logger")
+
+    client_provider = ClientProvider.from_config(config_data.get("aws"))
+    repair = Repair(args.ledger, client_provider, args.jobs)
+    try:
+        replacements = repair.repair(logger, args.dry_run)
+    except botocore.exceptions.ClientError as error:
+        sys.exit(f"Error encountered: {error}")
+    children = sum(len(index_map) for _, _, index_map in replacements \
+                   if index_map)
+    print(f"{'Planned' if args.dry_run else 'Submitted'} {len(replacements)} "
+        f"replacement jobs, re-running {children} failed array children.")
+
+if __name__ == "__main__":
+    main()
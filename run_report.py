@@ -0,0 +1,109 @@
+"""Run Report
+
+This script analyzes a finished Confluence run and writes a JSON summary and
+a Gantt-style HTML timeline.
+
+Job and array child timings are pulled in bulk from AWS Batch. The report
+gives queue wait and runtime percentiles per algorithm, straggler array
+indices, stage overlap and the realized critical path.
+
+Arguements:
+  -c: Path to YAML configuration file
+  -l: Path to the ledger of the run
+  -j: Job identifiers of the run (instead of a ledger)
+  -o: Path the report file names are derived from (default is next to the
+      ledger or 'report' in the current directory)
+  --history: Also record the run in the configured history_file
+
+NumPy and PyYAML must be installed in the environment prior to execution.
+
+Example execution: python3 run_report.py -c /path/to/confluence.yaml -l /path/to/reports/submitted.jsonl
+"""
+
+# Standard imports
+import argparse
+from pathlib import Path
+import sys
+
+# Third-party imports
+import botocore.exceptions
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Config import Config
+from confluence.History import History
+from confluence.Report import Report
+
+def create_args():
+    """Create and return argparser with arguments."""
+
+    arg_parser = argparse.ArgumentParser(
+        description="Report the timeline of a Confluence run")
+    arg_parser.add_argument("-c",
+                            "--configyaml",
+                            type=str,
+                            help="Path to YAML configuration file")
+    arg_parser.add_argument("-l",
+                            "--ledger",
+                            type=str,
+                            help="Path to the ledger of the run")
+    arg_parser.add_argument("-j",
+                            "--job-ids",
+                            type=str,
+                            nargs="+",
+                            help="Job identifiers of the run")
+    arg_parser.add_argument("-o",
+                            "--output",
+                            type=str,
+                            help="Path the report file names are derived from")
+    arg_parser.add_argument("--history",
+                            help="Also record the run in the run history",
+                            action="store_true")
+    return arg_parser
+
+def main():
+    """Write the report of a run."""
+
+    args = create_args().parse_args()
+    if not args.ledger and not args.job_ids:
+        sys.exit("Pass the ledger (-l) or job identifiers (-j) of a run.")
+    config_data = {}
+    if args.configyaml:
+        try:
+            config_data = Config.from_file(args.configyaml).data
+        except ValueError as error:
+            sys.exit(str(error))
+    client_provider = ClientProvider.from_config(config_data.get("aws"))
+    history = History(config_data["history_file"]) \
+        if args.history and config_data.get("history_file") else None
+    if args.output:
+        output = Path(args.output)
+    elif args.ledger:
+        output = Path(args.ledger).with_name(f"{Path(args.ledger).stem}_report")
+    else:
+        output = Path("report")
+
+    try:
+        if args.ledger:
+            report = Report.from_ledger(args.ledger, client_provider, history)
+        else:
+            report = Report.from_job_ids(args.job_ids, client_provider, history)
+    except botocore.exceptions.ClientError as error:
+        sys.exit(f"Error encountered: {error}")
+    finally:
+        if history: history.close()
+
+    summary = report.write(output)
+    print(f"Makespan: {summary['makespan']:.0f} seconds, {summary['jobs']} "
+        f"jobs, {summary['tasks']} tasks.")
+    print(f"Compute: {summary['compute_seconds']:.0f} seconds, queue wait: "
+        f"{summary['wait_seconds']:.0f} seconds.")
+    for name, stage in summary["stages"].items():
+        if stage["wall_seconds"] is not None:
+            print(f"  {name}: {stage['wall_seconds']:.0f} seconds wall, "
+                f"{stage['tasks']} tasks")
+    print(f"Critical path: {' -> '.join(step['name'] for step in summary['critical_path'])}")
+    print(f"Wrote {output.with_suffix('.json')} and {output.with_suffix('.html')}.")
+
+if __name__ == "__main__":
+    main()
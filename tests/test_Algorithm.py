@@ -39,11 +39,94 @@ class TestAlgorithm(unittest.TestCase):
         self.assertEqual({ "attempts": 1 }, job.retry_strategy)
         self.assertEqual({ "job": "test_flpe_test_alg_1"}, job.tags)
 
-    @patch("confluence.Job.boto3", autospec=True)
+    def test_create_jobs_sharded(self):
+        """Tests that arrays larger than the AWS Batch limit are sharded."""
+
+        alg = Algorithm("test_alg", None, 25001, ["reaches.json"])
+        alg.create_jobs("test_flpe", { "test_flpe_test_alg_0_0": "reused-id" })
+
+        self.assertEqual([(0, 8334), (8334, 8334), (16668, 8333)], 
+            alg.get_shards())
+        self.assertEqual(["reused-id"], alg.reused_ids)
+        self.assertEqual({ "reused-id": (0, 8334) }, alg.shards)
+        self.assertEqual(2, len(alg.jobs))
+        job = alg.jobs[1]
+        self.assertEqual("test_flpe_test_alg_0_2", job.name)
+        self.assertEqual({ "size": 8333 }, job.array_props)
+        self.assertEqual([ { "name": "CONFLUENCE_ARRAY_OFFSET", 
+            "value": "16668" } ], job.overrides["environment"])
+
+    def test_create_jobs_overrides(self):
+        """Tests job definition, queue, resource and timeout overrides."""
+
+        alg = Algorithm("test_alg", 1, 10, [], job_def="test_alg:3",
+            queue="large", vcpus=4, memory=16384, timeout=7200)
+        alg.create_jobs("test_flpe")
+
+        request = alg.jobs[0].request()
+        self.assertEqual("test_alg:3", request["jobDefinition"])
+        self.assertEqual("large", request["jobQueue"])
+        self.assertEqual({ "resourceRequirements": [
+            { "type": "VCPU", "value": "4" },
+            { "type": "MEMORY", "value": "16384" } ] }, 
+            request["containerOverrides"])
+        self.assertEqual({ "attemptDurationSeconds": 7200 }, request["timeout"])
+        with self.assertRaises(ValueError):
+            Algorithm("test_alg", 1, 10, [], timeout=30)
+
+    def test_create_retry_strategy(self):
+        """Tests that retry configurations become AWS Batch retry
+        strategies."""
+
+        retry = { "attempts": 3, "evaluate_on_exit": [
+            { "on_status_reason": "Host EC2*", "action": "retry" },
+            { "on_exit_code": 1, "action": "EXIT" } ] }
+        alg = Algorithm("test_alg", 2, 0, [], retry=retry)
+        alg.create_jobs("test_flpe")
+
+        expected = { "attempts": 3, "evaluateOnExit": [
+            { "onStatusReason": "Host EC2*", "action": "RETRY" },
+            { "onExitCode": "1", "action": "EXIT" } ] }
+        self.assertEqual(expected, alg.jobs[1].retry_strategy)
+        self.assertEqual({ "attempts": 2 }, 
+            Algorithm.create_retry_strategy(2))
+        with self.assertRaises(ValueError):
+            Algorithm.create_retry_strategy(11)
+        with self.assertRaises(ValueError):
+            Algorithm.create_retry_strategy({ "evaluate_on_exit": [
+                { "on_exit_code": "1", "action": "ignore" } ] })
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_submit_jobs_sharded_n_to_n(self, mock_boto):
+        """Tests that shards are linked N_TO_N to the upstream shard with the
+        same offset and size."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = [ { "jobId": "shard-0" },
+                                         { "jobId": "shard-1" } ]
+        dependencies = ["up-0", "up-1", "scalar"]
+        array_dependencies = { "up-0": 7500, "up-1": 7500 }
+        array_offsets = { "up-0": 0, "up-1": 7500 }
+
+        alg = Algorithm("test_alg", 1, 15000, [], n_to_n=True)
+        alg.create_jobs("test_flpe")
+        alg.submit_jobs(dependencies, array_dependencies, array_offsets)
+
+        self.assertEqual([ { "jobId": "up-0", "type": "N_TO_N" },
+            { "jobId": "up-1" }, { "jobId": "scalar" } ], 
+            alg.jobs[0].depends_on)
+        self.assertEqual([ { "jobId": "up-0" },
+            { "jobId": "up-1", "type": "N_TO_N" }, { "jobId": "scalar" } ], 
+            alg.jobs[1].depends_on)
+        self.assertEqual({ "shard-0": (0, 7500), "shard-1": (7500, 7500) },
+            alg.shards)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
     def test_submit_jobs(self, mock_boto):
         """Test submit_jobs method."""
 
-        mock_boto.client("batch").submit_job.side_effect = [
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = [
             { "jobArn": "amazon-resource-name", 
               "jobName": "test_flpe_test_alg_0", 
               "jobId": "d90d061b-c16d-4a47-ba25-260727bac56b" }, 
@@ -68,4 +151,26 @@ class TestAlgorithm(unittest.TestCase):
                     "1d4b37c6-7dfb-4301-99f0-6181fe3ba124"]
         self.assertEqual(expected, alg.job_ids)
 
-        
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_submit_jobs_n_to_n(self, mock_boto):
+        """Test submit_jobs method with index-wise dependencies."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.return_value = { "jobId": "test-id" }
+        array_dependencies = {
+            "f00afeb4-354a-4e80-a226-0021a8b38e32": 500,
+            "397fdcd6-5af3-4003-862f-03fcb6594cce": 22
+        }
+
+        alg = Algorithm("test_alg", 1, 500, self.INPUT_FILES, n_to_n=True)
+        alg.create_jobs("test_flpe")
+        alg.submit_jobs(self.DEPENDENCIES, array_dependencies)
+
+        expected = [ dict(dep) for dep in self.EXPECTED_DEPS ]
+        expected[0]["type"] = "N_TO_N"
+        self.assertEqual(expected, alg.jobs[0].depends_on)
+
+        alg = Algorithm("test_alg", 1, 500, self.INPUT_FILES)
+        alg.create_jobs("test_flpe")
+        alg.submit_jobs(self.DEPENDENCIES, array_dependencies)
+        self.assertEqual(self.EXPECTED_DEPS, alg.jobs[0].depends_on)
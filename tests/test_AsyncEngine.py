@@ -0,0 +1,137 @@
+# Standard imports
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Third-party imports
+import botocore
+
+# Local imports
+from confluence.AsyncEngine import AsyncEngine
+from confluence.ClientProvider import ClientProvider
+from confluence.Graph import Graph
+from confluence.Stage import Stage
+from tests.confluence_response import error_response
+
+class TestAsyncEngine(unittest.TestCase):
+    """Tests methods from AsyncEngine class."""
+
+    def create_graph(self, config):
+        """Create a Graph from a dictionary of stage configurations."""
+
+        stages = []
+        for name, stage_dict in config.items():
+            stage = Stage(name)
+            stage.create_algorithms(stage_dict)
+            stages.append(stage)
+        return Graph(stages), stages
+
+    def alg_dict(self, num_jobs=1, array_size=0, depends_on=None):
+        """Return the configuration of an algorithm."""
+
+        alg = { "num_jobs": num_jobs, "array_size": array_size,
+                "arguments": [] }
+        if depends_on is not None: alg["depends_on"] = depends_on
+        return alg
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_execute(self, mock_boto):
+        """Tests the execute method."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: {
+            "jobId": f"{kwargs['jobName']}-id"
+        }
+
+        graph, stages = self.create_graph({
+            "input": { "input": self.alg_dict(array_size=10) },
+            "flpe": { "geobam": self.alg_dict(num_jobs=3),
+                      "hivdi": self.alg_dict() },
+            "output": { "output": self.alg_dict() }
+        })
+        submitted = []
+        AsyncEngine(graph, max_concurrency=4,
+            on_submitted=submitted.append).execute()
+
+        self.assertEqual(stages[2].algorithms[0], submitted[-1])
+        geobam = stages[1].algorithms[0]
+        self.assertEqual([ f"flpe_geobam_{i}-id" for i in range(3) ],
+            geobam.job_ids)
+        self.assertEqual([ { "jobId": "input_input_0-id" } ],
+            geobam.jobs[2].depends_on)
+        self.assertEqual(stages[1].algorithms, stages[1].submitted)
+        expected = [ { "jobId": f"flpe_geobam_{i}-id" } for i in range(3) ] \
+            + [ { "jobId": "flpe_hivdi_0-id" } ]
+        self.assertEqual(expected, stages[2].algorithms[0].jobs[0].depends_on)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_execute_exception(self, mock_boto):
+        """Tests that submission stops at the first error and accepted jobs
+        are kept."""
+
+        def submit_job(**kwargs):
+            if kwargs["jobName"] == "flpe_hivdi_0":
+                raise botocore.exceptions.ClientError(error_response,
+                    "submit_job")
+            return { "jobId": f"{kwargs['jobName']}-id" }
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = submit_job
+
+        graph, stages = self.create_graph({
+            "input": { "input": self.alg_dict() },
+            "flpe": { "geobam": self.alg_dict(), "hivdi": self.alg_dict() },
+            "output": { "output": self.alg_dict() }
+        })
+
+        with self.assertRaises(botocore.exceptions.ClientError):
+            AsyncEngine(graph, max_concurrency=1).execute()
+        self.assertEqual(["input_input_0-id"], stages[0].algorithms[0].job_ids)
+        self.assertEqual(["flpe_geobam_0-id"], stages[1].algorithms[0].job_ids)
+        self.assertEqual([], stages[1].algorithms[1].job_ids)
+        self.assertEqual([], stages[2].algorithms[0].job_ids)
+        self.assertEqual([], stages[2].submitted)
+
+    def test_call_all(self):
+        """Tests that calls run concurrently up to max_concurrency and that
+        errors are returned in item order."""
+
+        lock = threading.Lock()
+        in_flight = [0, 0]
+        def call(item):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            if item == 3: raise ValueError(item)
+            return item * 2
+
+        results = AsyncEngine(None, max_concurrency=2).call_all(call, 
+            list(range(6)))
+
+        self.assertEqual([0, 2, 4], results[:3])
+        self.assertIsInstance(results[3], ValueError)
+        self.assertEqual([8, 10], results[4:])
+        self.assertEqual(2, in_flight[1])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_describe_jobs(self, mock_boto):
+        """Tests that jobs are described in concurrent batches of 100."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.side_effect = lambda jobs: { "jobs": [
+            { "jobId": job_id, "status": "RUNNING" } for job_id in jobs ] }
+        job_ids = [ f"id-{i}" for i in range(250) ]
+
+        descriptions = AsyncEngine(None, max_concurrency=4).describe_jobs(
+            ClientProvider(), job_ids + job_ids[:10])
+
+        self.assertEqual(job_ids, list(descriptions))
+        self.assertEqual(3, batch.describe_jobs.call_count)
+
+        batch.describe_jobs.side_effect = botocore.exceptions.ClientError(
+            error_response, "describe_jobs")
+        with self.assertRaises(botocore.exceptions.ClientError):
+            AsyncEngine(None).describe_jobs(ClientProvider(), job_ids)
@@ -0,0 +1,73 @@
+# Standard imports
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Confluence import Confluence
+
+class TestClientProvider(unittest.TestCase):
+    """Tests methods from ClientProvider class."""
+
+    CONFIG_FILE = Path(__file__).parent / "data" / "confluence_test.yaml"
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_client(self, mock_boto):
+        """Tests the client method."""
+
+        provider = ClientProvider(region="us-west-2", max_pool_connections=50)
+        batch1 = provider.client("batch")
+        batch2 = provider.client("batch")
+
+        self.assertIs(batch1, batch2)
+        mock_boto.session.Session.assert_called_once_with(
+            region_name="us-west-2")
+        session = mock_boto.session.Session.return_value
+        self.assertEqual(1, session.client.call_count)
+        config = session.client.call_args.kwargs["config"]
+        self.assertEqual(50, config.max_pool_connections)
+        self.assertEqual({ "mode": "standard", "max_attempts": 1 }, 
+            config.retries)
+
+    def test_from_config(self):
+        """Tests the from_config method."""
+
+        provider = ClientProvider.from_config({
+            "region": "us-west-2",
+            "max_pool_connections": 25,
+            "retries": { "mode": "adaptive", "max_attempts": 5 },
+            "rate_limit": { "rate": 5, "max_rate": 20 }
+        })
+        self.assertEqual("us-west-2", provider.region)
+        self.assertEqual(25, provider.max_pool_connections)
+        self.assertEqual({ "mode": "adaptive", "max_attempts": 5 }, 
+            provider.retries)
+        self.assertEqual(5, provider.limiter.rate)
+        self.assertEqual(20, provider.limiter.max_rate)
+
+        provider = ClientProvider.from_config(None)
+        self.assertIsNone(provider.region)
+        self.assertEqual(ClientProvider.DEFAULT_POOL, 
+            provider.max_pool_connections)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_call(self, mock_boto):
+        """Tests the call method."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [] }
+        provider = ClientProvider()
+        response = provider.call("batch", "describe_jobs", jobs=["job-id"])
+
+        self.assertEqual({ "jobs": [] }, response)
+        batch.describe_jobs.assert_called_once_with(jobs=["job-id"])
+
+    def test_shared_provider(self):
+        """Tests that every Stage, Algorithm and Job shares one provider."""
+
+        confluence = Confluence(self.CONFIG_FILE)
+        confluence.create_stages()
+        providers = { id(job.client_provider) for stage in confluence.stages \
+                        for alg in stage.algorithms for job in alg.jobs }
+        self.assertEqual({ id(confluence.client_provider) }, providers)
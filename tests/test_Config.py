@@ -0,0 +1,80 @@
+# Standard imports
+import logging
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Third-party imports
+import yaml
+
+# Local imports
+from confluence.Config import Config
+from confluence.Confluence import Confluence
+from confluence.Graph import Graph
+
+class TestConfig(unittest.TestCase):
+    """Tests methods from Config class."""
+
+    CONFIG_FILE = Path(__file__).parent / "data" / "confluence_test.yaml"
+    GRAPH_FILE = Path(__file__).parent / "data" / "confluence_test_graph.yaml"
+
+    def test_validate(self):
+        """Tests the validate method reports every schema error at once."""
+
+        config = Config.from_file(self.CONFIG_FILE)
+        self.assertEqual(self.CONFIG_FILE, config.source)
+        self.assertFalse(config.is_stale())
+
+        with open(self.CONFIG_FILE) as yaml_file:
+            config_data = yaml.safe_load(yaml_file)
+        config_data["engine"] = "fibers"
+        config_data["max_workers"] = 0
+        config_data["stages"]["flpe"]["geobam"]["array_size"] = "10O"
+        config_data["stages"]["flpe"]["hivdi"]["arry_size"] = \
+            config_data["stages"]["flpe"]["hivdi"].pop("array_size")
+        config_data["stages"]["flpe"]["sad"]["timeout"] = 30
+        config_data["stages"]["flpe"]["sad"]["retry"] = 11
+        with self.assertRaises(ValueError) as context:
+            Config(config_data)
+        message = str(context.exception)
+        self.assertIn("engine must be one of threads, asyncio", message)
+        self.assertIn("max_workers must be at least 1", message)
+        self.assertIn("flpe.geobam.array_size must be int, got str '10O'", 
+            message)
+        self.assertIn("flpe.hivdi has unknown key 'arry_size'", message)
+        self.assertIn("flpe.hivdi is missing required key 'array_size'", 
+            message)
+        self.assertIn("flpe.sad.timeout must be at least 60", message)
+        self.assertIn("flpe.sad.retry: Retry attempts", message)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_write_load(self, mock_boto):
+        """Tests a compiled plan restores the graph without resolving it."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"{kwargs['jobName']}-id" 
+        }
+        confluence = Confluence(self.GRAPH_FILE)
+        confluence.create_stages()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            plan_file = Path(temp_dir) / "plan.json"
+            confluence.compile(plan_file)
+            config = Config.load(plan_file)
+
+        self.assertEqual(confluence.config_data, config.data)
+        self.assertEqual(confluence.graph.to_dict(), config.graph)
+        with patch.object(Graph, "sort") as mock_sort, \
+            patch.object(Graph, "resolve") as mock_resolve:
+            compiled = Confluence(config)
+            compiled.create_stages()
+        mock_sort.assert_not_called()
+        mock_resolve.assert_not_called()
+        self.assertEqual(confluence.graph.to_dict(), compiled.graph.to_dict())
+
+        compiled.execute_stages(logging.getLogger("test_logger"))
+        self.assertEqual(7, batch.submit_job.call_count)
+        validation = compiled.stages[5].algorithms[0]
+        self.assertEqual([{ "jobId": "flpe_hivdi_0-id" }], 
+            validation.jobs[0].depends_on)
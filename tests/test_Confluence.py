@@ -2,6 +2,7 @@
 import csv
 import logging
 from pathlib import Path
+import tempfile
 import unittest
 from unittest.mock import patch
 
@@ -9,7 +10,9 @@ from unittest.mock import patch
 import botocore
 
 # Local imports
+from confluence.AsyncEngine import AsyncEngine
 from confluence.Confluence import Confluence
+from confluence.Ledger import Ledger
 from tests.confluence_response import describe_response, error_response, \
     execute_response, execute_expected
 
@@ -24,6 +27,7 @@ class TestConfluence(unittest.TestCase):
         confluence = Confluence(self.CONFIG_FILE)
         confluence.create_stages()
         self.assertEqual(7, len(confluence.stages))
+        self.assertIsNone(confluence.graph)
         
         stage = confluence.stages[2]
         self.assertEqual(5, len(stage.algorithms))
@@ -31,18 +35,85 @@ class TestConfluence(unittest.TestCase):
         self.assertEqual("flpe", stage.name)
         self.assertEqual(0, len(stage.submitted))
 
-    @patch("confluence.Job.boto3", autospec=True)
+    def test_unknown_engine(self):
+        """Tests that an unknown engine is rejected."""
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "confluence.yaml"
+            config_file.write_text("engine: fibers\n" 
+                + self.CONFIG_FILE.read_text())
+            with self.assertRaises(ValueError):
+                Confluence(config_file)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_execute_stages_asyncio(self, mock_boto):
+        """Tests the execute_stages method with the asyncio engine."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: {
+            "jobId": f"{kwargs['jobName']}-id"
+        }
+        logger = logging.getLogger("test_logger")
+        confluence = Confluence(self.CONFIG_FILE)
+        confluence.engine = "asyncio"
+        confluence.submission_file = None
+        confluence.create_stages()
+        self.assertIsNotNone(confluence.graph)
+        confluence.execute_stages(logger)
+
+        self.assertEqual(7, len(confluence.submitted))
+        self.assertEqual(11, batch.submit_job.call_count)
+        integrator = confluence.stages[3].algorithms[0]
+        flpe_ids = [ job_id for alg in confluence.stages[2].algorithms
+                     for job_id in alg.job_ids ]
+        self.assertEqual(flpe_ids,
+            [ dep["jobId"] for dep in integrator.jobs[0].depends_on ])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_execute_stages_priority(self, mock_boto):
+        """Tests that jobs are submitted with critical-path priorities."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: {
+            "jobId": f"{kwargs['jobName']}-id"
+        }
+        logger = logging.getLogger("test_logger")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "confluence.yaml"
+            config_file.write_text("priority:\n  max_priority: 100\n"
+                "  share_identifier: swot\n" + self.CONFIG_FILE.read_text())
+            confluence = Confluence(config_file)
+            confluence.submission_file = None
+            confluence.create_stages()
+            confluence.prioritize({ "flpe.metroman": 600 })
+            confluence.execute_stages(logger)
+
+        requests = { call.kwargs["jobName"]: call.kwargs \
+                     for call in batch.submit_job.call_args_list }
+        self.assertEqual(11, len(requests))
+        self.assertTrue(all(request["shareIdentifier"] == "swot" \
+                            for request in requests.values()))
+        metroman = requests["flpe_metroman_0"]["schedulingPriorityOverride"]
+        geobam = requests["flpe_geobam_0"]["schedulingPriorityOverride"]
+        self.assertEqual(100, requests["input_input_0"]
+            ["schedulingPriorityOverride"])
+        self.assertGreater(metroman, geobam)
+        flpe = [ name for name in requests if name.startswith("flpe") ]
+        self.assertEqual("flpe_metroman_0", flpe[0])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
     def test_execute_stages(self, mock_boto):
         """Tests the execute_stages method."""
 
-        mock_boto.client("batch").submit_job.side_effect = execute_response
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = execute_response
         logger = logging.getLogger("test_logger")
         confluence = Confluence(self.CONFIG_FILE)
         confluence.create_stages()
         confluence.execute_stages(logger)
 
         self.assertEqual(7, len(confluence.submitted))
-        self.assertEqual(11, mock_boto.client("batch").submit_job.call_count)
+        self.assertEqual(11, batch.submit_job.call_count)
 
         stage_total = 0
         [stage_total := stage_total + len(stage.submitted) for stage in confluence.stages]
@@ -55,15 +126,41 @@ class TestConfluence(unittest.TestCase):
         stage = confluence.stages[3]
         self.assertListEqual(execute_expected, stage.dependencies)
     
-    @patch("confluence.Job.boto3", autospec=True)
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_execute_graph(self, mock_boto):
+        """Tests the execute_stages method with algorithm dependencies."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"{kwargs['jobName']}-id" 
+        }
+        graph_config = Path(__file__).parent / "data" / "confluence_test_graph.yaml"
+        logger = logging.getLogger("test_logger")
+        confluence = Confluence(graph_config)
+        confluence.create_stages()
+        self.assertIsNotNone(confluence.graph)
+        confluence.execute_stages(logger)
+
+        self.assertEqual(6, len(confluence.submitted))
+        self.assertEqual(7, batch.submit_job.call_count)
+
+        prediagnostics = confluence.stages[2].algorithms[0]
+        self.assertEqual([{ "jobId": "input_input_0-id", "type": "N_TO_N" }], 
+            prediagnostics.jobs[0].depends_on)
+        validation = confluence.stages[5].algorithms[0]
+        self.assertEqual([{ "jobId": "flpe_hivdi_0-id" }], 
+            validation.jobs[0].depends_on)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
     @patch("confluence.Confluence.sys", autospec=True)
     @patch.object(Confluence, "terminate_jobs")
     def test_execute_stages_exception(self, mock_terminate, mock_exit, 
-        mock_job_boto):
+        mock_boto):
         """Tests execute_stages method when an exception is thrown."""
 
+        batch = mock_boto.session.Session.return_value.client.return_value
         error = botocore.exceptions.ClientError(error_response, "Test")
-        mock_job_boto.client("batch").submit_job.side_effect = error
+        batch.submit_job.side_effect = error
         exception_config = Path(__file__).parent / "data" / "confluence_test_exception.yaml"
         logger = logging.getLogger("test_logger")
         logging.disable(logging.CRITICAL)
@@ -73,13 +170,13 @@ class TestConfluence(unittest.TestCase):
         
         self.assertEqual(1, mock_terminate.call_count)
     
-    @patch("confluence.Confluence.boto3", autospec=True)
-    @patch("confluence.Job.boto3", autospec=True)
-    def test_terminate_jobs(self, mock_job_boto, mock_conf_boto):
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_terminate_jobs(self, mock_boto):
         """Tests terminate_jobs method."""
 
-        mock_job_boto.client("batch").submit_job.side_effect = execute_response
-        mock_conf_boto.client("batch").describe_jobs.side_effect = describe_response
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = execute_response
+        batch.describe_jobs.side_effect = describe_response
         logger = logging.getLogger("test_logger")
         confluence = Confluence(self.CONFIG_FILE)
         confluence.create_stages()
@@ -88,17 +185,113 @@ class TestConfluence(unittest.TestCase):
 
         self.assertEqual(11, len(confluence.terminated))
         self.assertEqual(0, len(confluence.not_terminated))
-        self.assertEqual(6, mock_conf_boto.client("batch").cancel_job.call_count)
-        self.assertEqual(5, mock_conf_boto.client("batch").terminate_job.call_count)
+        self.assertEqual(6, batch.cancel_job.call_count)
+        self.assertEqual(5, batch.terminate_job.call_count)
+        self.assertEqual(1, batch.describe_jobs.call_count)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_terminate_jobs_asyncio(self, mock_boto):
+        """Tests terminate_jobs method with the asyncio engine."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = execute_response
+        batch.describe_jobs.side_effect = describe_response
+        logger = logging.getLogger("test_logger")
+        confluence = Confluence(self.CONFIG_FILE)
+        confluence.engine = "asyncio"
+        confluence.create_stages()
+        confluence.execute_stages(logger)
+        with patch("confluence.AsyncEngine.AsyncEngine.call_all", 
+            autospec=True, side_effect=AsyncEngine.call_all) as mock_call:
+            confluence.terminate_jobs(logger)
+
+        self.assertEqual(11, len(confluence.terminated))
+        self.assertEqual(0, len(confluence.not_terminated))
+        self.assertEqual(6, batch.cancel_job.call_count)
+        self.assertEqual(5, batch.terminate_job.call_count)
+        self.assertEqual(1, batch.describe_jobs.call_count)
+        self.assertEqual(2, mock_call.call_count)
 
-    @patch("confluence.Job.boto3", autospec=True)
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    @patch("confluence.Confluence.sys", autospec=True)
+    def test_terminate_jobs_partial_stage(self, mock_exit, mock_boto):
+        """Tests terminate_jobs method covers jobs of a failing stage."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        error = botocore.exceptions.ClientError(error_response, "Test")
+        batch.submit_job.side_effect = execute_response[:4] + [error]
+        batch.describe_jobs.side_effect = lambda jobs: { 
+            "jobs": [ { "jobId": job_id, "status": "RUNNABLE" } 
+                      for job_id in jobs ] 
+        }
+        logger = logging.getLogger("test_logger")
+        logging.disable(logging.CRITICAL)
+        confluence = Confluence(self.CONFIG_FILE)
+        confluence.create_stages()
+        confluence.execute_stages(logger)
+
+        # Stage flpe failed after geobam and hivdi were accepted
+        self.assertEqual(2, len(confluence.submitted))
+        self.assertEqual(execute_expected[:2], 
+            confluence.terminated[2:4])
+        self.assertEqual(4, batch.cancel_job.call_count)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_resume(self, mock_boto):
+        """Tests the resume method."""
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        ledger_file = Path(tmp_dir.name) / "previous.jsonl"
+        ledger = Ledger(ledger_file)
+        previous = [
+            ("input", "input", "input-id", [], "SUCCEEDED"),
+            ("prediagnostics", "prediagnostics", "prediagnostics-id", 
+                ["input-id"], "FAILED"),
+            ("flpe", "geobam", "geobam-id", ["prediagnostics-id"], "PENDING")
+        ]
+        for stage, alg, job_id, depends_on, _ in previous:
+            ledger.append({ "stage": stage, "algorithm": alg, 
+                "job_name": f"{stage}_{alg}_0", "job_id": job_id, 
+                "array_size": 500, "depends_on": depends_on })
+        ledger.close()
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [ 
+            { "jobId": job_id, "status": status } 
+            for _, _, job_id, _, status in previous 
+        ] }
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"{kwargs['jobName']}-id" 
+        }
+        logger = logging.getLogger("test_logger")
+        confluence = Confluence(self.CONFIG_FILE)
+        confluence.resume(ledger_file, logger)
+        self.assertEqual({ "input_input_0": "input-id" }, confluence.reused)
+        self.assertEqual(1, batch.describe_jobs.call_count)
+
+        confluence.create_stages()
+        input_alg = confluence.stages[0].algorithms[0]
+        self.assertEqual(0, len(input_alg.jobs))
+        self.assertEqual(["input-id"], input_alg.job_ids)
+
+        confluence.execute_stages(logger)
+        self.assertEqual(10, batch.submit_job.call_count)
+        prediagnostics = confluence.stages[1].algorithms[0]
+        self.assertEqual([{ "jobId": "input-id" }], 
+            prediagnostics.jobs[0].depends_on)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
     def test_write_submitted(self, mock_boto):
         """Tests the write_submitted method."""
 
-        mock_boto.client("batch").submit_job.side_effect = execute_response
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = execute_response
         confluence = Confluence(self.CONFIG_FILE)
         confluence.create_stages()
-        submission_file = Path(__file__).parent / "data" / "submission_test.csv"
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        submission_file = Path(tmp_dir.name) / "submission_test.csv"
         confluence.set_submission_file(submission_file=submission_file)
         logger = logging.getLogger("test_logger")
         confluence.execute_stages(logger)
@@ -118,4 +311,57 @@ class TestConfluence(unittest.TestCase):
         self.assertEqual(7, len(set(stage)))
         self.assertEqual(11, len(set(alg)))
         self.assertEqual(11, len(set(job)))
-        self.assertEqual(11, count)
\ No newline at end of file
+        self.assertEqual(11, count)
+
+        records = Ledger.read(submission_file.with_suffix(".jsonl"))
+        self.assertEqual(11, len(records))
+        self.assertEqual(execute_expected, records[7]["depends_on"])
+        self.assertEqual(500, records[7]["array_size"])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_ledger_per_run(self, mock_boto):
+        """Tests that each run against the same submission file starts a new
+        ledger and a resumed run keeps appending to its own."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        submission_file = Path(tmp_dir.name) / "submitted.csv"
+        ledger_file = submission_file.with_suffix(".jsonl")
+        logger = logging.getLogger("test_logger")
+        for run in ("first", "second"):
+            batch.submit_job.side_effect = lambda **kwargs: { 
+                "jobId": f"{run}-{kwargs['jobName']}" 
+            }
+            confluence = Confluence(self.CONFIG_FILE)
+            confluence.set_submission_file(submission_file=submission_file)
+            confluence.create_stages()
+            confluence.execute_stages(logger)
+
+        records = Ledger.read(ledger_file)
+        self.assertEqual(11, len(records))
+        self.assertTrue(all(record["job_id"].startswith("second-") \
+                            for record in records))
+        rotated = list(Path(tmp_dir.name).glob("submitted.*.jsonl"))
+        self.assertEqual(1, len(rotated))
+        self.assertTrue(all(record["job_id"].startswith("first-") \
+                            for record in Ledger.read(rotated[0])))
+        with open(submission_file) as csv_file:
+            self.assertEqual(11, len(list(csv.DictReader(csv_file))))
+
+        batch.describe_jobs.return_value = { "jobs": [ 
+            { "jobId": record["job_id"], "status": "SUCCEEDED" } \
+            for record in records[:1] ] }
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"resumed-{kwargs['jobName']}" 
+        }
+        confluence = Confluence(self.CONFIG_FILE)
+        confluence.set_submission_file(submission_file=submission_file)
+        confluence.resume(ledger_file, logger)
+        confluence.create_stages()
+        confluence.execute_stages(logger)
+        resumed = Ledger.read(ledger_file)
+        self.assertEqual(21, len(resumed))
+        self.assertEqual(1, len({ record["run_id"] for record in resumed }))
+        self.assertEqual(1, 
+            len(list(Path(tmp_dir.name).glob("submitted.*.jsonl"))))
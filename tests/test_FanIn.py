@@ -0,0 +1,85 @@
+# Standard imports
+import unittest
+
+# Local imports
+from confluence.Algorithm import Algorithm
+from confluence.FanIn import FanIn
+from confluence.Plan import PlanProvider
+
+class TestFanIn(unittest.TestCase):
+    """Tests methods from FanIn class."""
+
+    def create_fan_in(self, limit=20):
+        """Return a FanIn that submits join jobs to a planning client."""
+
+        return FanIn(PlanProvider(), limit=limit)
+
+    def test_compact_within_limit(self):
+        """Tests that dependencies within the limit are left alone."""
+
+        fan_in = self.create_fan_in()
+        dependencies = [ f"id-{i}" for i in range(20) ]
+        self.assertEqual((dependencies, []),
+            fan_in.compact("test", dependencies))
+        self.assertEqual([], fan_in.jobs)
+
+    def test_compact_tree(self):
+        """Tests that wide dependencies are joined level by level."""
+
+        fan_in = self.create_fan_in(limit=3)
+        dependencies = [ f"id-{i}" for i in range(10) ]
+        compacted, n_to_n = fan_in.compact("test", dependencies)
+
+        self.assertLessEqual(len(compacted), 3)
+        self.assertEqual([], n_to_n)
+        # Every original dependency is reached through the join tree
+        depends_on = { job.job_id: [ dep["jobId"] for dep in job.depends_on ]
+                       for job in fan_in.jobs }
+        def reach(job_id):
+            if job_id not in depends_on: return { job_id }
+            return set().union(*[ reach(dep) for dep in depends_on[job_id] ])
+        self.assertEqual(set(dependencies),
+            set().union(*[ reach(job_id) for job_id in compacted ]))
+        self.assertTrue(all(len(job.depends_on) <= 3 for job in fan_in.jobs))
+        self.assertEqual("test_join_0", fan_in.jobs[0].name)
+        self.assertEqual("test", fan_in.jobs[0].queue)
+        self.assertEqual("join", fan_in.jobs[0].job_def)
+
+    def test_compact_n_to_n(self):
+        """Tests that N_TO_N dependencies are joined by array join jobs."""
+
+        fan_in = self.create_fan_in(limit=4)
+        n_to_n_ids = [ f"array-{i}" for i in range(6) ]
+        dependencies = ["whole-0", "whole-1"] + n_to_n_ids
+        compacted, n_to_n = fan_in.compact("test", dependencies, n_to_n_ids,
+            array_size=50)
+
+        self.assertLessEqual(len(compacted), 4)
+        self.assertTrue(set(n_to_n) < set(compacted))
+        array_joins = [ job for job in fan_in.jobs if job.array_props ]
+        self.assertEqual({ "size": 50 }, array_joins[0].array_props)
+        self.assertTrue(all(dep["type"] == "N_TO_N" \
+            for job in array_joins for dep in job.depends_on))
+
+    def test_compact_shared(self):
+        """Tests that join jobs are shared by algorithms with the same
+        dependencies."""
+
+        fan_in = self.create_fan_in()
+        provider = fan_in.client_provider
+        dependencies = [ f"id-{i}" for i in range(30) ]
+        for name in ("alg1", "alg2"):
+            alg = Algorithm(name, 2, 0, [], client_provider=provider,
+                fan_in=fan_in)
+            alg.create_jobs("test")
+            alg.submit_jobs(dependencies)
+            for job in alg.jobs:
+                self.assertEqual(11, len(job.depends_on))
+        self.assertEqual(1, len(fan_in.jobs))
+        self.assertEqual("test", fan_in.stages["test_join_0"])
+
+    def test_limit(self):
+        """Tests that a limit smaller than 2 is rejected."""
+
+        with self.assertRaises(ValueError):
+            self.create_fan_in(limit=1)
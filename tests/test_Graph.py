@@ -0,0 +1,144 @@
+# Standard imports
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.Graph import Graph
+from confluence.Stage import Stage
+
+class TestGraph(unittest.TestCase):
+    """Tests methods from Graph class."""
+
+    def create_stages(self, config):
+        """Create Stage objects from a dictionary of stage configurations."""
+
+        stages = []
+        for name, stage_dict in config.items():
+            stage = Stage(name)
+            stage.create_algorithms(stage_dict)
+            stages.append(stage)
+        return stages
+
+    def alg_dict(self, array_size=0, depends_on=None):
+        """Return the configuration of a single-job algorithm."""
+
+        alg = { "num_jobs": 1, "array_size": array_size, "arguments": [] }
+        if depends_on is not None: alg["depends_on"] = depends_on
+        return alg
+
+    def test_linear_default(self):
+        """Tests that algorithms without depends_on follow the previous 
+        stage."""
+
+        stages = self.create_stages({
+            "input": { "input": self.alg_dict() },
+            "flpe": { "geobam": self.alg_dict(), "hivdi": self.alg_dict() },
+            "output": { "output": self.alg_dict() }
+        })
+        graph = Graph(stages)
+
+        input_alg = stages[0].algorithms[0]
+        geobam, hivdi = stages[1].algorithms
+        output = stages[2].algorithms[0]
+        self.assertEqual([], graph.upstream[input_alg])
+        self.assertEqual([input_alg], graph.upstream[geobam])
+        self.assertEqual([geobam, hivdi], graph.upstream[output])
+        self.assertEqual([input_alg, geobam, hivdi, output], graph.order)
+
+    def test_resolve(self):
+        """Tests stage, algorithm and 'stage.algorithm' dependencies."""
+
+        stages = self.create_stages({
+            "input": { "input": self.alg_dict() },
+            "priors": { "priors": self.alg_dict(depends_on=[]) },
+            "flpe": { 
+                "geobam": self.alg_dict(depends_on=["input", "priors"]), 
+                "hivdi": self.alg_dict(depends_on=["input"]) 
+            },
+            "validation": { 
+                "validation": self.alg_dict(depends_on=["flpe.hivdi"]) 
+            },
+            "output": { "output": self.alg_dict(depends_on=["flpe"]) }
+        })
+        graph = Graph(stages)
+
+        input_alg = stages[0].algorithms[0]
+        priors = stages[1].algorithms[0]
+        geobam, hivdi = stages[2].algorithms
+        self.assertEqual([], graph.upstream[priors])
+        self.assertEqual([input_alg, priors], graph.upstream[geobam])
+        self.assertEqual([hivdi], graph.upstream[stages[3].algorithms[0]])
+        self.assertEqual([geobam, hivdi], graph.upstream[stages[4].algorithms[0]])
+
+    def test_prioritize(self):
+        """Tests that critical-path weights order ready algorithms."""
+
+        stages = self.create_stages({
+            "input": { "input": self.alg_dict() },
+            "flpe": { "geobam": self.alg_dict(), "hivdi": self.alg_dict(),
+                      "sic4dvar": self.alg_dict() },
+            "postdiagnostics": { 
+                "postdiagnostics": self.alg_dict(depends_on=["sic4dvar"]) 
+            }
+        })
+        graph = Graph(stages)
+        input_alg = stages[0].algorithms[0]
+        geobam, hivdi, sic4dvar = stages[1].algorithms
+        post = stages[2].algorithms[0]
+        graph.prioritize({ input_alg: 10, geobam: 100, hivdi: 300, 
+            sic4dvar: 200, post: 150 })
+
+        self.assertEqual({ input_alg: 360, geobam: 100, hivdi: 300,
+            sic4dvar: 350, post: 150 }, graph.weights)
+        self.assertEqual([input_alg, sic4dvar, hivdi, post, geobam], 
+            graph.order)
+
+    def test_cycle(self):
+        """Tests that a cycle raises a ValueError."""
+
+        stages = self.create_stages({
+            "a": { "a": self.alg_dict(depends_on=["b"]) },
+            "b": { "b": self.alg_dict(depends_on=["a"]) }
+        })
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            Graph(stages)
+
+    def test_unknown(self):
+        """Tests that an unknown dependency raises a ValueError."""
+
+        stages = self.create_stages({
+            "a": { "a": self.alg_dict(depends_on=["missing"]) }
+        })
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            Graph(stages)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_execute(self, mock_boto):
+        """Tests the execute method."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"{kwargs['jobName']}-id" 
+        }
+
+        stages = self.create_stages({
+            "input": { "input": self.alg_dict(array_size=10) },
+            "priors": { "priors": self.alg_dict(depends_on=[]) },
+            "flpe": { 
+                "geobam": self.alg_dict(array_size=10, 
+                    depends_on=["input", "priors"])
+            }
+        })
+        stages[2].algorithms[0].n_to_n = True
+        submitted = []
+        graph = Graph(stages)
+        graph.execute(max_workers=2, on_submitted=submitted.append)
+
+        self.assertEqual(3, len(submitted))
+        self.assertEqual(submitted[-1], stages[2].algorithms[0])
+        self.assertEqual([stages[1].algorithms[0]], stages[1].submitted)
+        expected = [
+            { "jobId": "input_input_0-id", "type": "N_TO_N" },
+            { "jobId": "priors_priors_0-id" }
+        ]
+        self.assertEqual(expected, stages[2].algorithms[0].jobs[0].depends_on)
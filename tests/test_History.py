@@ -0,0 +1,123 @@
+# Standard imports
+import json
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.History import History
+
+class TestHistory(unittest.TestCase):
+    """Tests methods from History class."""
+
+    RECORDS = [
+        { "timestamp": "2024-01-01T00:00:00+00:00", "stage": "input",
+          "algorithm": "input", "job_name": "input_input_0",
+          "job_id": "input-id", "array_size": 0, "depends_on": [] },
+        { "timestamp": "2024-01-01T00:00:01+00:00", "stage": "flpe",
+          "algorithm": "hivdi", "job_name": "flpe_hivdi_0_1",
+          "job_id": "hivdi-id", "array_size": 3, "array_offset": 10,
+          "depends_on": ["input-id"] }
+    ]
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.ledger_file = Path(tmp_dir.name) / "submitted.jsonl"
+        self.ledger_file.write_text("".join(json.dumps(record) + "\n" \
+                                            for record in self.RECORDS))
+        self.history = History(Path(tmp_dir.name) / "history.sqlite")
+        self.addCleanup(self.history.close)
+
+    def child(self, index, status="SUCCEEDED", runtime=60):
+        """Return the job summary of a hivdi array child."""
+
+        return { "jobId": f"hivdi-id:{index}", "status": status,
+                 "createdAt": 0, "startedAt": 1000,
+                 "stoppedAt": 1000 + runtime * 1000,
+                 "arrayProperties": { "index": index } }
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_record_ledger(self, mock_boto):
+        """Tests that jobs and array children are recorded and queried."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            { "jobId": "input-id", "status": "SUCCEEDED", "createdAt": 0,
+              "startedAt": 1000, "stoppedAt": 31000,
+              "attempts": [ {}, {} ], "jobQueue": "input",
+              "container": { "exitCode": 0, "resourceRequirements": [
+                  { "type": "VCPU", "value": "2" },
+                  { "type": "MEMORY", "value": "4096" } ] } },
+            { "jobId": "hivdi-id", "status": "FAILED", "jobQueue": "flpe",
+              "container": { "vcpus": 1, "memory": 2048 },
+              "arrayProperties": { "statusSummary": 
+                  { "SUCCEEDED": 2, "FAILED": 1 } } }
+        ] }
+        batch.list_jobs.side_effect = [
+            { "jobSummaryList": [ self.child(0) ], "nextToken": "page-2" },
+            { "jobSummaryList": [ self.child(2, runtime=120) ] },
+            { "jobSummaryList": [ self.child(1, "FAILED") ] }
+        ]
+
+        count = self.history.record_ledger(self.ledger_file, ClientProvider())
+
+        self.assertEqual(5, count)
+        self.assertEqual(3, batch.list_jobs.call_count)
+        self.assertEqual("page-2", 
+            batch.list_jobs.call_args_list[1].kwargs["nextToken"])
+        input_job = self.history.jobs(algorithm="input")[0]
+        self.assertEqual(2, input_job["attempts"])
+        self.assertEqual(2.0, input_job["vcpus"])
+        self.assertEqual(4096, input_job["memory"])
+        children = [ job for job in self.history.jobs(stage="flpe") \
+                     if job["parent_id"] ]
+        self.assertEqual([10, 11, 12], 
+            [ child["array_index"] for child in children ])
+        self.assertEqual(2048, children[0]["memory"])
+        self.assertEqual(1, len(self.history.jobs(status="FAILED", 
+            children=False)))
+
+        runs = self.history.runs()
+        self.assertEqual("2024-01-01T00:00:00+00:00", runs[0]["run_id"])
+        self.assertEqual(4, runs[0]["jobs"])
+        self.assertEqual(1, runs[0]["failed"])
+        runtimes = self.history.runtimes()
+        self.assertEqual({ "count": 1, "mean": 30.0, "p50": 30.0, 
+            "p95": 30.0, "max": 30.0 }, runtimes["input.input"])
+        self.assertEqual(2, runtimes["flpe.hivdi"]["count"])
+        self.assertEqual(90.0, runtimes["flpe.hivdi"]["mean"])
+
+        # Recording again replaces rows instead of adding them
+        batch.list_jobs.side_effect = None
+        batch.list_jobs.return_value = { "jobSummaryList": [] }
+        self.history.record_ledger(self.ledger_file, ClientProvider())
+        self.assertEqual(5, len(self.history.jobs()))
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_record_ledger_runs(self, mock_boto):
+        """Tests that only the latest run of a ledger is recorded under its
+        own run identifier."""
+
+        records = [ dict(record, run_id="run-1") for record in self.RECORDS ]
+        records.append({ "timestamp": "2024-01-02T00:00:00+00:00",
+            "stage": "input", "algorithm": "input", 
+            "job_name": "input_input_0", "job_id": "input-id-2", 
+            "array_size": 0, "depends_on": [], "run_id": "run-2" })
+        self.ledger_file.write_text("".join(json.dumps(record) + "\n" \
+                                            for record in records))
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            { "jobId": "input-id-2", "status": "SUCCEEDED" } ] }
+
+        count = self.history.record_ledger(self.ledger_file, ClientProvider())
+
+        self.assertEqual(1, count)
+        self.assertEqual(["input-id-2"], 
+            batch.describe_jobs.call_args.kwargs["jobs"])
+        runs = self.history.runs()
+        self.assertEqual(["run-2"], [ run["run_id"] for run in runs ])
+        self.assertEqual(["input-id-2"], 
+            [ job["job_id"] for job in self.history.jobs() ])
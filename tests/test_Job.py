@@ -37,6 +37,16 @@ class TestJob(unittest.TestCase):
         expected = { "size": 500 }
         self.assertEqual(expected, job.array_props)
 
+    def test_define_environment(self):
+        """Tests the define_environment method."""
+
+        job = Job("test_job", "test_def", "test_queue")
+        job.define_array(5000, 10000)
+        job.define_environment({ "CONFLUENCE_ARRAY_OFFSET": 10000 })
+        expected = [ { "name": "CONFLUENCE_ARRAY_OFFSET", "value": "10000" } ]
+        self.assertEqual(expected, job.overrides["environment"])
+        self.assertEqual(10000, job.array_offset)
+
     def test_define_dependencies(self):
         """Tests the define_dependencies method."""
 
@@ -45,6 +55,19 @@ class TestJob(unittest.TestCase):
         expected = self.EXPECTED_DEPS
         self.assertEqual(expected, job.depends_on)
 
+    def test_define_dependencies_n_to_n(self):
+        """Tests the define_dependencies method with N_TO_N dependencies."""
+
+        job = Job("test_job", "test_def", "test_queue")
+        job.define_dependencies(self.DEPENDENCIES[:2], 
+            n_to_n_ids=[self.DEPENDENCIES[1]])
+        expected = [
+            { "jobId": "f00afeb4-354a-4e80-a226-0021a8b38e32" },
+            { "jobId": "397fdcd6-5af3-4003-862f-03fcb6594cce", 
+              "type": "N_TO_N" }
+        ]
+        self.assertEqual(expected, job.depends_on)
+
     def test_define_tags(self):
         """Test define_tags method."""
 
@@ -54,11 +77,26 @@ class TestJob(unittest.TestCase):
         self.assertEqual(expected, job.tags)
         self.assertFalse(job.propagate_tags)
 
-    @patch("confluence.Job.boto3", autospec=True)
+    def test_define_resources(self):
+        """Tests the define_resources and define_timeout methods."""
+
+        job = Job("test_job", "test_def", "test_queue")
+        job.define_arguments(["reaches.txt"])
+        job.define_resources(vcpus=0.5, memory=4096)
+        job.define_timeout(3600)
+        expected = [ { "type": "VCPU", "value": "0.5" },
+                     { "type": "MEMORY", "value": "4096" } ]
+        self.assertEqual(expected, job.overrides["resourceRequirements"])
+        self.assertEqual(["reaches.txt"], job.overrides["command"])
+        self.assertEqual({ "attemptDurationSeconds": 3600 }, 
+            job.request()["timeout"])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
     def test_submit_job(self, mock_boto):
         """Test submit_job method."""
 
-        mock_boto.client("batch").submit_job.return_value = {
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.return_value = {
             "jobArn": "amazon-resource-name",
             "jobName": "test_job",
             "jobId": "dfdf42df-7330-4de3-9ea2-a8880c57c488"
@@ -72,7 +110,7 @@ class TestJob(unittest.TestCase):
         job.submit()
 
         expected_dependencies = self.EXPECTED_DEPS
-        mock_boto.client("batch").submit_job.assert_called_once_with(
+        batch.submit_job.assert_called_once_with(
             jobName="test_job",
             jobDefinition="test_def",
             jobQueue="test_queue",
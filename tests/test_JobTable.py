@@ -0,0 +1,50 @@
+# Standard imports
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.Algorithm import Algorithm
+from confluence.JobTable import JobTable
+
+class TestJobTable(unittest.TestCase):
+    """Tests methods from JobTable class."""
+
+    def test_materialize(self):
+        """Tests that jobs are created on access and share their spec."""
+
+        table = JobTable("flpe_alg", "alg", "flpe", [(0, 6), (6, 5)],
+            { "command": ["reaches.json"] }, None, num_jobs=3,
+            reused={ "flpe_alg_1_0": "reused-id" },
+            offset_variable="OFFSET")
+
+        self.assertEqual(5, len(table))
+        self.assertEqual(["flpe_alg_0_0", "flpe_alg_0_1", "flpe_alg_1_1",
+            "flpe_alg_2_0", "flpe_alg_2_1"], [ job.name for job in table ])
+        first, second = table[1], table[2]
+        self.assertIs(first.overrides, second.overrides)
+        self.assertIs(first.array_props, second.array_props)
+        self.assertEqual({ "size": 5 }, first.array_props)
+        self.assertEqual(6, first.array_offset)
+        self.assertEqual({ "command": ["reaches.json"], "environment": [
+            { "name": "OFFSET", "value": "6" } ] }, first.overrides)
+        self.assertEqual({ "job": "flpe_alg_1_1" }, second.tags)
+        self.assertEqual({}, table.tags)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_record(self, mock_boto):
+        """Tests that submitted jobs keep their identifier and dependencies
+        and share the dependencies of their shard."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = [ { "jobId": "id-0" },
+                                         { "jobId": "id-1" } ]
+
+        alg = Algorithm("alg", 2, 0, ["reaches.json"])
+        alg.create_jobs("flpe")
+        alg.submit_jobs(["up"])
+
+        self.assertEqual(["id-0", "id-1"], [ job.job_id for job in alg.jobs ])
+        self.assertIs(alg.jobs[0].depends_on, alg.jobs[1].depends_on)
+        self.assertEqual([ { "jobId": "up" } ], alg.jobs[1].depends_on)
+        self.assertEqual({ "job": "flpe_alg_1" },
+            batch.submit_job.call_args.kwargs["tags"])
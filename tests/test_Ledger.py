@@ -0,0 +1,87 @@
+# Standard imports
+import csv
+from pathlib import Path
+import tempfile
+import unittest
+
+# Local imports
+from confluence.Job import Job
+from confluence.Ledger import Ledger
+
+class TestLedger(unittest.TestCase):
+    """Tests methods from Ledger class."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.ledger_file = Path(tmp_dir.name) / "submitted.jsonl"
+        self.csv_file = Path(tmp_dir.name) / "submitted.csv"
+
+    def create_job(self, name, job_id, dependencies=None):
+        """Return a submitted Job object."""
+
+        job = Job(name, "test_def", "test_queue")
+        job.define_array(214)
+        job.define_dependencies(dependencies if dependencies else [])
+        job.job_id = job_id
+        return job
+
+    def test_record(self):
+        """Tests the record and read methods."""
+
+        ledger = Ledger(self.ledger_file)
+        ledger.record("input", "input", self.create_job("input_input_0", "id-0"))
+        ledger.record("flpe", "hivdi", 
+            self.create_job("flpe_hivdi_0", "id-1", ["id-0"]))
+        ledger.close()
+        with open(self.ledger_file, mode='a') as jsonl_file:
+            jsonl_file.write('{"stage": "partial')
+
+        records = Ledger.read(self.ledger_file)
+        self.assertEqual(2, len(records))
+        self.assertEqual("flpe_hivdi_0", records[1]["job_name"])
+        self.assertEqual("id-1", records[1]["job_id"])
+        self.assertEqual(214, records[1]["array_size"])
+        self.assertEqual(["id-0"], records[1]["depends_on"])
+        self.assertIn("timestamp", records[1])
+
+    def test_record_disabled(self):
+        """Tests that a ledger without a file records nothing."""
+
+        ledger = Ledger()
+        ledger.record("input", "input", self.create_job("input_input_0", "id-0"))
+        self.assertIsNone(ledger.file)
+
+    def test_write_csv(self):
+        """Tests the write_csv method keeps the latest record per job."""
+
+        ledger = Ledger(self.ledger_file)
+        ledger.record("input", "input", self.create_job("input_input_0", "id-0"))
+        ledger.record("flpe", "hivdi", self.create_job("flpe_hivdi_0", "id-1"))
+        ledger.record("input", "input", self.create_job("input_input_0", "id-2"))
+        ledger.close()
+        Ledger.write_csv(self.ledger_file, self.csv_file)
+
+        with open(self.csv_file) as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        self.assertEqual(2, len(rows))
+        self.assertEqual({ "stage": "input", "algorithm": "input", 
+            "job_name": "input_input_0", "job_id": "id-2" }, rows[0])
+
+    def test_read_run(self):
+        """Tests that records are stamped with the run identifier and only
+        the latest run is read."""
+
+        ledger = Ledger(self.ledger_file)
+        ledger.record("input", "input", self.create_job("input_input_0", "id-0"))
+        ledger.close()
+        first_run = ledger.run_id
+        ledger = Ledger(self.ledger_file)
+        ledger.run_id = "run-2"
+        ledger.record("input", "input", self.create_job("input_input_0", "id-1"))
+        ledger.close()
+
+        self.assertEqual(first_run, Ledger.read(self.ledger_file)[0]["run_id"])
+        run_id, records = Ledger.read_run(self.ledger_file)
+        self.assertEqual("run-2", run_id)
+        self.assertEqual(["id-1"], [ record["job_id"] for record in records ])
@@ -0,0 +1,98 @@
+# Standard imports
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+# Third-party imports
+import boto3
+import botocore
+from botocore.stub import Stubber
+
+# Local imports
+from confluence.Metrics import Metrics
+from confluence.RateLimiter import RateLimiter
+
+class TestMetrics(unittest.TestCase):
+    """Tests methods from Metrics class."""
+
+    def create_client(self, metrics):
+        """Return an instrumented AWS Batch client with a Stubber."""
+
+        client = boto3.session.Session(aws_access_key_id="test",
+            aws_secret_access_key="test", region_name="us-west-2") \
+            .client("batch")
+        metrics.register(client)
+        return client, Stubber(client)
+
+    def create_metrics(self):
+        """Return Metrics with a fake clock that advances on each reading."""
+
+        self.now = 0.0
+        def clock():
+            self.now += 0.5
+            return self.now
+        return Metrics(clock=clock)
+
+    def test_register(self):
+        """Tests that calls, errors and throttles are recorded by hooks."""
+
+        metrics = self.create_metrics()
+        client, stubber = self.create_client(metrics)
+        stubber.add_response("submit_job", { "jobName": "a", "jobId": "id" })
+        stubber.add_client_error("submit_job",
+            service_error_code="TooManyRequestsException",
+            http_status_code=429)
+        stubber.add_response("describe_jobs", { "jobs": [] })
+        with stubber:
+            client.submit_job(jobName="a", jobQueue="q", jobDefinition="d")
+            with self.assertRaises(botocore.exceptions.ClientError):
+                client.submit_job(jobName="a", jobQueue="q", jobDefinition="d")
+            client.describe_jobs(jobs=["id"])
+
+        summary = metrics.summary()
+        submit = summary["calls"]["submit_job"]
+        self.assertEqual(2, submit["count"])
+        self.assertEqual(1, submit["errors"])
+        self.assertEqual(1, submit["throttles"])
+        self.assertEqual(0.5, submit["latency_p50"])
+        self.assertEqual(2, submit["buckets"]["0.5"])
+        self.assertEqual(1, summary["calls"]["describe_jobs"]["count"])
+
+    def test_stages(self):
+        """Tests stage wall time and throughput."""
+
+        metrics = self.create_metrics()
+        metrics.start_stage("flpe")
+        metrics.start_stage("flpe")
+        metrics.finish_stage("flpe", 2)
+        metrics.finish_stage("flpe", 2)
+
+        stage = metrics.summary()["stages"]["flpe"]
+        self.assertEqual(4, stage["jobs"])
+        self.assertEqual(1.0, stage["seconds"])
+        self.assertEqual(4.0, stage["jobs_per_second"])
+
+    def test_write(self):
+        """Tests that the JSON summary and Prometheus textfile are written."""
+
+        metrics = self.create_metrics()
+        metrics.finish_stage("input", 1)
+        context = {}
+        metrics.observe("submit_job", context)
+        limiter = RateLimiter()
+        limiter.retries = 3
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            submission_file = Path(temp_dir) / "submitted.csv"
+            metrics.write(submission_file, limiter)
+            with open(Path(temp_dir) / "submitted.metrics.json") as json_file:
+                summary = json.load(json_file)
+            prom = (Path(temp_dir) / "submitted.prom").read_text()
+
+        self.assertEqual(3, summary["limiter_retries"])
+        self.assertEqual(1, summary["jobs"])
+        self.assertIn('confluence_api_call_duration_seconds_count'
+            '{operation="submit_job"} 1', prom)
+        self.assertIn("confluence_limiter_retries_total 3", prom)
+        self.assertIn('confluence_stage_jobs{stage="input"} 1', prom)
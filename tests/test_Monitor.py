@@ -0,0 +1,86 @@
+# Standard imports
+import logging
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Monitor import Monitor
+
+class TestMonitor(unittest.TestCase):
+    """Tests methods from Monitor class."""
+
+    JOBS = [
+        { "job_id": "input-id", "stage": "input", "algorithm": "input", 
+          "array_size": 214 },
+        { "job_id": "priors-id", "stage": "priors", "algorithm": "priors", 
+          "array_size": 0 },
+        { "job_id": "hivdi-id", "stage": "flpe", "algorithm": "hivdi", 
+          "array_size": 214 }
+    ]
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_poll(self, mock_boto):
+        """Tests the poll and progress methods."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            { "jobId": "input-id", "status": "RUNNING", 
+              "arrayProperties": { "size": 214, "statusSummary": { 
+                  "RUNNING": 14, "SUCCEEDED": 200 } } },
+            { "jobId": "priors-id", "status": "SUCCEEDED" },
+            { "jobId": "hivdi-id", "status": "PENDING" }
+        ] }
+
+        monitor = Monitor(ClientProvider(), self.JOBS)
+        self.assertTrue(monitor.poll())
+        self.assertFalse(monitor.poll())
+        self.assertFalse(monitor.is_finished())
+
+        # Finished jobs are not described again
+        self.assertEqual(["input-id", "hivdi-id"], 
+            batch.describe_jobs.call_args.kwargs["jobs"])
+
+        progress = monitor.progress()
+        self.assertEqual(200, progress["input"]["input"]["SUCCEEDED"])
+        self.assertEqual(14, progress["input"]["input"]["RUNNING"])
+        self.assertEqual(1, progress["priors"]["priors"]["SUCCEEDED"])
+        self.assertEqual(214, progress["flpe"]["hivdi"]["PENDING"])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_wait(self, mock_boto):
+        """Tests the wait method and its adaptive interval."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.side_effect = [
+            { "jobs": [ { "jobId": "priors-id", "status": "RUNNING" } ] },
+            { "jobs": [ { "jobId": "priors-id", "status": "RUNNING" } ] },
+            { "jobs": [ { "jobId": "priors-id", "status": "RUNNING" } ] },
+            { "jobs": [ { "jobId": "priors-id", "status": "SUCCEEDED" } ] }
+        ]
+        sleeps = []
+        monitor = Monitor(ClientProvider(), self.JOBS[1:2], min_interval=10,
+            max_interval=20, backoff=1.5)
+        exit_code = monitor.wait(logging.getLogger("test_logger"), 
+            sleep=sleeps.append)
+
+        self.assertEqual(0, exit_code)
+        self.assertEqual([10, 15, 20], sleeps)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_wait_failed(self, mock_boto):
+        """Tests the wait method when a job fails or is unknown."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [ 
+            { "jobId": "priors-id", "status": "FAILED" } 
+        ] }
+        monitor = Monitor(ClientProvider(), self.JOBS[0:2])
+        exit_code = monitor.wait(logging.getLogger("test_logger"), 
+            sleep=lambda interval: None)
+
+        self.assertEqual(1, exit_code)
+        self.assertEqual("UNKNOWN", monitor.jobs["input-id"]["status"])
@@ -0,0 +1,82 @@
+# Standard imports
+import logging
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Third-party imports
+import yaml
+
+# Local imports
+from confluence.Plan import Plan
+
+class TestPlan(unittest.TestCase):
+    """Tests methods from Plan class."""
+
+    CONFIG_FILE = Path(__file__).parent / "data" / "confluence_test.yaml"
+    GRAPH_FILE = Path(__file__).parent / "data" / "confluence_test_graph.yaml"
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_plan(self, mock_boto):
+        """Tests that a plan is built without touching AWS."""
+
+        logger = logging.getLogger("test_logger")
+        plan = Plan(self.CONFIG_FILE, logger)
+
+        self.assertEqual(11, len(plan.jobs))
+        mock_boto.session.Session.assert_not_called()
+        flpe_ids = [ job["job_id"] for job in plan.jobs \
+                     if job["stage"] == "flpe" ]
+        integrator = plan.jobs[7]
+        self.assertEqual("integrator_integrator_0", integrator["name"])
+        self.assertEqual(flpe_ids, 
+            [ dep["jobId"] for dep in integrator["depends_on"] ])
+
+    def test_simulate(self):
+        """Tests the simulate method on a graph configuration."""
+
+        logger = logging.getLogger("test_logger")
+        plan = Plan(self.GRAPH_FILE, logger)
+        results = plan.simulate()
+
+        # input -> prediagnostics -> flpe -> validation, 60 seconds each
+        self.assertLessEqual(240, results["makespan"])
+        self.assertEqual("input_input_0", results["critical_path"][0])
+        self.assertEqual("validation_validation_0", 
+            results["critical_path"][-1])
+
+    def test_plan_fan_in(self):
+        """Tests that join jobs are planned and their overhead reported."""
+
+        with open(self.CONFIG_FILE) as yaml_file:
+            config_data = yaml.safe_load(yaml_file)
+        config_data["fan_in"] = { "limit": 3, "runtime": 10 }
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_file = Path(temp_dir) / "confluence.yaml"
+            with open(config_file, "w") as yaml_file:
+                yaml.safe_dump(config_data, yaml_file)
+            logger = logging.getLogger("test_logger")
+            plan = Plan(config_file, logger)
+
+        joins = [ job for job in plan.jobs if job["algorithm"] == "join" ]
+        self.assertEqual(1, len(joins))
+        self.assertTrue(all(len(job["depends_on"]) <= 3 for job in plan.jobs))
+        logger = MagicMock()
+        plan.report(logger)
+        self.assertIn("Join overhead: 1 jobs", 
+            logger.info.call_args.args[0])
+
+    def test_plan_quiet(self):
+        """Tests that planning does not log jobs as submitted."""
+
+        logger = MagicMock()
+        logger.name = "test_logger"
+        plan = Plan(self.CONFIG_FILE, logger)
+        plan.report(logger)
+
+        messages = [ call.args[0] for call in logger.info.call_args_list ]
+        self.assertTrue(messages[0].startswith("Planned"))
+        self.assertFalse(any("submitted" in message for message in messages))
+        self.assertEqual(logging.WARNING, 
+            logging.getLogger("test_logger.plan").level)
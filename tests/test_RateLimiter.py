@@ -0,0 +1,88 @@
+# Standard imports
+import unittest
+from unittest.mock import MagicMock
+
+# Third-party imports
+import botocore
+
+# Local imports
+from confluence.RateLimiter import RateLimiter
+from tests.confluence_response import error_response
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests methods from RateLimiter class."""
+
+    THROTTLE_RESPONSE = {
+        "Error": { "Code": "TooManyRequestsException", "Message": "Too many" },
+        "ResponseMetadata": { "HTTPStatusCode": 429 }
+    }
+
+    def create_limiter(self, **kwargs):
+        """Return a RateLimiter with a fake clock that advances on sleep."""
+
+        self.now = 0.0
+        self.sleeps = []
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now += seconds
+        return RateLimiter(clock=lambda: self.now, sleep=sleep, **kwargs)
+
+    def test_acquire(self):
+        """Tests that acquire waits once the bucket is empty."""
+
+        limiter = self.create_limiter(rate=2, burst=2, increase=0)
+        for _ in range(4): limiter.acquire()
+        self.assertAlmostEqual(1.0, self.now)
+
+    def test_classification(self):
+        """Tests the is_retryable and is_throttle methods."""
+
+        throttle = botocore.exceptions.ClientError(self.THROTTLE_RESPONSE, "Test")
+        fatal = botocore.exceptions.ClientError(error_response, "Test")
+        server = botocore.exceptions.ClientError({
+            "Error": { "Code": "ServerException" },
+            "ResponseMetadata": { "HTTPStatusCode": 500 } }, "Test")
+        connect = botocore.exceptions.EndpointConnectionError(endpoint_url="x")
+
+        self.assertTrue(RateLimiter.is_throttle(throttle))
+        self.assertTrue(RateLimiter.is_retryable(throttle))
+        self.assertFalse(RateLimiter.is_retryable(fatal))
+        self.assertFalse(RateLimiter.is_throttle(server))
+        self.assertTrue(RateLimiter.is_retryable(server))
+        self.assertTrue(RateLimiter.is_retryable(connect))
+
+    def test_call_throttled(self):
+        """Tests that throttled calls are retried and lower the rate."""
+
+        throttle = botocore.exceptions.ClientError(self.THROTTLE_RESPONSE, "Test")
+        function = MagicMock(side_effect=[throttle, throttle, { "jobId": "id" }])
+        limiter = self.create_limiter(rate=8, increase=1)
+
+        self.assertEqual({ "jobId": "id" }, limiter.call(function, jobName="a"))
+        self.assertEqual(3, function.call_count)
+        self.assertEqual(2, limiter.throttles)
+        self.assertEqual(2, limiter.retries)
+        self.assertEqual(3, limiter.rate)
+
+    def test_call_fatal(self):
+        """Tests that non-retryable errors are raised immediately."""
+
+        fatal = botocore.exceptions.ClientError(error_response, "Test")
+        function = MagicMock(side_effect=fatal)
+        limiter = self.create_limiter()
+
+        with self.assertRaises(botocore.exceptions.ClientError):
+            limiter.call(function)
+        self.assertEqual(1, function.call_count)
+
+    def test_call_exhausted(self):
+        """Tests that retries stop after max_attempts."""
+
+        throttle = botocore.exceptions.ClientError(self.THROTTLE_RESPONSE, "Test")
+        function = MagicMock(side_effect=throttle)
+        limiter = self.create_limiter(max_attempts=3, max_delay=1)
+
+        with self.assertRaises(botocore.exceptions.ClientError):
+            limiter.call(function)
+        self.assertEqual(3, function.call_count)
+        self.assertTrue(all(delay <= 1 for delay in self.sleeps))
@@ -0,0 +1,190 @@
+# Standard imports
+import json
+import logging
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.Ledger import Ledger
+from confluence.Monitor import Monitor
+from confluence.Repair import Repair
+
+class TestRepair(unittest.TestCase):
+    """Tests methods from Repair class."""
+
+    RECORDS = [
+        { "stage": "input", "algorithm": "input", "job_name": "input_input_0",
+          "job_id": "input-id", "array_size": 214, "array_offset": 0,
+          "depends_on": [] },
+        { "stage": "flpe", "algorithm": "neobam", "job_name": "flpe_neobam_0",
+          "job_id": "neobam-id", "array_size": 214, "array_offset": 0,
+          "depends_on": ["input-id"] },
+        { "stage": "moi", "algorithm": "moi", "job_name": "moi_moi_0",
+          "job_id": "moi-id", "array_size": 214, "array_offset": 0,
+          "depends_on": ["neobam-id"] },
+        { "stage": "output", "algorithm": "output", 
+          "job_name": "output_output_0", "job_id": "output-id", 
+          "array_size": 0, "array_offset": 0,
+          "depends_on": ["input-id", "moi-id"] }
+    ]
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.ledger_file = Path(tmp_dir.name) / "submitted.jsonl"
+        self.ledger_file.write_text("".join(
+            json.dumps({ **record, "run_id": "run-1" }) + "\n" \
+            for record in self.RECORDS))
+
+    def describe(self, job_id, status, size=214, depends_on=None):
+        """Return the description of a job."""
+
+        description = { "jobId": job_id, "status": status,
+            "jobDefinition": f"arn:aws:batch:job-definition/{job_id}:3",
+            "jobQueue": "arn:aws:batch:job-queue/confluence",
+            "container": { "command": ["reaches.json"], "environment": [
+                { "name": "AWS_BATCH_JOB_ID", "value": job_id },
+                { "name": "MODE", "value": "river" } ],
+                "resourceRequirements": [{ "type": "VCPU", "value": "2" }] },
+            "retryStrategy": { "attempts": 3 },
+            "tags": { "job": job_id, "project": "swot" },
+            "propagateTags": True,
+            "dependsOn": depends_on if depends_on else [] }
+        if size: description["arrayProperties"] = { "size": size }
+        return description
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_repair(self, mock_boto):
+        """Tests that failed children are repaired and downstream jobs are
+        re-wired."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            self.describe("input-id", "SUCCEEDED"),
+            self.describe("neobam-id", "FAILED", 
+                depends_on=[{ "jobId": "input-id", "type": "N_TO_N" }]),
+            self.describe("moi-id", "FAILED",
+                depends_on=[{ "jobId": "neobam-id", "type": "N_TO_N" }]),
+            self.describe("output-id", "FAILED", size=0,
+                depends_on=[{ "jobId": "input-id" }, { "jobId": "moi-id" }])
+        ] }
+        failed = [ { "jobId": f"{job_id}:{index}", "status": "FAILED" } \
+                   for job_id in ("neobam-id", "moi-id") \
+                   for index in (5, 17, 18) ]
+        batch.list_jobs.side_effect = lambda **kwargs: { "jobSummaryList": 
+            [ child for child in failed \
+              if child["jobId"].startswith(kwargs["arrayJobId"]) ] }
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"{kwargs['jobName']}-id" }
+
+        repair = Repair(self.ledger_file, ClientProvider())
+        replacements = repair.repair(logging.getLogger("test_logger"))
+
+        self.assertEqual(["flpe_neobam_0_repair", "moi_moi_0_repair",
+            "output_output_0"], [ job.name for _, job, _ in replacements ])
+        requests = { call.kwargs["jobName"]: call.kwargs \
+                     for call in batch.submit_job.call_args_list }
+        neobam = requests["flpe_neobam_0_repair"]
+        self.assertEqual({ "size": 3 }, neobam["arrayProperties"])
+        self.assertEqual([], neobam["dependsOn"])
+        self.assertEqual([
+            { "name": "MODE", "value": "river" },
+            { "name": "CONFLUENCE_ARRAY_OFFSET", "value": "0" },
+            { "name": "CONFLUENCE_ARRAY_INDEX_MAP", "value": "5,17-18" }],
+            neobam["containerOverrides"]["environment"])
+        self.assertEqual("arn:aws:batch:job-definition/neobam-id:3", 
+            neobam["jobDefinition"])
+        self.assertEqual({ "attempts": 3 }, neobam["retryStrategy"])
+        self.assertEqual({ "project": "swot", "job": "flpe_neobam_0_repair" },
+            neobam["tags"])
+        self.assertEqual([{ "jobId": "flpe_neobam_0_repair-id", 
+            "type": "N_TO_N" }], requests["moi_moi_0_repair"]["dependsOn"])
+        output = requests["output_output_0"]
+        self.assertEqual({}, output["arrayProperties"])
+        self.assertEqual([{ "jobId": "moi_moi_0_repair-id" }], 
+            output["dependsOn"])
+
+        records = Ledger.read(self.ledger_file)[len(self.RECORDS):]
+        self.assertEqual("neobam-id", records[0]["repair_of"])
+        self.assertEqual([5, 17, 18], records[0]["index_map"])
+        self.assertNotIn("index_map", records[2])
+        self.assertEqual({ "run-1" }, 
+            { record["run_id"] for record in records })
+        monitor = Monitor.from_ledger(self.ledger_file, ClientProvider())
+        self.assertEqual({ "input-id", "flpe_neobam_0_repair-id",
+            "moi_moi_0_repair-id", "output_output_0-id" }, set(monitor.jobs))
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_repair_unrepaired_upstream(self, mock_boto):
+        """Tests that a job whose failed upstream job is not repaired is
+        skipped with a warning along with its downstream jobs."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            self.describe("input-id", "SUCCEEDED"),
+            self.describe("neobam-id", "FAILED"),
+            self.describe("moi-id", "FAILED",
+                depends_on=[{ "jobId": "neobam-id", "type": "N_TO_N" }]),
+            self.describe("output-id", "FAILED", size=0,
+                depends_on=[{ "jobId": "input-id" }, { "jobId": "moi-id" }])
+        ] }
+
+        repair = Repair(self.ledger_file, ClientProvider(), ["moi.moi",
+            "output_output_0"])
+        logger = MagicMock()
+        replacements = repair.repair(logger)
+
+        self.assertEqual([], replacements)
+        batch.submit_job.assert_not_called()
+        batch.list_jobs.assert_not_called()
+        warnings = [ call.args[0] for call in logger.warning.call_args_list ]
+        self.assertEqual(2, len(warnings))
+        self.assertIn("flpe_neobam_0", warnings[0])
+        self.assertIn("moi_moi_0", warnings[1])
+        self.assertEqual(len(self.RECORDS), len(Ledger.read(self.ledger_file)))
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_repair_unrepaired_after_repair(self, mock_boto):
+        """Tests that a job is skipped when its failed upstream job is not
+        repaired after an earlier job of the run was repaired."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            self.describe("input-id", "FAILED"),
+            self.describe("neobam-id", "FAILED"),
+            self.describe("moi-id", "FAILED", depends_on=[
+                { "jobId": "input-id" },
+                { "jobId": "neobam-id", "type": "N_TO_N" }]),
+            self.describe("output-id", "FAILED", size=0,
+                depends_on=[{ "jobId": "input-id" }, { "jobId": "moi-id" }])
+        ] }
+        batch.list_jobs.return_value = { "jobSummaryList": [
+            { "jobId": "neobam-id:5", "status": "FAILED" } ] }
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobId": f"{kwargs['jobName']}-id" }
+
+        repair = Repair(self.ledger_file, ClientProvider(), ["flpe.neobam"])
+        logger = MagicMock()
+        replacements = repair.repair(logger)
+
+        self.assertEqual(["flpe_neobam_0_repair"], 
+            [ job.name for _, job, _ in replacements ])
+        warnings = [ call.args[0] for call in logger.warning.call_args_list ]
+        self.assertEqual(1, len(warnings))
+        self.assertIn("moi_moi_0", warnings[0])
+        self.assertIn("input_input_0", warnings[0])
+        self.assertEqual(1, batch.submit_job.call_count)
+
+    def test_split_indices(self):
+        """Tests index maps are encoded compactly and split at the limit."""
+
+        repair = Repair(self.ledger_file, ClientProvider())
+        indices = [0, 1, 2, 7, 9, 10]
+        self.assertEqual("0-2,7,9-10", Repair.encode_indices(indices))
+        self.assertEqual(indices, Repair.decode_indices("0-2,7,9-10"))
+        repair.INDEX_MAP_LIMIT = 6
+        self.assertEqual([[0, 1, 2, 7], [9, 10]], 
+            repair.split_indices(indices))
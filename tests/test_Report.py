@@ -0,0 +1,121 @@
+# Standard imports
+import json
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.ClientProvider import ClientProvider
+from confluence.History import History
+from confluence.Report import Report
+
+class TestReport(unittest.TestCase):
+    """Tests methods from Report class."""
+
+    RECORDS = [
+        { "timestamp": "2024-01-01T00:00:00+00:00", "stage": "input",
+          "algorithm": "input", "job_name": "input_input_0",
+          "job_id": "input-id", "array_size": 0, "depends_on": [] },
+        { "timestamp": "2024-01-01T00:00:01+00:00", "stage": "flpe",
+          "algorithm": "hivdi", "job_name": "flpe_hivdi_0",
+          "job_id": "hivdi-id", "array_size": 10, "depends_on": ["input-id"] },
+        { "timestamp": "2024-01-01T00:00:01+00:00", "stage": "flpe",
+          "algorithm": "sad", "job_name": "flpe_sad_0",
+          "job_id": "sad-id", "array_size": 0, "depends_on": ["input-id"] },
+        { "timestamp": "2024-01-01T00:00:02+00:00", "stage": "output",
+          "algorithm": "output", "job_name": "output_output_0",
+          "job_id": "output-id", "array_size": 0, 
+          "depends_on": ["hivdi-id", "sad-id"] }
+    ]
+
+    def describe(self, job_id, started, stopped, created=0, size=0):
+        """Return a job description with times in seconds."""
+
+        job = { "jobId": job_id, "status": "SUCCEEDED",
+                "createdAt": created * 1000, "startedAt": started * 1000,
+                "stoppedAt": stopped * 1000, "container": {} }
+        if size: job["arrayProperties"] = { "size": size,
+            "statusSummary": { "SUCCEEDED": size } }
+        return job
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_from_ledger(self, mock_boto):
+        """Tests the summary, critical path and written report of a run."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            self.describe("input-id", 10, 70),
+            self.describe("hivdi-id", 0, 0, created=1, size=10),
+            self.describe("sad-id", 80, 100, created=1),
+            self.describe("output-id", 400, 430, created=2)
+        ] }
+        runtimes = [ 100, 100, 100, 100, 100, 100, 100, 100, 250, 300 ]
+        batch.list_jobs.return_value = { "jobSummaryList": [
+            dict(self.describe(f"hivdi-id:{i}", 90, 90 + runtime, created=1),
+                 arrayProperties={ "index": i })
+            for i, runtime in enumerate(runtimes) ] }
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ledger_file = Path(temp_dir) / "submitted.jsonl"
+            ledger_file.write_text("".join(json.dumps(record) + "\n" \
+                                           for record in self.RECORDS))
+            report = Report.from_ledger(ledger_file, ClientProvider())
+            summary = report.write(Path(temp_dir) / "report")
+            with open(Path(temp_dir) / "report.json") as json_file:
+                self.assertEqual(summary["makespan"], 
+                    json.load(json_file)["makespan"])
+            timeline = (Path(temp_dir) / "report.html").read_text()
+
+        self.assertEqual(430, summary["makespan"])
+        self.assertEqual(13, summary["tasks"])
+        hivdi = summary["algorithms"]["flpe.hivdi"]
+        self.assertEqual(10, hivdi["tasks"])
+        self.assertEqual(100, hivdi["runtime"]["p50"])
+        self.assertEqual(300, hivdi["runtime"]["max"])
+        self.assertEqual(89, hivdi["queue_wait"]["max"])
+        self.assertEqual([9, 8], [ straggler["index"] \
+                                   for straggler in hivdi["stragglers"] ])
+        self.assertEqual(1350, hivdi["compute_seconds"])
+        self.assertEqual({ "start": 80, "end": 390, "wall_seconds": 310 },
+            { key: summary["stages"]["flpe"][key] \
+              for key in ("start", "end", "wall_seconds") })
+        self.assertEqual([], summary["overlaps"])
+        self.assertEqual(["input_input_0", "flpe_hivdi_0", "output_output_0"],
+            [ step["name"] for step in summary["critical_path"] ])
+        self.assertEqual(10, summary["critical_path"][2]["wait"])
+        self.assertIn("<svg", timeline)
+        self.assertIn("flpe_hivdi_0 ran 300s", timeline)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_from_ledger_runs(self, mock_boto):
+        """Tests that only the latest run of a ledger is reported and
+        recorded under its own run identifier."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.return_value = { "jobs": [
+            self.describe("input-id-2", 10, 70) ] }
+        records = [ dict(record, run_id="run-1") for record in self.RECORDS ]
+        records.append(dict(self.RECORDS[0], job_id="input-id-2", 
+            run_id="run-2"))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ledger_file = Path(temp_dir) / "submitted.jsonl"
+            ledger_file.write_text("".join(json.dumps(record) + "\n" \
+                                           for record in records))
+            history = History(Path(temp_dir) / "history.sqlite")
+            try:
+                report = Report.from_ledger(ledger_file, ClientProvider(),
+                    history)
+                runs = history.runs()
+                jobs = history.jobs()
+            finally:
+                history.close()
+
+        self.assertEqual(["input-id-2"], 
+            batch.describe_jobs.call_args.kwargs["jobs"])
+        self.assertEqual(["input-id-2"], 
+            [ job["job_id"] for job in report.jobs ])
+        self.assertEqual(["run-2"], [ run["run_id"] for run in runs ])
+        self.assertEqual([("input-id-2", "run-2")], 
+            [ (job["job_id"], job["run_id"]) for job in jobs ])
@@ -0,0 +1,54 @@
+# Standard imports
+import unittest
+
+# Local imports
+from confluence.Simulator import Simulator
+
+class TestSimulator(unittest.TestCase):
+    """Tests methods from Simulator class."""
+
+    def job(self, job_id, array_size=0, depends_on=None, runtime=10, vcpus=1):
+        """Return a job dictionary."""
+
+        return { "job_id": job_id, "name": job_id, "array_size": array_size,
+                 "depends_on": depends_on if depends_on else [], 
+                 "runtime": runtime, "vcpus": vcpus }
+
+    def test_run_sequential(self):
+        """Tests a chain of array jobs with full dependencies."""
+
+        jobs = [
+            self.job("input", array_size=4, runtime=10),
+            self.job("prediagnostics", array_size=4, runtime=20, 
+                depends_on=[{ "jobId": "input" }]),
+            self.job("priors", runtime=5)
+        ]
+        results = Simulator(jobs, max_vcpus=100).run()
+
+        self.assertEqual(30, results["makespan"])
+        self.assertEqual(5, results["peak_tasks"])
+        self.assertEqual(["input", "prediagnostics"], results["critical_path"])
+
+    def test_run_n_to_n(self):
+        """Tests that N_TO_N children only wait for their sibling."""
+
+        jobs = [
+            { **self.job("input", array_size=2), 
+              "runtime": { "mean": 10, "stddev": 0 } },
+            self.job("prediagnostics", array_size=2, runtime=10, 
+                depends_on=[{ "jobId": "input", "type": "N_TO_N" }])
+        ]
+        # One vCPU: input 0, then prediagnostics 0 can start before input 1
+        results = Simulator(jobs, max_vcpus=1).run()
+        self.assertEqual(40, results["makespan"])
+        self.assertEqual(1, results["peak_vcpus"])
+
+    def test_run_capacity(self):
+        """Tests that the vCPU cap limits concurrency."""
+
+        jobs = [ self.job("input", array_size=10, runtime=10, vcpus=2) ]
+        results = Simulator(jobs, max_vcpus=4).run()
+
+        self.assertEqual(50, results["makespan"])
+        self.assertEqual(2, results["peak_tasks"])
+        self.assertEqual(4, results["peak_vcpus"])
@@ -2,8 +2,12 @@
 import unittest
 from unittest.mock import patch
 
+# Third-party imports
+import botocore
+
 # Local imports
 from confluence.Stage import Stage
+from tests.confluence_response import error_response
 
 class TestStage(unittest.TestCase):
     """Tests methods from Stage class."""
@@ -69,12 +73,15 @@ class TestStage(unittest.TestCase):
         ]
         
         self.assertListEqual(expected, stage2.dependencies)
+        self.assertEqual({ job_id: 500 for job_id in expected }, 
+            stage2.array_dependencies)
     
-    @patch("confluence.Job.boto3", autospec=True)
+    @patch("confluence.ClientProvider.boto3", autospec=True)
     def test_run_algorithms(self, mock_boto):
         """Tests run_algorithms method."""
 
-        mock_boto.client("batch").submit_job.side_effect = [
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = [
             { "jobArn": "amazon-resource-name", 
               "jobName": "test_stage_geobam_0", 
               "jobId": "d90d061b-c16d-4a47-ba25-260727bac56b" }, 
@@ -105,7 +112,7 @@ class TestStage(unittest.TestCase):
         stage1.run_algorithms()
         
         self.assertEqual(3, len(stage1.submitted))
-        self.assertEqual(6, mock_boto.client("batch").submit_job.call_count)
+        self.assertEqual(6, batch.submit_job.call_count)
 
         alg = stage1.algorithms[1]
         expected = ["1d4b37c6-7dfb-4301-99f0-6181fe3ba124", 
@@ -118,4 +125,48 @@ class TestStage(unittest.TestCase):
             {"jobId": "397fdcd6-5af3-4003-862f-03fcb6594cce"},
             {"jobId": "81bf7409-2ea3-4baa-93b8-3c2613b172d0"}
         ]
-        self.assertListEqual(expected_deps, job.depends_on)
\ No newline at end of file
+        self.assertListEqual(expected_deps, job.depends_on)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_run_algorithms_concurrent(self, mock_boto):
+        """Tests run_algorithms method with concurrent submission."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = lambda **kwargs: { 
+            "jobArn": "amazon-resource-name",
+            "jobName": kwargs["jobName"],
+            "jobId": f"{kwargs['jobName']}-id"
+        }
+
+        stage = Stage("test_stage")
+        stage.dependencies = ["f00afeb4-354a-4e80-a226-0021a8b38e32"]
+        stage.create_algorithms(self.STAGE_DICT)
+        stage.run_algorithms(max_workers=3)
+
+        self.assertEqual(6, batch.submit_job.call_count)
+        self.assertListEqual(stage.algorithms, stage.submitted)
+
+        next_stage = Stage("test_next")
+        next_stage.define_dependencies(stage.algorithms)
+        expected = ["test_stage_geobam_0-id", "test_stage_geobam_1-id",
+                    "test_stage_hivdi_0-id", "test_stage_hivdi_1-id",
+                    "test_stage_metroman_0-id", "test_stage_metroman_1-id"]
+        self.assertListEqual(expected, next_stage.dependencies)
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_run_algorithms_concurrent_exception(self, mock_boto):
+        """Tests run_algorithms method when a concurrent submission fails."""
+
+        def submit_job(**kwargs):
+            if kwargs["jobName"].startswith("test_stage_hivdi"):
+                raise botocore.exceptions.ClientError(error_response, "Test")
+            return { "jobId": f"{kwargs['jobName']}-id" }
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.submit_job.side_effect = submit_job
+
+        stage = Stage("test_stage")
+        stage.create_algorithms(self.STAGE_DICT)
+        with self.assertRaises(botocore.exceptions.ClientError):
+            stage.run_algorithms(max_workers=3)
+        self.assertNotIn(stage.algorithms[1], stage.submitted)
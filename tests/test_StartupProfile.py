@@ -0,0 +1,52 @@
+# Standard imports
+from pathlib import Path
+import unittest
+from unittest.mock import MagicMock
+
+# Local imports
+from confluence.StartupProfile import StartupProfile
+
+class TestStartupProfile(unittest.TestCase):
+    """Tests methods from StartupProfile class."""
+
+    def test_measure_imports(self):
+        """Tests measure_imports records module import times and that AWS SDK
+        imports are deferred."""
+
+        profile = StartupProfile()
+        profile.measure_imports("confluence.ClientProvider",
+            cwd=Path(__file__).parent.parent)
+        names = [ name for name, _, _, _ in profile.imports ]
+        self.assertIn("confluence.ClientProvider", names)
+        self.assertIn("confluence.RateLimiter", names)
+        self.assertNotIn("boto3", names)
+        self.assertNotIn("botocore.config", names)
+        name, own, cumulative, depth = profile.imports[-1]
+        self.assertEqual("confluence.ClientProvider", name)
+        self.assertEqual(0, depth)
+        self.assertGreaterEqual(cumulative, own)
+
+        # History (sqlite3), Simulator and Plan are imported where used
+        profile.measure_imports("run_confluence",
+            cwd=Path(__file__).parent.parent)
+        names = [ name for name, _, _, _ in profile.imports ]
+        self.assertIn("confluence.Confluence", names)
+        for name in ("sqlite3", "confluence.History", "confluence.Simulator",
+            "confluence.Plan"):
+            self.assertNotIn(name, names)
+
+    def test_report(self):
+        """Tests report logs imports and phases."""
+
+        profile = StartupProfile()
+        profile.imports = [("confluence.Job", 0.001, 0.001, 1),
+            ("confluence.Algorithm", 0.002, 0.003, 0)]
+        with profile.phase("create stages"):
+            pass
+        logger = MagicMock()
+        profile.report(logger)
+        messages = [ call.args[0] for call in logger.info.call_args_list ]
+        self.assertEqual("Startup imports: 2 modules in 3.0 ms.", messages[0])
+        self.assertIn("import confluence.Algorithm: 3.0 ms cumulative", 
+            messages[1])
+        self.assertTrue(messages[-1].startswith("Startup phase create stages"))
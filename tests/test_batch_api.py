@@ -0,0 +1,34 @@
+# Standard imports
+import unittest
+from unittest.mock import patch
+
+# Local imports
+from confluence.batch_api import chunk, describe_jobs
+from confluence.ClientProvider import ClientProvider
+
+class TestBatchApi(unittest.TestCase):
+    """Tests functions from batch_api module."""
+
+    def test_chunk(self):
+        """Tests the chunk function."""
+
+        chunks = list(chunk(list(range(250)), 100))
+        self.assertEqual([100, 100, 50], [ len(c) for c in chunks ])
+        self.assertEqual(list(range(250)), [ i for c in chunks for i in c ])
+
+    @patch("confluence.ClientProvider.boto3", autospec=True)
+    def test_describe_jobs(self, mock_boto):
+        """Tests the describe_jobs function."""
+
+        batch = mock_boto.session.Session.return_value.client.return_value
+        batch.describe_jobs.side_effect = lambda jobs: { 
+            "jobs": [ { "jobId": job_id, "status": "RUNNING" } 
+                      for job_id in jobs if job_id != "job-7" ] 
+        }
+        job_ids = [ f"job-{i}" for i in range(250) ] + ["job-1"]
+        descriptions = describe_jobs(ClientProvider(), job_ids)
+
+        self.assertEqual(3, batch.describe_jobs.call_count)
+        self.assertEqual(249, len(descriptions))
+        self.assertNotIn("job-7", descriptions)
+        self.assertEqual("RUNNING", descriptions["job-0"]["status"])
@@ -0,0 +1,151 @@
+# Standard imports
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Third-party imports
+import botocore
+
+# Local imports
+import run_confluence
+
+class TestRunConfluence(unittest.TestCase):
+    """Tests functions from run_confluence script."""
+
+    def create_clients(self, boto3, expiration=None):
+        """Return mock SSM and STS clients returned by a patched boto3."""
+
+        ssm, sts = MagicMock(), MagicMock()
+        if expiration:
+            ssm.get_parameter.return_value = { "Parameter": { "Value": 
+                expiration.strftime("%Y-%m-%d %H:%M:%S+00:00") } }
+        else:
+            ssm.get_parameter.side_effect = botocore.exceptions.ClientError(
+                { "Error": { "Code": "ParameterNotFound" } }, "GetParameter")
+        sts.get_session_token.return_value = { "Credentials": {
+            "AccessKeyId": "key", "SecretAccessKey": "secret",
+            "SessionToken": "token",
+            "Expiration": datetime(2024, 1, 1, 12, tzinfo=timezone.utc) } }
+        boto3.client.side_effect = lambda service, **kwargs: \
+            ssm if service == "ssm" else sts
+        return ssm, sts
+
+    @patch("run_confluence.boto3")
+    def test_store_s3_creds_valid(self, mock_boto3):
+        """Test store_s3_creds method keeps credentials that are still valid."""
+
+        expiration = datetime.now(timezone.utc) + timedelta(hours=6)
+        ssm, sts = self.create_clients(mock_boto3, expiration)
+        renewed = run_confluence.store_s3_creds("ssm-key", 
+            logging.getLogger(__name__))
+        self.assertFalse(renewed)
+        sts.get_session_token.assert_not_called()
+        ssm.put_parameter.assert_not_called()
+
+    @patch("run_confluence.boto3")
+    def test_store_s3_creds_renew(self, mock_boto3):
+        """Test store_s3_creds method renews expiring credentials in each
+        mode."""
+
+        expiration = datetime.now(timezone.utc) + timedelta(minutes=10)
+        ssm, sts = self.create_clients(mock_boto3, expiration)
+        renewed = run_confluence.store_s3_creds("ssm-key", 
+            logging.getLogger(__name__))
+        self.assertTrue(renewed)
+        values = { call.kwargs["Name"]: call.kwargs["Value"] \
+                   for call in ssm.put_parameter.call_args_list }
+        self.assertEqual({ "s3_creds_key": "key", "s3_creds_secret": "secret",
+            "s3_creds_token": "token",
+            "s3_creds_expiration": "2024-01-01 12:00:00+00:00" }, values)
+
+        ssm, sts = self.create_clients(mock_boto3)
+        run_confluence.store_s3_creds("ssm-key", logging.getLogger(__name__),
+            mode="structured")
+        ssm.put_parameter.assert_called_once()
+        kwargs = ssm.put_parameter.call_args.kwargs
+        self.assertEqual("s3_creds", kwargs["Name"])
+        self.assertEqual("SecureString", kwargs["Type"])
+        self.assertEqual("token", json.loads(kwargs["Value"])["sessionToken"])
+
+        ssm, sts = self.create_clients(mock_boto3)
+        run_confluence.store_s3_creds("ssm-key", logging.getLogger(__name__),
+            mode="both")
+        self.assertEqual(5, ssm.put_parameter.call_count)
+
+    @patch("run_confluence.boto3")
+    def test_store_s3_creds_errors(self, mock_boto3):
+        """Test store_s3_creds method logs every failed parameter."""
+
+        ssm, sts = self.create_clients(mock_boto3)
+        def put_parameter(**kwargs):
+            if kwargs["Name"] in ("s3_creds_secret", "s3_creds_token"):
+                raise botocore.exceptions.ClientError(
+                    { "Error": { "Code": "ThrottlingException" } },
+                    "PutParameter")
+        ssm.put_parameter.side_effect = put_parameter
+        logger = MagicMock()
+        with self.assertRaises(botocore.exceptions.ClientError):
+            run_confluence.store_s3_creds("ssm-key", logger)
+        messages = [ call.args[0] for call in logger.error.call_args_list ]
+        self.assertEqual(2, len(messages))
+        self.assertIn("s3_creds_secret", messages[0])
+        self.assertIn("s3_creds_token", messages[1])
+        self.assertEqual(4, ssm.put_parameter.call_count)
+
+        with self.assertRaises(ValueError):
+            run_confluence.store_s3_creds("ssm-key", 
+                logging.getLogger(__name__), mode="single")
+
+    @patch("run_confluence.enable_renew")
+    @patch("run_confluence.store_s3_creds")
+    @patch("run_confluence.create_logger")
+    def test_main_compile(self, mock_logger, mock_store, mock_renew):
+        """Test that --compile writes a compiled plan before S3 credentials
+        are stored or the renew function is enabled."""
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        plan_file = Path(tmp_dir.name) / "confluence.json"
+        config_file = Path(__file__).parent / "data" / "confluence_test.yaml"
+        argv = ["run_confluence.py", "-c", str(config_file), "-s", "-r",
+            "--compile", str(plan_file)]
+        with patch("sys.argv", argv), self.assertRaises(SystemExit) as exit:
+            run_confluence.main()
+
+        self.assertEqual(0, exit.exception.code)
+        self.assertTrue(plan_file.exists())
+        mock_store.assert_not_called()
+        mock_renew.assert_not_called()
+
+    @patch("run_confluence.enable_renew")
+    @patch("run_confluence.store_s3_creds")
+    @patch("run_confluence.create_logger")
+    def test_main_invalid_graph(self, mock_logger, mock_store, mock_renew):
+        """Test that unknown dependencies and cycles exit with a message
+        before S3 credentials are stored or the renew function is enabled."""
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        config_file = Path(tmp_dir.name) / "confluence.yaml"
+        for depends_on, message in (("[inptu]", "unknown stage or algorithm"),
+            ("[output]", "cycle")):
+            config_file.write_text(f"""log_file: ""
+submission_file: ""
+stages:
+  input:
+    input: {{ array_size: 0, arguments: [], depends_on: {depends_on} }}
+  output:
+    output: {{ array_size: 0, arguments: [] }}
+""")
+            argv = ["run_confluence.py", "-c", str(config_file), "-s", "-r"]
+            with patch("sys.argv", argv), \
+                self.assertRaises(SystemExit) as exit:
+                run_confluence.main()
+
+            self.assertIn(message, str(exit.exception.code))
+            mock_store.assert_not_called()
+            mock_renew.assert_not_called()